@@ -0,0 +1,86 @@
+# Email extraction benchmark: BeautifulSoup get_text() path vs streaming bytes regex.
+#
+#   python -m benchmarks.bench_email_extract                  # synthetic homepages of increasing size
+#   python -m benchmarks.bench_email_extract saved_pages/     # plus a directory of saved *.html pages
+#
+# Reports per-page CPU time (process_time, best of --repeat) and peak traced memory (tracemalloc).
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from email_extractor import MAX_BODY_BYTES, find_email_in_html, find_email_in_bytes
+from benchmarks.fixtures import render_homepage
+
+
+def soup_path(body, max_bytes):
+    return find_email_in_html(body.decode("utf-8", errors="replace"))
+
+
+def bytes_path(body, max_bytes):
+    # Same byte budget the enricher applies while downloading
+    return find_email_in_bytes(memoryview(body)[:max_bytes])
+
+
+EXTRACTORS = {"soup": soup_path, "bytes": bytes_path}
+
+
+# ✅ CPU seconds (best of N) and peak traced bytes for one extractor on one page
+def measure(extract, body, max_bytes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        result = extract(body, max_bytes)
+        best = min(best, time.process_time() - started)
+
+    tracemalloc.start()
+    extract(body, max_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def synthetic_corpus():
+    pages = []
+    for sections, contact in ((10, "text"), (40, "mailto"), (120, "entity"), (300, "text"), (300, None)):
+        html = render_homepage("Acme Software", "hello@acme.io", sections=sections, contact=contact)
+        pages.append((f"synthetic {sections} sections ({contact or 'no email'})", html.encode("utf-8")))
+    return pages
+
+
+def load_corpus(paths):
+    pages = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "**", "*.html"), recursive=True)) if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, "rb") as f:
+                pages.append((file, f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email extraction on saved homepages.")
+    parser.add_argument("corpus", nargs="*", help="Saved .html files or directories")
+    parser.add_argument("--no-synthetic", action="store_true")
+    parser.add_argument("--max-kb", type=int, default=MAX_BODY_BYTES // 1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = ([] if args.no_synthetic else synthetic_corpus()) + load_corpus(args.corpus)
+    totals = {name: [0.0, 0] for name in EXTRACTORS}
+    for label, body in pages:
+        print(f"📄 {label} ({len(body) / 1024:.0f} KB)")
+        for name, extract in EXTRACTORS.items():
+            result, cpu, peak = measure(extract, body, args.max_kb * 1024, args.repeat)
+            totals[name][0] += cpu
+            totals[name][1] = max(totals[name][1], peak)
+            print(f"   {name:>5}: {cpu * 1000:8.1f} ms CPU, peak {peak / 1024 / 1024:7.2f} MB -> {result}")
+
+    print("📊 Total")
+    for name, (cpu, peak) in totals.items():
+        print(f"   {name:>5}: {cpu * 1000:8.1f} ms CPU, max peak {peak / 1024 / 1024:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Normalization benchmark: per-row .apply (as in analysis/insights.ipynb) vs vectorized pandas string operations.
+#
+#   python -m benchmarks.bench_normalize                             # 1M synthetic leads
+#   python -m benchmarks.bench_normalize --rows 100000 --locations 50000   # many distinct locations
+#
+# Synthetic rows draw the raw hourly_rate / min_project_size / employee_range / rating / review_count / location
+# strings from the dev_history sample plus the edge cases Clutch shows ("Undisclosed", "< $25 / hr", empty, missing).
+# Three paths are timed (best of --repeat) and checked for identical output:
+#   apply     one Python call per row and column, chained str.replace / split
+#   vector    normalize_leads(distinct=False): pandas .str operations over every row
+#   distinct  normalize_leads(): the same operations on each distinct value, spread back with a take
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import load_leads
+from normalize import NORMALIZERS, normalize_leads
+
+EDGE_VALUES = {
+    "hourly_rate": ["Undisclosed", "< $25 / hr", "$300+ / hr", "", None],
+    "min_project_size": ["Undisclosed", "$250,000+", "", None],
+    "employee_range": ["10,000+", "Freelancer", "", None],
+    "rating": ["", None],
+    "review_count": ["1,204", "", None],
+    "location": ["", "Paris", "Toronto, ON, Canada", None],
+}
+
+
+# ✅ rows leads, each column drawn from the sample's values (with their frequencies) and the edge cases
+def synthetic_leads(rows, seed=0, locations=0):
+    rng = np.random.default_rng(seed)
+    sample = load_leads()
+    columns = {}
+    for column, edges in EDGE_VALUES.items():
+        pool = np.array([lead.get(column) for lead in sample] + edges, dtype=object)
+        columns[column] = pool[rng.integers(0, len(pool), rows)]
+    if locations:
+        pool = np.array([f"City {i}, {'CA' if i % 3 else f'Country {i % 40}'}" for i in range(locations)], dtype=object)
+        columns["location"] = pool[rng.integers(0, locations, rows)]
+    return pd.DataFrame(columns)
+
+
+def number(text):
+    return int(text) if text.isdigit() else None
+
+
+# Row-wise reference, notebook style: one call per value
+def apply_range(value):
+    if not isinstance(value, str):
+        return None, None
+    text = value.replace("/ hr", "").replace("$", "").replace(",", "").replace(" ", "")
+    below, plus = text.startswith("<"), "+" in text
+    parts = [number(part) for part in text.replace("<", "").replace("+", "").split("-")]
+    if not parts or parts[0] is None:
+        return None, None
+    low, high = parts[0], parts[-1] if len(parts) > 1 else (None if plus else parts[0])
+    return (None if below else low), high
+
+
+def apply_hourly_rate(value):
+    low, high = apply_range(value)
+    values = [v for v in (low, high) if v is not None]
+    return low, high, (sum(values) / len(values) if values else None)
+
+
+def apply_rating(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def apply_reviews(value):
+    if value is None:
+        return None
+    digits = "".join(c for c in str(value) if c.isdigit() or c == ",").split(",")
+    return number("".join(digits)) if any(digits) else None
+
+
+def apply_location(value):
+    if not isinstance(value, str) or not value.strip():
+        return None, None, None
+    city, _, region = value.partition(",")
+    region = region.strip() or None
+    country = "United States" if region and len(region) == 2 and region.isupper() else region
+    return city.strip(), region, country
+
+
+def apply_normalize(leads):
+    typed = {}
+    rates = leads["hourly_rate"].apply(apply_hourly_rate)
+    typed["hourly_rate_min"], typed["hourly_rate_max"], typed["hourly_rate_avg"] = zip(*rates)
+    typed["min_project_usd"] = leads["min_project_size"].apply(lambda v: apply_range(v)[0])
+    typed["employees_min"], typed["employees_max"] = zip(*leads["employee_range"].apply(apply_range))
+    typed["rating_value"] = leads["rating"].apply(apply_rating)
+    typed["reviews"] = leads["review_count"].apply(apply_reviews)
+    typed["city"], typed["region"], typed["country"] = zip(*leads["location"].apply(apply_location))
+    return pd.concat([leads, pd.DataFrame(typed, index=leads.index)], axis=1)
+
+
+PATHS = {
+    "apply": apply_normalize,
+    "vector": lambda leads: normalize_leads(leads, distinct=False),
+    "distinct": normalize_leads,
+}
+
+
+def best_of(func, leads, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(leads)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+# ✅ Same values in every typed column (dtypes differ: the apply path yields object columns)
+def same_output(expected, actual):
+    for column in expected.columns.difference(list(NORMALIZERS)):
+        left = expected[column].astype("object").where(expected[column].notna(), None)
+        right = actual[column].astype("object").where(actual[column].notna(), None)
+        if not left.equals(right):
+            mismatch = (left != right).idxmax()
+            return f"{column} differs at row {mismatch}: {left[mismatch]!r} vs {right[mismatch]!r}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row-wise vs vectorized lead normalization.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--locations", type=int, default=0,
+                        help="Distinct synthetic locations instead of the sample's (worst case for 'distinct')")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    leads = synthetic_leads(args.rows, args.seed, args.locations)
+    distinct = ", ".join(f"{column} {leads[column].nunique()}" for column in leads.columns)
+    print(f"🧪 {len(leads):,} synthetic leads (distinct values: {distinct})")
+
+    results, baseline = {}, None
+    for name, func in PATHS.items():
+        results[name], seconds = best_of(func, leads, args.repeat)
+        baseline = baseline or seconds
+        print(f"   {name:>8}: {seconds:7.2f}s  {len(leads) / seconds:12,.0f} rows/s  {baseline / seconds:6.1f}x")
+
+    for name in ("vector", "distinct"):
+        problem = same_output(results["apply"], results[name])
+        print(f"   {'✅' if problem is None else '❌'} {name} vs apply: {problem or 'identical values'}")
+
+
+if __name__ == "__main__":
+    main()
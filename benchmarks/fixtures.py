@@ -0,0 +1,170 @@
+import json
+from html import escape
+from urllib.parse import quote, urlencode
+
+LEADS_SAMPLE = "dev_history/clutch_leads_page1.json"
+
+CARD_TEMPLATE = """
+<li class="provider-list-item">
+  <div class="provider provider-row sponsor" data-clutch-pid="{index}">
+    <div class="provider__main-info">
+      <h3 class="provider__title">
+        <a href="{profile_path}" class="provider__title-link directory_profile" target="_blank">
+          {name}
+        </a>
+      </h3>
+      <div class="provider__rating sg-rating">
+        <span class="sg-rating__number">{rating}</span>
+        <!-- rating widget -->
+        {rating_meta}
+        <a class="sg-rating__reviews" href="{profile_path}#reviews">{review_count} reviews</a>
+        {review_count_meta}
+      </div>
+    </div>
+    <div class="provider__highlights">
+      <div class="provider__highlights-item sg-tooltip-v2 min-project-size">{min_project_size}</div>
+      <div class="provider__highlights-item sg-tooltip-v2 hourly-rate">{hourly_rate}</div>
+      <div class="provider__highlights-item sg-tooltip-v2 employees-count">{employee_range}</div>
+      <div class="provider__highlights-item sg-tooltip-v2 location">
+        <span class="locality">{location}</span>
+      </div>
+    </div>
+    <div class="provider__description">
+      {description}
+    </div>
+    <div class="provider__cta-container">
+      <a class="website-link__item" href="{redirect}" rel="nofollow">Visit Website</a>
+    </div>
+  </div>
+</li>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Top Python Django Developers - {page} | Clutch.co</title>
+  <script>window.dataLayer = window.dataLayer || [];</script>
+  <style>.provider {{ display: flex; }}</style>
+</head>
+<body>
+  <header class="header"><nav><a href="/">Clutch</a></nav></header>
+  <main>
+    <div class="facets_result-count">{count} Companies</div>
+    <ul class="providers__list">{cards}
+    </ul>
+    <nav class="pagination-wrapper"><ul class="pagination">{pagination}
+    </ul></nav>
+  </main>
+  <footer><p>&copy; Clutch.co</p></footer>
+</body>
+</html>
+"""
+
+
+# ✅ Load a saved leads JSON (defaults to the dev_history sample)
+def load_leads(path=LEADS_SAMPLE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def meta_tag(itemprop, value):
+    return f'<meta itemprop="{itemprop}" content="{escape(value, quote=True)}">' if value is not None else ""
+
+
+# ✅ Render one lead back into Clutch-style card markup
+def render_card(lead, index=0):
+    profile_url = lead.get("profile_url") or ""
+    website = lead.get("website") or ""
+    description = lead.get("description")
+    description = f'<p class="provider__description-text-more">{escape(description)}</p>' if description is not None else ""
+    # parse_company_card unquotes the "u" param after parse_qs already decoded it once
+    redirect = "https://r.clutch.co/redirect?" + urlencode({"provider_id": index, "u": quote(website, safe="")})
+    return CARD_TEMPLATE.format(
+        index=index,
+        profile_path=escape(profile_url.replace("https://clutch.co", ""), quote=True),
+        name=escape(lead.get("name") or ""),
+        rating=escape(lead.get("rating") or ""),
+        rating_meta=meta_tag("ratingValue", lead.get("rating")),
+        review_count=escape(lead.get("review_count") or ""),
+        review_count_meta=meta_tag("reviewCount", lead.get("review_count")),
+        min_project_size=escape(lead.get("min_project_size") or ""),
+        hourly_rate=escape(lead.get("hourly_rate") or ""),
+        employee_range=escape(lead.get("employee_range") or ""),
+        location=escape(lead.get("location") or ""),
+        description=description,
+        redirect=escape(redirect, quote=True),
+    )
+
+
+# ✅ Render a full listing page, like the debug_output.html saved by dev_history scripts
+#    page is 1-based; pagination links use the scraper's 0-based ?page= index
+def render_listing_page(leads, page=1, last_page=None):
+    cards = "".join(render_card(lead, index) for index, lead in enumerate(leads))
+    last_page = page - 1 if last_page is None else last_page
+    window = sorted({0, last_page} | set(range(max(0, page - 3), min(last_page, page + 1) + 1)))
+    pagination = "".join(
+        f'\n      <li class="page-item{" active" if index == page - 1 else ""}">'
+        f'<a class="page-link" href="/developers/python-django?page={index}">{index + 1}</a></li>'
+        for index in window
+    )
+    return PAGE_TEMPLATE.format(page=page, cards=cards, count=f"{len(leads) * (last_page + 1):,}",
+                                pagination=pagination)
+
+
+SECTION_TEMPLATE = """
+<section class="section section--{index}" data-aos="fade-up">
+  <div class="container"><div class="row"><div class="col-md-6">
+    <h2 class="section__title">{title}</h2>
+    <p class="section__text">{text}</p>
+    <a class="btn btn--primary" href="/services/{index}/?utm_source=site">Learn more</a>
+  </div><div class="col-md-6">
+    <svg width="480" height="320" viewBox="0 0 480 320"><path d="{path}" fill="#2d6cdf"/></svg>
+    <img src="/static/img/hero-{index}@2x.png" srcset="/static/img/hero-{index}.webp 1x" alt="">
+  </div></div></div>
+</section>"""
+
+HOMEPAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>{name} | Software Development Company</title>
+  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css">
+  <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/swiper@8.4.7/swiper-bundle.min.css">
+  <script>window.__INITIAL_STATE__ = {state};</script>
+  <style>{css}</style>
+</head>
+<body>
+  <header class="site-header"><a class="logo" href="/"><img src="/static/logo@2x.png" alt="{name}"></a></header>
+  <main>{sections}</main>
+  <footer class="site-footer">
+    <p>&copy; {name}. All rights reserved.</p>
+    {contact}
+  </footer>
+</body>
+</html>
+"""
+
+LOREM = ("We build scalable Python and Django products for startups and enterprises, from discovery and "
+         "UX design to cloud infrastructure, data engineering and long-term support. ")
+
+
+# ✅ Render a heavy marketing-style homepage (inline JSON state, SVGs, many sections), contact in the footer
+#    contact="text" | "mailto" | "entity" | None
+def render_homepage(name, email=None, sections=40, contact="text"):
+    if email is None or contact is None:
+        contact_html = '<p>Use the <a href="/contact/">contact form</a>.</p>'
+    elif contact == "mailto":
+        contact_html = f'<a class="footer__email" href="mailto:{email}?subject=Hello">Email us</a>'
+    elif contact == "entity":
+        contact_html = f"<p>Email: {escape(email).replace('@', '&#64;')}</p>"
+    else:
+        contact_html = f"<p>Email: {escape(email)}</p>"
+
+    state = json.dumps({"items": [{"id": i, "title": f"Case study {i}", "body": LOREM} for i in range(sections * 3)]})
+    css = " ".join(f".section--{i} {{ padding: {i % 7}rem 0; background: #{i * 4099 % 0xffffff:06x}; }}" for i in range(sections))
+    path = " ".join(f"L{(i * 37) % 480} {(i * 91) % 320}" for i in range(200))
+    body = "".join(
+        SECTION_TEMPLATE.format(index=i, title=f"{escape(name)} service {i}", text=LOREM * 4, path="M0 0 " + path)
+        for i in range(sections)
+    )
+    return HOMEPAGE_TEMPLATE.format(name=escape(name), state=state, css=css, sections=body, contact=contact_html)
@@ -0,0 +1,79 @@
+# Parity check + speed comparison for the card parser engines.
+#
+#   python -m benchmarks.parser_parity                     # synthetic page built from dev_history sample
+#   python -m benchmarks.parser_parity debug_output.html   # plus any saved listing pages
+#
+# Exits with status 1 if any engine returns a different result than bs4.
+import argparse
+import sys
+import time
+
+from card_parsers import PARSER_ENGINES
+from benchmarks.fixtures import load_leads, render_listing_page
+
+REFERENCE_ENGINE = "bs4"
+
+
+# ✅ Best-of-N wall time for one engine on one page
+def time_engine(parse, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(html)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# ✅ List the fields that differ between two parsed pages
+def diff_results(expected, actual):
+    if len(expected) != len(actual):
+        return [f"card count {len(expected)} != {len(actual)}"]
+    problems = []
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        for key in want.keys() | got.keys():
+            if want.get(key) != got.get(key):
+                problems.append(f"card {index} {key}: {want.get(key)!r} != {got.get(key)!r}")
+    return problems
+
+
+def load_pages(paths, include_sample):
+    pages = []
+    if include_sample:
+        leads = load_leads()
+        pages.append(("dev_history sample (1 page)", render_listing_page(leads)))
+        pages.append(("dev_history sample (x10 cards)", render_listing_page(leads * 10)))
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare card parser engines on saved listing pages.")
+    parser.add_argument("pages", nargs="*", help="Saved listing page HTML files (e.g. debug_output.html)")
+    parser.add_argument("--no-sample", action="store_true", help="Skip the synthetic dev_history page")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for label, html in load_pages(args.pages, not args.no_sample):
+        expected = PARSER_ENGINES[REFERENCE_ENGINE](html)
+        reference_time = time_engine(PARSER_ENGINES[REFERENCE_ENGINE], html, args.repeat)
+        print(f"📄 {label}: {len(expected)} cards, {REFERENCE_ENGINE} {reference_time * 1000:.1f} ms")
+
+        for engine, parse in PARSER_ENGINES.items():
+            if engine == REFERENCE_ENGINE:
+                continue
+            problems = diff_results(expected, parse(html))
+            elapsed = time_engine(parse, html, args.repeat)
+            status = "✅ parity" if not problems else f"❌ {len(problems)} mismatches"
+            print(f"   {engine}: {elapsed * 1000:.1f} ms ({reference_time / elapsed:.1f}x) {status}")
+            for problem in problems[:10]:
+                print(f"      {problem}")
+            failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+# Offline replay harness: serves recorded listing pages and company homepages from a fixture directory
+# through a local HTTP stand-in, runs parsing + email enrichment end to end against it and reports
+# pages/sec, cards/sec, sites/sec, p50/p95 latency and peak RSS.
+#
+#   python -m benchmarks.replay build fixtures/replay --pages 5    # synthesize fixtures from the dev_history sample
+#   python -m benchmarks.replay run fixtures/replay                # writes benchmarks/results/<time>-<commit>.json
+#   python -m benchmarks.replay run fixtures/replay --preflight    # + DNS pre-flight against a stub resolver
+#   python -m benchmarks.replay compare OLD.json NEW.json
+#
+# Fixture layout (recorded pages can be dropped in the same places):
+#   listing/page-<N>.html              listing page for ?page=N
+#   sites/<host>/index.html            company homepage, other paths as sites/<host>/<path>/index.html
+#
+# The stand-in is a plain-HTTP forward proxy: the harness points HTTP_PROXY at it, so requests and aiohttp
+# reach it with their real host names. Company websites are replayed over http:// (no TLS tunnel).
+# With --preflight the enricher's DNS pre-flight asks benchmarks/stub_dns.py, which resolves every fixture site
+# and answers NXDOMAIN for any other host (no connect probe: everything goes through the proxy).
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import requests
+
+import email_extractor
+from dns_preflight import DnsPreflight
+from card_parsers import DEFAULT_ENGINE, parse_listing
+from url_utils import canonical_domain
+from benchmarks.fixtures import load_leads, render_homepage, render_listing_page
+from benchmarks.stub_dns import fixture_addresses, start_stub_resolver
+
+RESULTS_DIR = "benchmarks/results"
+LISTING_URL = "http://clutch.co/developers/python-django"
+CONTACT_STYLES = ("text", "mailto", "entity")
+EMAIL_COVERAGE = 0.4  # Share of synthetic homepages that carry an email (README reports ~30-40%)
+
+
+# ✅ Synthesize a fixture directory: N listing pages built from the dev_history sample + one homepage per domain
+def build_fixtures(directory, pages=5, leads_path=None):
+    leads = load_leads(leads_path) if leads_path else load_leads()
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.join(directory, "listing"))
+
+    domains = set()
+    for page in range(pages):
+        page_leads = []
+        for lead in leads:
+            lead = dict(lead)
+            if page:
+                lead["profile_url"] = f"{lead['profile_url']}-{page}"
+            page_leads.append(lead)
+            domains.add(canonical_domain(lead.get("website")))
+        with open(os.path.join(directory, "listing", f"page-{page}.html"), "w", encoding="utf-8") as f:
+            f.write(render_listing_page(page_leads, page + 1, pages - 1))
+
+    domains.discard(None)
+    for domain in domains:
+        digest = int(hashlib.sha1(domain.encode("utf-8")).hexdigest(), 16)
+        has_email = digest % 100 < EMAIL_COVERAGE * 100
+        html = render_homepage(domain, f"hello@{domain}" if has_email else None,
+                               sections=20 + digest % 80, contact=CONTACT_STYLES[digest % len(CONTACT_STYLES)])
+        for host in (domain, f"www.{domain}"):
+            site_dir = os.path.join(directory, "sites", host)
+            os.makedirs(site_dir, exist_ok=True)
+            with open(os.path.join(site_dir, "index.html"), "w", encoding="utf-8") as f:
+                f.write(html)
+
+    print(f"🧪 Fixtures: {pages} listing pages, {len(domains)} company sites -> {directory}")
+
+
+# ✅ Map a proxied request to a fixture file (None -> 404)
+def fixture_path(directory, host, path, query):
+    if host.endswith("clutch.co"):
+        page = parse_qs(query).get("page", ["0"])[0]
+        return os.path.join(directory, "listing", f"page-{page}.html")
+    site_dir = os.path.join(directory, "sites", host)
+    if host.startswith("www.") and not os.path.isdir(site_dir):
+        site_dir = os.path.join(directory, "sites", host[4:])
+    parts = [part for part in path.split("/") if part and part not in (".", "..")]
+    candidate = os.path.join(site_dir, *parts)
+    if os.path.isfile(candidate):
+        return candidate
+    return os.path.join(candidate, "index.html")
+
+
+def make_handler(directory, latency):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            # Proxy requests carry the absolute URL, direct ones only the path
+            parts = urlsplit(self.path)
+            host = (parts.hostname or self.headers.get("Host", "")).split(":")[0].lower()
+            path = fixture_path(directory, host, parts.path, parts.query)
+            if latency:
+                time.sleep(latency)
+            if path is None or not os.path.isfile(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # The default backlog of 5 drops concurrent connects (1 s SYN retries)
+
+
+def serve(directory, latency, port_queue):
+    server = ReplayServer(("127.0.0.1", 0), make_handler(directory, latency))
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+# ✅ Start the local stand-in on a free port in its own process (so it doesn't share the GIL with the pipeline)
+#    Returns (process, proxy URL)
+def start_server(directory, latency=0.0):
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(directory, latency, port_queue), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def stage_summary(count, elapsed, latencies, unit):
+    return {
+        "count": count,
+        "seconds": round(elapsed, 4),
+        f"{unit}_per_sec": round(count / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+    }
+
+
+# ✅ Listing stage: fetch every fixture page through the stand-in and parse it like the scraper does
+def run_listing_stage(session, pages, engine):
+    leads, latencies = [], []
+    started = time.perf_counter()
+    for page in range(pages):
+        page_started = time.perf_counter()
+        response = session.get(f"{LISTING_URL}?page={page}", timeout=30)
+        if response.status_code == 200:
+            leads.extend(parse_listing(response.text, engine))
+        latencies.append(time.perf_counter() - page_started)
+    elapsed = time.perf_counter() - started
+    summary = stage_summary(pages, elapsed, latencies, "pages")
+    summary["cards"] = len(leads)
+    summary["cards_per_sec"] = round(len(leads) / elapsed, 2) if elapsed else None
+    return leads, summary
+
+
+# ✅ Enrichment stage: the real async enricher, timed per site
+#    preflight: a DnsPreflight the enricher resolves the websites with first (None: no pre-flight)
+def run_enrichment_stage(leads, concurrency, crawl, preflight=None):
+    for lead in leads:
+        if lead.get("website"):
+            lead["website"] = urlunsplit(urlsplit(lead["website"])._replace(scheme="http"))
+
+    latencies = []
+    originals = {}
+
+    def timed(name):
+        original = originals[name] = getattr(email_extractor, name)
+
+        async def wrapper(*args, **kwargs):
+            site_started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - site_started)
+        setattr(email_extractor, name, wrapper)
+
+    timed("extract_emails_from_website_async")
+    timed("crawl_site_for_email")
+    email_extractor.PREFLIGHT = preflight
+    started = time.perf_counter()
+    try:
+        asyncio.run(email_extractor.enrich_data_with_emails_async(leads, concurrency=concurrency, crawl=crawl))
+    finally:
+        email_extractor.PREFLIGHT = None
+        for name, original in originals.items():
+            setattr(email_extractor, name, original)
+    elapsed = time.perf_counter() - started
+
+    summary = stage_summary(len(latencies), elapsed, latencies, "sites")
+    summary["companies"] = len(leads)
+    summary["emails_found"] = sum(1 for lead in leads if lead.get("email"))
+    if preflight is not None:
+        summary["preflight_hosts"] = len(preflight.results)
+        summary["preflight_dropped"] = sum(1 for host in preflight.results if preflight.dropped(host))
+    return summary
+
+
+def run(args):
+    listing_pages = len([name for name in os.listdir(os.path.join(args.fixtures, "listing")) if name.endswith(".html")])
+    pages = min(args.pages or listing_pages, listing_pages)
+    server, proxy = start_server(args.fixtures, args.latency_ms / 1000)
+    os.environ["HTTP_PROXY"] = os.environ["http_proxy"] = proxy
+    os.environ.pop("NO_PROXY", None)
+    os.environ.pop("no_proxy", None)
+    print(f"🔁 Replaying {pages} pages from {args.fixtures} via {proxy} ({args.latency_ms} ms simulated latency)")
+    resolver, preflight = None, None
+    if args.preflight:
+        resolver, nameserver = start_stub_resolver(fixture_addresses(args.fixtures))
+        preflight = DnsPreflight(nameserver=nameserver)
+
+    started = time.perf_counter()
+    try:
+        # Per-site progress lines are noise here unless asked for
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            with requests.Session() as session:
+                leads, listing = run_listing_stage(session, pages, args.engine)
+            enrichment = run_enrichment_stage(leads, args.concurrency, args.crawl, preflight)
+    finally:
+        server.terminate()
+        if resolver is not None:
+            resolver.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"fixtures": args.fixtures, "pages": pages, "engine": args.engine, "concurrency": args.concurrency,
+                   "crawl": args.crawl, "latency_ms": args.latency_ms, "preflight": args.preflight},
+        "metrics": {
+            "listing": listing,
+            "enrichment": enrichment,
+            "total_seconds": round(time.perf_counter() - started, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["metrics"], indent=2))
+    print(f"📁 Results saved to {path}")
+
+
+def flatten(metrics, prefix=""):
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+# ✅ Side-by-side diff of two result files
+def compare(args):
+    reports = []
+    for path in (args.old, args.new):
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+    old, new = (flatten(report["metrics"]) for report in reports)
+    print(f"{'metric':<32} {reports[0]['commit']:>12} {reports[1]['commit']:>12} {'change':>9}")
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        change = f"{(after - before) / before:+.1%}" if isinstance(before, (int, float)) and before and after is not None else ""
+        print(f"{key:<32} {str(before):>12} {str(after):>12} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay harness and pipeline benchmark.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Synthesize fixtures from a leads JSON")
+    build.add_argument("fixtures")
+    build.add_argument("--pages", type=int, default=5)
+    build.add_argument("--leads", help="Leads JSON to render (default: dev_history sample)")
+
+    replay = commands.add_parser("run", help="Run the pipeline against a fixture directory")
+    replay.add_argument("fixtures")
+    replay.add_argument("--pages", type=int, help="Listing pages to replay (default: all)")
+    replay.add_argument("--engine", default=DEFAULT_ENGINE)
+    replay.add_argument("--concurrency", type=int, default=email_extractor.CONCURRENCY)
+    replay.add_argument("--crawl", action="store_true")
+    replay.add_argument("--preflight", action="store_true",
+                        help="Resolve websites first, through a stub DNS server that knows the fixture sites")
+    replay.add_argument("--latency-ms", type=float, default=20, help="Simulated server latency per request")
+    replay.add_argument("--results-dir", default=RESULTS_DIR)
+    replay.add_argument("--verbose", action="store_true", help="Show the enricher's per-site output")
+
+    diff = commands.add_parser("compare", help="Compare two result files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build_fixtures(args.fixtures, args.pages, args.leads)
+    elif args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Local stub DNS server for the pre-flight (dns_preflight.py): answers A / MX queries from a table, NXDOMAIN (with
+# an SOA, so negative caching applies) for everything else. Names can also be set to fail with SERVFAIL or to get no
+# answer at all (the client times out). Runs over UDP on 127.0.0.1, needs dnspython. Used by the replay harness and
+# tests/test_dns_preflight.py.
+#
+#   python -m benchmarks.stub_dns --port 5353 --fixtures fixtures/replay     # every fixture site -> 127.0.0.1
+#   python dns_preflight.py acme.test gone.test --nameserver 127.0.0.1:5353 --mx acme.test
+#
+# In code (benchmarks/replay.py):
+#   server, nameserver = start_stub_resolver({"acme.test": "127.0.0.1"}, mx={"acme.test": "mail.acme.test"})
+#   ... DnsPreflight(nameserver=nameserver) ...
+#   server.shutdown()
+import argparse
+import os
+import socketserver
+import threading
+
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+STUB_TTL = 300          # TTL of every positive answer
+STUB_NEGATIVE_TTL = 60  # SOA minimum sent with NXDOMAIN / empty answers
+SOA = "ns.stub. hostmaster.stub. 1 3600 600 86400 {ttl}"
+
+
+def make_handler(addresses, mx, servfail, silent):
+    class StubHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data, sock = self.request
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            question = query.question[0]
+            name = question.name.to_text(omit_final_dot=True).lower()
+            known = name in addresses or name in mx
+            if name in silent:
+                return
+            if name in servfail:
+                response.set_rcode(dns.rcode.SERVFAIL)
+            elif question.rdtype == dns.rdatatype.A and name in addresses:
+                response.answer.append(dns.rrset.from_text(question.name, STUB_TTL, "IN", "A", addresses[name]))
+            elif question.rdtype == dns.rdatatype.MX and name in mx:
+                record = "0 ." if mx[name] == "." else f"10 {mx[name]}."
+                response.answer.append(dns.rrset.from_text(question.name, STUB_TTL, "IN", "MX", record))
+            else:
+                if not known:
+                    response.set_rcode(dns.rcode.NXDOMAIN)
+                zone = dns.name.from_text(name.rsplit(".", 1)[-1])
+                response.authority.append(dns.rrset.from_text(zone, STUB_NEGATIVE_TTL, "IN", "SOA",
+                                                              SOA.format(ttl=STUB_NEGATIVE_TTL)))
+            sock.sendto(response.to_wire(), self.client_address)
+
+    return StubHandler
+
+
+class StubServer(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+
+
+# ✅ Serve the table on a free (or given) port in a background thread; returns (server, "127.0.0.1:PORT")
+#    addresses: host -> IPv4 address, mx: mail domain -> exchange host ("." for a null MX),
+#    servfail: names answered with SERVFAIL, silent: names never answered
+def start_stub_resolver(addresses, mx=None, port=0, servfail=(), silent=()):
+    addresses = {host.lower(): address for host, address in addresses.items()}
+    mx = {domain.lower(): exchange for domain, exchange in (mx or {}).items()}
+    servfail, silent = {name.lower() for name in servfail}, {name.lower() for name in silent}
+    server = StubServer(("127.0.0.1", port), make_handler(addresses, mx, servfail, silent))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
+
+
+# ✅ Every fixture site (sites/<host>/) resolves to the replay stand-in's address
+def fixture_addresses(directory, address="127.0.0.1"):
+    sites = os.path.join(directory, "sites")
+    return {host: address for host in os.listdir(sites)} if os.path.isdir(sites) else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub DNS server answering from a fixed table.")
+    parser.add_argument("--port", type=int, default=5353)
+    parser.add_argument("--fixtures", help="Replay fixture directory: its sites resolve to 127.0.0.1")
+    parser.add_argument("--host", nargs="*", default=[], metavar="HOST=ADDRESS")
+    parser.add_argument("--mx", nargs="*", default=[], metavar="DOMAIN=EXCHANGE")
+    args = parser.parse_args()
+
+    addresses = fixture_addresses(args.fixtures) if args.fixtures else {}
+    addresses.update(entry.split("=", 1) for entry in args.host)
+    server, nameserver = start_stub_resolver(addresses, dict(entry.split("=", 1) for entry in args.mx), args.port)
+    print(f"🧪 Stub DNS on {nameserver}: {len(addresses)} hosts, everything else NXDOMAIN (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import math
+import re
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse, parse_qs, unquote
+
+from metrics import METRICS, profiled
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional, BeautifulSoup is always available
+    etree = lxml_html = None
+
+CARD_SELECTOR = "div.provider.provider-row"
+CLUTCH_ORIGIN = "https://clutch.co"
+
+# ✅ Pagination: ?page=N links (0-based, like the scraper's URLs) and "1,234 Companies"-style result counts
+PAGINATION_REGEX = re.compile(r'class="[^"]*pagination', re.I)
+PAGE_LINK_REGEX = re.compile(r"[?&](?:amp;)?page=(\d+)")
+RESULT_COUNT_REGEX = re.compile(r"([\d,]+)\s+(?:companies|firms|providers|agencies|results)\b", re.I)
+
+
+# ✅ Turn Clutch's redirect link into the company website
+def website_from_redirect(website_raw):
+    return unquote(parse_qs(urlparse(website_raw).query).get("u", [None])[0]) if website_raw else None
+
+
+# ✅ Extract information from a single company card (BeautifulSoup tag)
+def parse_company_card(card):
+    def get_attr(tag, attr):
+        return tag[attr] if tag and attr in tag.attrs else None
+
+    name_tag = card.find("h3", class_="provider__title")
+    name = name_tag.get_text(strip=True) if name_tag else None
+    profile_link_tag = name_tag.find("a") if name_tag else None
+    profile_url = get_attr(profile_link_tag, "href")
+    if profile_url and not profile_url.startswith("http"):
+        profile_url = CLUTCH_ORIGIN + profile_url
+
+    website_tag = card.find("a", class_="website-link__item")
+    website = website_from_redirect(get_attr(website_tag, "href"))
+
+    def find_field(cls):
+        block = card.find("div", attrs={"class": lambda x: x and cls in x})
+        return block.get_text(strip=True) if block else None
+
+    location = find_field("location")
+    hourly_rate = find_field("hourly-rate")
+    employee_range = find_field("employees-count")
+    min_project_size = find_field("min-project-size")
+
+    review_block = card.find("div", class_="provider__rating")
+    review_count = get_attr(review_block.find("meta", itemprop="reviewCount"), "content") if review_block else None
+    rating = get_attr(review_block.find("meta", itemprop="ratingValue"), "content") if review_block else None
+
+    description_tag = card.find("p", class_="provider__description-text-more")
+    description = description_tag.get_text(strip=True) if description_tag else None
+
+    return {
+        "name": name,
+        "profile_url": profile_url,
+        "website": website,
+        "location": location,
+        "hourly_rate": hourly_rate,
+        "employee_range": employee_range,
+        "min_project_size": min_project_size,
+        "review_count": review_count,
+        "rating": rating,
+        "description": description
+    }
+
+
+# ✅ BeautifulSoup engine: full html.parser tree, one find() per field
+def parse_listing_bs4(html):
+    with METRICS.timed("parse.soup"):
+        soup = BeautifulSoup(html, "html.parser")
+    with METRICS.timed("parse.cards"):
+        return [parse_company_card(card) for card in soup.select(CARD_SELECTOR)]
+
+
+# ✅ lxml engine: C parser plus XPath selectors compiled once at import time
+if etree is not None:
+    def _has_class(cls):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+    # `contains(@class, ...)` mirrors the substring lambda used by find_field()
+    _XPATH = {
+        "cards": etree.XPath(f"//div[{_has_class('provider')} and {_has_class('provider-row')}]"),
+        "name": etree.XPath(f"(.//h3[{_has_class('provider__title')}])[1]"),
+        "link": etree.XPath("(.//a)[1]"),
+        "website": etree.XPath(f"(.//a[{_has_class('website-link__item')}])[1]"),
+        "location": etree.XPath("(.//div[contains(@class, 'location')])[1]"),
+        "hourly_rate": etree.XPath("(.//div[contains(@class, 'hourly-rate')])[1]"),
+        "employee_range": etree.XPath("(.//div[contains(@class, 'employees-count')])[1]"),
+        "min_project_size": etree.XPath("(.//div[contains(@class, 'min-project-size')])[1]"),
+        "review_block": etree.XPath(f"(.//div[{_has_class('provider__rating')}])[1]"),
+        "review_count": etree.XPath("(.//meta[@itemprop='reviewCount'])[1]"),
+        "rating": etree.XPath("(.//meta[@itemprop='ratingValue'])[1]"),
+        "description": etree.XPath(f"(.//p[{_has_class('provider__description-text-more')}])[1]"),
+        # Same strings BeautifulSoup's get_text() yields: no comments, scripts or styles
+        "text": etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]"),
+    }
+
+    def _first(name, node):
+        found = _XPATH[name](node) if node is not None else []
+        return found[0] if found else None
+
+    def _text(node):
+        if node is None:
+            return None
+        return "".join(s.strip() for s in _XPATH["text"](node) if s.strip())
+
+    def _attr(node, attr):
+        return node.get(attr) if node is not None else None
+
+    def parse_company_card_lxml(card):
+        name_tag = _first("name", card)
+        profile_url = _attr(_first("link", name_tag), "href")
+        if profile_url and not profile_url.startswith("http"):
+            profile_url = CLUTCH_ORIGIN + profile_url
+
+        review_block = _first("review_block", card)
+
+        return {
+            "name": _text(name_tag),
+            "profile_url": profile_url,
+            "website": website_from_redirect(_attr(_first("website", card), "href")),
+            "location": _text(_first("location", card)),
+            "hourly_rate": _text(_first("hourly_rate", card)),
+            "employee_range": _text(_first("employee_range", card)),
+            "min_project_size": _text(_first("min_project_size", card)),
+            "review_count": _attr(_first("review_count", review_block), "content"),
+            "rating": _attr(_first("rating", review_block), "content"),
+            "description": _text(_first("description", card))
+        }
+
+    def parse_listing_lxml(html):
+        if not html or not html.strip():
+            return []
+        with METRICS.timed("parse.soup"):
+            root = lxml_html.document_fromstring(html)
+        with METRICS.timed("parse.cards"):
+            return [parse_company_card_lxml(card) for card in _XPATH["cards"](root)]
+
+
+PARSER_ENGINES = {"bs4": parse_listing_bs4}
+if etree is not None:
+    PARSER_ENGINES["lxml"] = parse_listing_lxml
+
+DEFAULT_ENGINE = "lxml" if "lxml" in PARSER_ENGINES else "bs4"
+
+
+# ✅ Parse every company card on a listing page with the chosen engine
+@profiled
+def parse_listing(html, engine=DEFAULT_ENGINE):
+    try:
+        parse = PARSER_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown parser engine {engine!r}, available: {', '.join(PARSER_ENGINES)}")
+    return parse(html)
+
+
+# ✅ Index of the directory's last page, read from the pagination links or else the result count (None if neither)
+def parse_last_page(html, cards_per_page=None):
+    if not html:
+        return None
+    pagination = PAGINATION_REGEX.search(html)
+    pages = [int(page) for page in PAGE_LINK_REGEX.findall(html, pagination.start() if pagination else 0)]
+    if pages:
+        return max(pages)
+    match = RESULT_COUNT_REGEX.search(html)
+    if match and cards_per_page:
+        return max(0, math.ceil(int(match.group(1).replace(",", "")) / cards_per_page) - 1)
+    return None
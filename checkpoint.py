@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+
+
+# ✅ Append one record as a JSON line and push it to disk right away
+def append_jsonl(path, record, handle=None):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    if handle is not None:
+        handle.write(line)
+        handle.flush()
+        os.fsync(handle.fileno())
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+# ✅ Read JSON lines, ignoring a half-written last line left by a crash
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping truncated line in {path}")
+
+
+# ✅ Write JSON atomically (temp file + rename) so the manifest is never half-written
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# ✅ Per-item progress: a JSONL of finished items plus a manifest of their keys
+#    Used for listing pages (key = page number) and for enrichment (key = company).
+class Checkpoint:
+    def __init__(self, jsonl_path, manifest_path, resume=False, manifest_every=1):
+        self.jsonl_path = jsonl_path
+        self.manifest_path = manifest_path
+        self.manifest_every = manifest_every
+        self.lock = threading.Lock()
+        self.records = {}
+        # Identifies the run across restarts: a resumed run keeps the id it started with
+        self.run_id = time.strftime("%Y%m%dT%H%M%S")
+
+        os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+        if resume:
+            # The JSONL is the source of truth: the manifest may lag one write behind it
+            for record in read_jsonl(jsonl_path):
+                self.records[record["key"]] = record["data"]
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self.run_id = json.load(f).get("run_id", self.run_id)
+        else:
+            for path in (jsonl_path, manifest_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.handle = open(jsonl_path, "a", encoding="utf-8")
+        self.pending = 0
+        if self.records:
+            print(f"♻️ Resuming: {len(self.records)} items already done ({jsonl_path})")
+
+    def is_done(self, key):
+        return key in self.records
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def record(self, key, data):
+        with self.lock:
+            append_jsonl(self.jsonl_path, {"key": key, "data": data}, self.handle)
+            self.records[key] = data
+            self.pending += 1
+            if self.pending >= self.manifest_every:
+                self._save_manifest()
+
+    def _save_manifest(self):
+        write_json_atomic(self.manifest_path, {
+            "run_id": self.run_id,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "done_count": len(self.records),
+            "done": sorted(self.records),
+        })
+        self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self._save_manifest()
+            self.handle.close()
@@ -1,22 +1,61 @@
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, parse_qs, unquote
+from card_parsers import CARD_SELECTOR, DEFAULT_ENGINE
+from checkpoint import Checkpoint, append_jsonl, write_json_atomic
+from pacing import WAIT_LOG, AdaptivePoliteness, is_challenge_page, wait_for_cards, wait_for_network_idle
+from lead_store import LEAD_DB, SCRAPED_FIELDS, LeadStore
+from metrics import METRICS, add_arguments as add_metrics_arguments, profiled, run_report
+from normalize import normalized_path, write_normalized
+from parquet_export import (add_arguments as add_parquet_arguments, check_arguments as check_parquet_arguments,
+                            export_store_run)
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from http_fastpath import FastPath, fast_path_report, page_traffic, selenium_session
+from pagination import PagePlan
+from pipeline import QUEUE_SIZE as PIPELINE_QUEUE_SIZE, PipelineStats, drain, run_parse_stage
+from profile_pool import PROFILE_DIR, ProfilePool
+from rate_limit import MAX_RETRIES, interval_limiter
+from resource_policy import (RESOURCE_METRICS_FILE, ResourcePolicy, apply_to_selenium, measure_selenium_page,
+                             summarize_resource_metrics)
 import time
-import json
-import csv
 import os
-import random
+import queue
+import threading
+import argparse
+import asyncio
 
 BASE_URL = "https://clutch.co/developers/python-django"
-TOTAL_PAGES = 10  # You can increase this value as needed
+TOTAL_PAGES = None  # None: read the directory's length from page 1 (pagination.py); a number fixes the plan
+PARSER_ENGINE = DEFAULT_ENGINE  # "lxml" when installed, otherwise "bs4" (see card_parsers.py)
+
+# ✅ Per-page progress, written as soon as each page is parsed
+PAGES_FILE = "output/clutch_leads_stealth.pages.jsonl"
+CHECKPOINT_FILE = "output/clutch_leads_stealth.checkpoint.json"
+DIFF_FILE = "output/clutch_leads_stealth.diff.json"  # Added / changed / removed leads vs the previous run
+METRICS_FILE = "output/clutch_leads_stealth.metrics.json"  # Stage timers and counters of the last run
+
+# ✅ Worker pool politeness cap
+MAX_WORKERS = 4           # Never run more browser sessions than this, whatever --workers says
+MIN_PAGE_INTERVAL = 1.5   # Seconds between two page loads, across all workers
+PARSE_PROCESSES = max(1, min(4, (os.cpu_count() or 2) - 1))  # Parser processes next to the browsers
+FAST_PATH = True  # Fetch listing pages over plain HTTP with the browser's cookies, the browser only on a challenge
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+]
+
+# ✅ Shared by all workers: stretches the delay between pages when Clutch slows down or blocks
+POLITENESS = AdaptivePoliteness()
+
+# undetected_chromedriver patches the driver binary on start, so sessions are started one at a time
+_driver_start_lock = threading.Lock()
 
 
 # ✅ Initialize stealth Chrome driver with realistic options
-def init_driver():
+def init_driver(user_agent=USER_AGENTS[0], profile_dir=None):
     options = uc.ChromeOptions()
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--no-sandbox")
@@ -25,128 +64,384 @@ def init_driver():
     options.add_argument("--start-maximized")
 
     # ✅ Fake user-agent
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+    options.add_argument(f"user-agent={user_agent}")
+
+    # ✅ Performance log: bytes transferred per page (see resource_policy.measure_selenium_page)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     # ✅ Optional: Proxy support (replace with a working proxy if needed)
     # options.add_argument('--proxy-server=http://123.123.123.123:8080')
 
-    driver = uc.Chrome(options=options)
+    with _driver_start_lock:
+        driver = uc.Chrome(options=options, user_data_dir=profile_dir)
     return driver
 
 
+# ✅ A worker's Chrome on a persistent profile leased from the pool (profile_pool.py)
+#    Times startup-to-first-cards as a cold or warm start, and swaps to a fresh profile once the pool
+#    retires the current one for being blocked too often.
+class WorkerBrowser:
+    def __init__(self, pool, worker_id, policy):
+        self.pool = pool
+        self.worker_id = worker_id
+        self.policy = policy
+        self.start()
+
+    def start(self):
+        self.driver = None
+        self.profile = self.pool.lease(USER_AGENTS, self.worker_id)
+        self.started = time.perf_counter()
+        self.first_cards = False
+        try:
+            self.driver = init_driver(self.profile["user_agent"], self.profile["path"])
+            if self.policy.enabled:
+                apply_to_selenium(self.driver, self.policy)
+        except Exception:
+            self.stop()
+            raise
+
+    # ✅ Book a fetched page on the profile; returns True when a blocked profile was just swapped for a fresh one
+    def page_done(self, html, traffic):
+        if html is not None and not self.first_cards:
+            self.first_cards = True
+            self.pool.started(self.profile, time.perf_counter() - self.started)
+        if self.pool.page_done(self.profile, blocked=bool(traffic and traffic["challenge"])):
+            return False
+        print(f"🚫 [worker {self.worker_id}] Profile {self.profile['id']} keeps getting blocked, "
+              f"restarting on a fresh profile.")
+        self.stop()
+        self.start()
+        return True
+
+    # Safe to call twice (a failed restart already stopped the browser)
+    def stop(self):
+        if self.profile is None:
+            return
+        try:
+            if self.driver is not None:
+                self.driver.quit()
+        finally:
+            self.pool.release(self.profile)
+            self.driver, self.profile = None, None
+
+
 # ✅ Scroll the page and simulate realistic user behavior
+#    Waits for lazy-loaded requests to settle instead of sleeping a fixed time
 def scroll_and_behave(driver):
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(random.uniform(2, 4))
-    body = driver.find_element(By.TAG_NAME, "body")
-    actions = ActionChains(driver)
-    actions.move_to_element_with_offset(body, 100, 100).perform()
-    time.sleep(random.uniform(1, 2))
-
-
-# ✅ Load and parse a page of company cards
-def get_company_cards(driver, page_number=0):
-    url = f"{BASE_URL}?page={page_number}"
-    driver.get(url)
-    scroll_and_behave(driver)
-
-    try:
-        WebDriverWait(driver, 25).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.provider.provider-row"))
-        )
-        print(f"🔍 Page {page_number + 1} loaded.")
-    except:
+    with METRICS.timed("scrape.scroll"):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        body = driver.find_element(By.TAG_NAME, "body")
+        actions = ActionChains(driver)
+        actions.move_to_element_with_offset(body, 100, 100).perform()
+        wait_for_network_idle(driver)
+
+
+# ✅ Load a listing page and return its HTML (None if the cards never showed up)
+@profiled
+def load_listing_page(driver, page_number=0, base_url=BASE_URL):
+    url = f"{base_url}?page={page_number}"
+    started = time.perf_counter()
+    with WAIT_LOG.timed("driver.get"):
+        driver.get(url)
+
+    card_count = wait_for_cards(driver, CARD_SELECTOR)
+    if not card_count:
+        challenge = is_challenge_page(driver.page_source)
+        if challenge:
+            POLITENESS.blocked()
+        METRICS.count("pages", outcome="challenge" if challenge else "timeout")
         print(f"❌ Timeout on page {page_number + 1}")
-        return []
-
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    return soup.select("div.provider.provider-row")
-
-
-# ✅ Extract information from a single company card
-def parse_company_card(card):
-    def get_attr(tag, attr):
-        return tag[attr] if tag and attr in tag.attrs else None
-
-    name_tag = card.find("h3", class_="provider__title")
-    name = name_tag.get_text(strip=True) if name_tag else None
-    profile_link_tag = name_tag.find("a") if name_tag else None
-    profile_url = get_attr(profile_link_tag, "href")
-    if profile_url and not profile_url.startswith("http"):
-        profile_url = "https://clutch.co" + profile_url
-
-    website_tag = card.find("a", class_="website-link__item")
-    website_raw = get_attr(website_tag, "href")
-    website = unquote(parse_qs(urlparse(website_raw).query).get("u", [None])[0]) if website_raw else None
-
-    def find_field(cls):
-        block = card.find("div", attrs={"class": lambda x: x and cls in x})
-        return block.get_text(strip=True) if block else None
-
-    location = find_field("location")
-    hourly_rate = find_field("hourly-rate")
-    employee_range = find_field("employees-count")
-    min_project_size = find_field("min-project-size")
-
-    review_block = card.find("div", class_="provider__rating")
-    review_count = get_attr(review_block.find("meta", itemprop="reviewCount"), "content") if review_block else None
-    rating = get_attr(review_block.find("meta", itemprop="ratingValue"), "content") if review_block else None
-
-    description_tag = card.find("p", class_="provider__description-text-more")
-    description = description_tag.get_text(strip=True) if description_tag else None
-
-    return {
-        "name": name,
-        "profile_url": profile_url,
-        "website": website,
-        "location": location,
-        "hourly_rate": hourly_rate,
-        "employee_range": employee_range,
-        "min_project_size": min_project_size,
-        "review_count": review_count,
-        "rating": rating,
-        "description": description
-    }
-
-
-# ✅ Save the results to JSON
-def save_to_json(data, filename):
-    os.makedirs("output", exist_ok=True)
-    with open(f"output/{filename}", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-
-# ✅ Save the results to CSV
-def save_to_csv(data, filename):
-    os.makedirs("output", exist_ok=True)
-    keys = data[0].keys()
-    with open(f"output/{filename}", "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=keys)
-        writer.writeheader()
-        writer.writerows(data)
-
-
-# ✅ Main workflow
-def main():
-    print("🚀 Starting stealth browser...")
-    driver = init_driver()
-    all_results = []
-
-    for page_number in range(TOTAL_PAGES):
-        print(f"⏳ Scraping page {page_number + 1}/{TOTAL_PAGES}...")
-        cards = get_company_cards(driver, page_number)
-        results = [parse_company_card(card) for card in cards]
-        all_results.extend(results)
-        time.sleep(random.uniform(2, 4))  # polite wait
+        return None
 
-    driver.quit()
+    POLITENESS.observe(time.perf_counter() - started)
+    scroll_and_behave(driver)
+    METRICS.count("pages", outcome="loaded")
+    METRICS.observe("scrape.load_page", time.perf_counter() - started)
+    print(f"🔍 Page {page_number + 1} loaded ({card_count} cards).")
+    return driver.page_source
+
+
+# ✅ Load a listing page through the rate limiter (None if it never showed cards)
+#    A Cloudflare challenge pauses the host with exponential, jittered backoff, then the page is tried again.
+def fetch_listing_page(driver, page_number, limiter, base_url=BASE_URL):
+    url = f"{base_url}?page={page_number}"
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(url)
+        html = load_listing_page(driver, page_number, base_url)
+        challenge = html is None and is_challenge_page(driver.page_source)
+        if not limiter.throttled(url, challenge=challenge) or attempt == MAX_RETRIES:
+            return html
+        print(f"🔁 Page {page_number + 1}: retry {attempt + 1}/{MAX_RETRIES} after backoff")
+
+
+# ✅ Tiered fetch: plain HTTP on the browser's cleared session first, the browser itself when that misses
+#    Returns (html, traffic). Every browser load hands its fresh cookies to the fast path.
+def fetch_page_tiered(driver, page_number, limiter, policy, fast=None, base_url=BASE_URL):
+    if fast is not None and fast.ready():
+        started = time.perf_counter()
+        html, _ = fast.fetch(f"{base_url}?page={page_number}")
+        if html is not None:
+            seconds = time.perf_counter() - started
+            METRICS.observe("listing.http", seconds)
+            print(f"⚡ Page {page_number + 1} fetched over HTTP.")
+            return html, page_traffic(page_number, html, seconds)
+
+    started = time.perf_counter()
+    html = fetch_listing_page(driver, page_number, limiter, base_url)
+    METRICS.observe("listing.browser", time.perf_counter() - started)
+    traffic = measure_page_traffic(driver, page_number, policy, html is not None)
+    if html is not None and fast is not None and not fast.disabled:
+        try:
+            fast.update(selenium_session(driver))
+        except Exception as e:  # the page itself is fine; only the fast path is lost
+            fast.disabled = True
+            print(f"⚠️ Could not export the browser session, staying on the browser: {e!r}")
+    return html, traffic
+
+
+# ✅ Bytes / requests / load time of the page just loaded (None if the performance log can't be read)
+def measure_page_traffic(driver, page_number, policy, loaded):
+    try:
+        traffic = measure_selenium_page(driver)
+    except Exception as e:
+        print(f"⚠️ Could not measure page {page_number + 1}: {e}")
+        return None
+    traffic.update({
+        "page": page_number,
+        "policy": policy.label,
+        "challenge": not loaded and is_challenge_page(driver.page_source),
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    return traffic
+
+
+# ✅ Fetch stage: one browser session (pooled profile + its user-agent) takes page numbers until the plan is done
+#    and hands the raw HTML to the parse stage; blocks while the parsers are PIPELINE_QUEUE_SIZE pages behind.
+def crawl_worker(worker_id, plan, html_queue, limiter, policy, stage, pool, fast_path=FAST_PATH):
+    browser = WorkerBrowser(pool, worker_id, policy)
+    fast = FastPath(limiter) if fast_path else None
+    taken = None  # page held but not delivered yet: handed back to the plan if the worker dies with it
+    try:
+        while True:
+            taken = page_number = plan.take()
+            if page_number is None:
+                return
+
+            print(f"⏳ [worker {worker_id}] Scraping page {page_number + 1}...")
+            with stage.working():
+                try:
+                    html, traffic = fetch_page_tiered(browser.driver, page_number, limiter, policy, fast)
+                except Exception as e:
+                    METRICS.count("errors", stage="fetch", type=type(e).__name__)
+                    print(f"❌ [worker {worker_id}] Page {page_number + 1} failed: {e}")
+                    html, traffic = None, measure_page_traffic(browser.driver, page_number, policy, False)
+            stage.add(items=1)
+            stage.put(html_queue, (page_number, html, traffic))
+            taken = None
+            # The page is delivered before a blocked profile's browser is restarted, so a failing restart can't lose it
+            with stage.working():
+                if browser.page_done(html, traffic) and fast is not None:
+                    fast.close()  # its cookies belong to the retired profile
+                    fast = FastPath(limiter)
+            POLITENESS.sleep()  # polite wait, adapts to load times and blocks
+    finally:
+        if taken is not None:
+            plan.abandon(taken)
+        if fast is not None:
+            fast.close()
+        browser.stop()
+
+
+# ✅ Write stage: page plan, archive, traffic log, checkpoint and lead store, one parsed page at a time
+#    If writing fails (store, archive, disk), the error goes to stage.error, the plan stops handing out pages and
+#    the parsed pages still arriving are drained, so no stage upstream blocks on a full queue.
+def write_worker(result_queue, plan, checkpoint, stage, store=None, archive=None):
+    try:
+        while True:
+            item = result_queue.get()
+            if item is None:
+                return
+            page_number, html, cards, traffic = item
+            with stage.working():
+                if page_number == 0:
+                    plan.discover(html, len(cards) or None)
+                fresh = plan.finish(page_number, cards)
+                if html and archive is not None:
+                    archive.put(f"{BASE_URL}?page={page_number}", html, "listing", checkpoint.run_id, page_number)
+                if traffic is not None:
+                    traffic["cards"] = len(cards)
+                    append_jsonl(RESOURCE_METRICS_FILE, traffic)
+                    METRICS.count("bytes", traffic["bytes"], kind="listing")
+                METRICS.count("cards", len(cards))
+
+                # Empty pages (timeouts, Cloudflare blocks) stay undone so --resume retries them
+                if cards and not fresh:
+                    print(f"♻️ Page {page_number + 1}: all {len(cards)} companies seen before, skipped.")
+                elif cards:
+                    # Stored before it is checkpointed: a page the store rejected stays undone for --resume
+                    if store is not None:
+                        store.upsert_leads(cards, checkpoint.run_id, page_number, directory=BASE_URL)
+                    checkpoint.record(page_number, cards)
+                    print(f"📝 Page {page_number + 1}: {len(cards)} cards saved.")
+            stage.add(items=1)
+    except Exception as e:
+        stage.fail(e, plan.stop)
+        drain(result_queue)
+
+
+# ✅ Scrape pages as a pipeline: browser fetchers -> bounded queue -> parser processes -> bounded queue -> writer
+#    pages: number of listing pages, or None to read it from page 1. Results are merged in page order at the end.
+def scrape_pages(pages, checkpoint, workers=1, min_interval=MIN_PAGE_INTERVAL, policy=None, store=None,
+                 archive=None, parse_processes=PARSE_PROCESSES, stats=None, fast_path=FAST_PATH, pool=None):
+    policy = policy or ResourcePolicy()
+    stats = stats or PipelineStats()
+    pool = pool or ProfilePool()
+    plan = PagePlan(pages, done=checkpoint.records)
+    for page_number in sorted(checkpoint.records):
+        plan.mark_seen(page_number, checkpoint.get(page_number))
+    if checkpoint.records:
+        print(f"⏭️ Skipping {len(checkpoint.records)} page(s) finished in a previous run.")
+
+    todo = pages - len(plan.done) if pages is not None else workers
+    if todo > 0:
+        workers = max(1, min(workers, MAX_WORKERS, todo))
+        html_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        result_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+        fetch_stage = stats.stage("fetch", workers)
+        parse_stage = stats.stage("parse", parse_processes)
+        write_stage = stats.stage("write")
+        limiter = interval_limiter(min_interval)
+        fetchers = [
+            threading.Thread(target=crawl_worker,
+                             args=(worker_id, plan, html_queue, limiter, policy, fetch_stage, pool, fast_path),
+                             daemon=True)
+            for worker_id in range(workers)
+        ]
+        parser = threading.Thread(target=run_parse_stage,
+                                  args=(html_queue, result_queue, parse_stage, PARSER_ENGINE, parse_processes,
+                                        plan.stop),
+                                  daemon=True)
+        writer = threading.Thread(target=write_worker,
+                                  args=(result_queue, plan, checkpoint, write_stage, store, archive), daemon=True)
+        for thread in fetchers + [parser, writer]:
+            thread.start()
+        for thread in fetchers:
+            thread.join()
+        html_queue.put(None)  # drains through the parse stage, then stops the writer
+        parser.join()
+        writer.join()
+        stats.raise_error()
 
-    print(f"✅ Scraped {len(all_results)} companies.")
-    save_to_json(all_results, "clutch_leads_stealth.json")
-    save_to_csv(all_results, "clutch_leads_stealth.csv")
+    all_results = []
+    for page_number in sorted(checkpoint.records):
+        all_results.extend(checkpoint.get(page_number) or [])
+    return all_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape Clutch.co company listings.")
+    parser.add_argument("--pages", type=int, default=TOTAL_PAGES,
+                        help="Number of listing pages to scrape (default: read from the pagination on page 1)")
+    parser.add_argument("--backend", choices=["selenium", "playwright"], default="selenium",
+                        help="selenium: one undetected Chrome per worker, "
+                             "playwright: one browser, one isolated context per worker (playwright_backend.py)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Parallel browser sessions/contexts (capped at MAX_WORKERS={MAX_WORKERS} for selenium)")
+    parser.add_argument("--min-interval", type=float, default=MIN_PAGE_INTERVAL,
+                        help="Minimum seconds between two page loads across all workers")
+    parser.add_argument("--resource-policy", choices=["on", "off"], default="on",
+                        help="Block images, fonts, media and trackers (resource_policy.py); "
+                             "'off' loads everything, for comparison")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Skip pages already recorded in {PAGES_FILE} by an interrupted run")
+    parser.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES,
+                        help="Processes parsing listing HTML while the browsers keep fetching (selenium backend)")
+    parser.add_argument("--no-fast-path", action="store_true",
+                        help="Load every listing page in the browser instead of plain HTTP on the browser's session "
+                             "(selenium backend)")
+    parser.add_argument("--profiles", default=PROFILE_DIR,
+                        help="Persistent browser profiles reused across runs (cookies, clearance, cache), "
+                             "with their health in pool.json")
+    parser.add_argument("--fresh-profiles", action="store_true",
+                        help="Throwaway profiles deleted after the run (every start is a cold start)")
+    parser.add_argument("--store", default=LEAD_DB, help="SQLite lead store the scraped cards are upserted into")
+    parser.add_argument("--no-archive", action="store_true",
+                        help=f"Don't keep the raw listing HTML in {ARCHIVE_DIR}/ (needed by html_archive.py reparse)")
+    add_parquet_arguments(parser)
+    add_metrics_arguments(parser, METRICS_FILE)
+    args = parser.parse_args()
+    check_parquet_arguments(parser, args)
+    return args
+
+
+# ✅ Main workflow, inside a run report (metrics.py)
+def main():
+    args = parse_args()
+    with run_report(args, "scraper") as report:
+        run(args, report)
+
+
+def run(args, report):
+    workers = max(1, min(args.workers, MAX_WORKERS)) if args.backend == "selenium" else max(1, args.workers)
+    print(f"🚀 Starting {workers} {args.backend} worker(s) for {args.pages or 'all'} pages...")
+
+    checkpoint = Checkpoint(PAGES_FILE, CHECKPOINT_FILE, resume=args.resume)
+    store = LeadStore(args.store)
+    store.begin_run(checkpoint.run_id)
+    archive = None if args.no_archive else HtmlArchive()
+    # Pages finished before an interruption may predate the store: upserting them again is harmless
+    for page_number in sorted(checkpoint.records):
+        store.upsert_leads(checkpoint.get(page_number), checkpoint.run_id, page_number, directory=BASE_URL)
+
+    started = time.perf_counter()
+    stats = PipelineStats()
+    policy = ResourcePolicy(enabled=args.resource_policy == "on")
+    # Playwright keeps a storage state per profile, not a Chrome user-data dir: its profiles live apart
+    profiles = os.path.join(args.profiles, "playwright") if args.backend == "playwright" else args.profiles
+    pool = ProfilePool(profiles, persistent=not args.fresh_profiles)
+    try:
+        if args.backend == "playwright":
+            from playwright_backend import scrape_pages_async
+            asyncio.run(scrape_pages_async(
+                args.pages, checkpoint, BASE_URL, USER_AGENTS, workers, args.min_interval, policy,
+                PARSER_ENGINE, POLITENESS, store, archive, pool,
+            ))
+        else:
+            scrape_pages(args.pages, checkpoint, workers, args.min_interval, policy, store, archive,
+                         max(1, args.parse_processes), stats, not args.no_fast_path, pool)
+    finally:
+        checkpoint.close()
+        print(pool.report())
+        pool.close()
+        if archive:
+            archive.close()
+        print(WAIT_LOG.report(time.perf_counter() - started, workers))
+        if stats.stages:
+            print(stats.report())
+            print(fast_path_report())
+            report["pipeline"] = stats.snapshot()
+        print(summarize_resource_metrics())
+
+    # ✅ Exports are streamed from the store, one batch of rows in memory at a time
+    try:
+        store.finish_run(checkpoint.run_id, list(checkpoint.records), BASE_URL)
+        diff = store.diff_report(checkpoint.run_id)
+        write_json_atomic(DIFF_FILE, diff)
+        print(f"🆚 vs run {diff['previous_run'] or '-'}: {diff['summary']['added']} added, "
+              f"{diff['summary']['changed']} changed, {diff['summary']['removed']} removed ({DIFF_FILE})")
+        count = store.export_json("output/clutch_leads_stealth.json", SCRAPED_FIELDS, checkpoint.run_id)
+        store.export_csv("output/clutch_leads_stealth.csv", SCRAPED_FIELDS, checkpoint.run_id)
+        # Typed rate / size / rating / location columns next to the raw ones (normalize.py)
+        write_normalized(store.iter_leads(SCRAPED_FIELDS, checkpoint.run_id),
+                         normalized_path("output/clutch_leads_stealth.json"))
+        if args.parquet:
+            export_store_run(store, checkpoint.run_id, args.parquet)
+    finally:
+        store.close()
+    print(f"✅ Scraped {count} companies (run {checkpoint.run_id}, store: {args.store}).")
     print("📁 Data saved to output folder.")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,362 @@
+# DNS pre-flight for the enricher: resolve every website's host concurrently before any HTTP request is sent.
+#
+#   python dns_preflight.py example.com no-such-host.invalid            # resolve + connect probe, one line per host
+#   python dns_preflight.py example.com --mx gmail.com                  # also check mail domains
+#   python dns_preflight.py shop.test --nameserver 127.0.0.1:5353       # ask a local (stub) resolver
+#
+# Answers are kept in a SQLite cache (cache/dns.sqlite3) for as long as their TTL says (clamped to MIN_TTL..MAX_TTL),
+# NXDOMAIN / no-address answers for the SOA's negative TTL. Hosts that don't exist (NXDOMAIN, no address) or refuse
+# the TCP connection are dropped instead of each burning the enricher's REQUEST_TIMEOUT. Transient failures (lookup
+# timeout, SERVFAIL, connect timeout) are neither cached nor dropped: the fetch decides. DNS and connect times are
+# recorded per domain. The enricher's aiohttp session resolves through the same answers (CachedResolver), so no host is
+# looked up twice.
+#
+# dnspython gives TTLs, MX records and --nameserver; without it the system resolver (getaddrinfo) is used with a
+# fixed FALLBACK_TTL and MX checks are unavailable.
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from metrics import METRICS
+from url_utils import url_port
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.rdatatype
+    import dns.resolver
+except ImportError:  # dnspython is optional: getaddrinfo, no TTLs, no MX
+    dns = None
+
+DNS_CACHE_FILE = "cache/dns.sqlite3"
+DNS_CONCURRENCY = 100   # Lookups (and connect probes) in flight at the same time
+DNS_TIMEOUT = 3         # Seconds per lookup, retries included
+CONNECT_TIMEOUT = 3     # Seconds for the TCP connect probe
+MIN_TTL = 60            # Answers are cached at least this long ...
+MAX_TTL = 24 * 3600     # ... and at most this long, whatever the record says
+NEGATIVE_TTL = 3600     # NXDOMAIN / no-address answers without an SOA to take the TTL from
+FALLBACK_TTL = 300      # Every answer of the system resolver (it doesn't expose TTLs)
+
+# Definite answers that mean the host can't be fetched. A timeout or SERVFAIL may be a blip of the resolver or the
+# network: those hosts are kept ("unverified") and fetched, so one bad minute doesn't drop leads for the email TTL.
+DROPPED_LOOKUPS = {"nxdomain": "unresolvable", "no_answer": "unresolvable"}
+DROPPED_CONNECTS = {"refused": "unreachable"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def clamp_ttl(seconds):
+    return max(MIN_TTL, min(MAX_TTL, int(seconds)))
+
+
+# ✅ Negative TTL of a DNS response: min(SOA TTL, SOA minimum), as RFC 2308 has resolvers cache it
+def negative_ttl(response):
+    for rrset in response.authority if response is not None else ():
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return clamp_ttl(min(rrset.ttl, rrset[0].minimum))
+    return NEGATIVE_TTL
+
+
+def site_host(website):
+    parts = urlsplit(website if "://" in website else f"https://{website}")
+    return parts.hostname, url_port(parts) or DEFAULT_PORTS.get(parts.scheme, 443)
+
+
+# ✅ Persistent answer cache: one row per (name, kind), kind "addr" (A, else AAAA) or "mx"
+class DnsCache:
+    def __init__(self, path=DNS_CACHE_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                name TEXT,
+                kind TEXT,
+                status TEXT,
+                records TEXT,
+                expires_at REAL,
+                PRIMARY KEY (name, kind)
+            )
+        """)
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    # ✅ Unexpired answer as {"status", "records"}, None if unknown or expired
+    def get(self, name, kind):
+        row = self.db.execute("SELECT status, records FROM answers WHERE name = ? AND kind = ? AND expires_at > ?",
+                              (name, kind, time.time())).fetchone()
+        self.stats["hits" if row else "misses"] += 1
+        return {"status": row[0], "records": json.loads(row[1])} if row else None
+
+    def put(self, name, kind, status, records, ttl):
+        self.db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                        (name, kind, status, json.dumps(records), time.time() + ttl))
+        self.stats["stored"] += 1
+
+    def commit(self):
+        self.db.commit()
+
+    # ✅ Drop expired answers, returns how many
+    def purge(self):
+        with self.db:
+            return self.db.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def report(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (f"🗂️ DNS cache: {self.stats['hits']} hits / {lookups} lookups ({rate:.0%}), "
+                f"{self.stats['stored']} answers stored")
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+# ✅ Resolver + connect probe over a list of websites
+#    nameserver ("HOST" or "HOST:PORT") replaces the system's resolvers, e.g. with benchmarks/stub_dns.py.
+#    probe=None probes TCP connects unless a proxy is configured (then only the proxy is ever connected to).
+class DnsPreflight:
+    def __init__(self, cache=None, nameserver=None, concurrency=DNS_CONCURRENCY, timeout=DNS_TIMEOUT,
+                 connect_timeout=CONNECT_TIMEOUT, probe=None, log_path=None):
+        if nameserver and dns is None:
+            raise RuntimeError("--nameserver needs dnspython: pip install dnspython")
+        self.cache = cache
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.probe = not urllib.request.getproxies() if probe is None else probe
+        self.log_path = log_path
+        self.concurrency = concurrency
+        self.resolver = None
+        if dns is not None:
+            self.resolver = dns.asyncresolver.Resolver(configure=nameserver is None)
+            if nameserver:
+                host, _, port = nameserver.partition(":")
+                self.resolver.nameservers = [host]
+                self.resolver.port = int(port or 53)
+        self.results = {}   # host -> last check_host() result
+        self.inflight = {}  # (name, kind) -> task, so concurrent lookups of one name share a query
+
+    # ✅ Cached lookup; returns {"status", "records", "cached"}
+    async def lookup(self, name, kind="addr"):
+        entry = self.cache.get(name, kind) if self.cache else None
+        if entry is not None:
+            return dict(entry, cached=True)
+        key = (name, kind)
+        if key not in self.inflight:
+            self.inflight[key] = asyncio.ensure_future(self.query(name, kind))
+        try:
+            status, records, ttl = await asyncio.shield(self.inflight[key])
+        finally:
+            self.inflight.pop(key, None)
+        if self.cache and ttl:
+            self.cache.put(name, kind, status, records, ttl)
+        return {"status": status, "records": records, "cached": False}
+
+    # (status, records, ttl); ttl None: don't cache
+    async def query(self, name, kind):
+        if self.resolver is None:
+            return await self.query_system(name)
+        try:
+            if kind == "mx":
+                answer = await self.resolver.resolve(name, "MX", lifetime=self.timeout)
+                records = [[record.preference, record.exchange.to_text(omit_final_dot=True)] for record in answer]
+            else:
+                try:
+                    answer = await self.resolver.resolve(name, "A", lifetime=self.timeout)
+                except dns.resolver.NoAnswer:
+                    answer = await self.resolver.resolve(name, "AAAA", lifetime=self.timeout)
+                records = [record.address for record in answer]
+            return "ok", records, clamp_ttl(answer.expiration - time.time())
+        except dns.resolver.NXDOMAIN as e:
+            return "nxdomain", [], negative_ttl(next(iter(e.responses().values()), None))
+        except dns.resolver.NoAnswer as e:
+            return "no_answer", [], negative_ttl(e.response())
+        except dns.resolver.NoNameservers:
+            return "servfail", [], None
+        except dns.exception.Timeout:
+            return "timeout", [], None
+
+    async def query_system(self, name):
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await asyncio.wait_for(loop.getaddrinfo(name, None, type=socket.SOCK_STREAM), self.timeout)
+        except asyncio.TimeoutError:
+            return "timeout", [], None
+        except socket.gaierror as e:
+            if e.errno == socket.EAI_AGAIN:
+                return "timeout", [], None
+            if e.errno == getattr(socket, "EAI_NODATA", None):
+                return "no_answer", [], FALLBACK_TTL
+            if e.errno == socket.EAI_NONAME:
+                return "nxdomain", [], FALLBACK_TTL
+            return "servfail", [], None
+        return "ok", list(dict.fromkeys(info[4][0] for info in infos)), FALLBACK_TTL
+
+    # ✅ Time a TCP connect to the first address; returns (seconds, "ok" / "refused" / "timeout" / "error")
+    #    Only a refusal is definite: a timeout or an unreachable network can be on our side.
+    async def connect(self, address, port):
+        started = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), self.connect_timeout)
+        except asyncio.TimeoutError:
+            return time.perf_counter() - started, "timeout"
+        except ConnectionRefusedError:
+            return time.perf_counter() - started, "refused"
+        except OSError:
+            return time.perf_counter() - started, "error"
+        seconds = time.perf_counter() - started
+        writer.close()
+        return seconds, "ok"
+
+    # ✅ One host: lookup (+ connect probe)
+    #    status "ok", "unverified" (a transient failure: fetched anyway) or why it's dropped
+    async def check_host(self, host, port=443):
+        started = time.perf_counter()
+        entry = await self.lookup(host)
+        dns_seconds = time.perf_counter() - started
+        if not entry["cached"]:
+            METRICS.observe("preflight.dns", dns_seconds)
+        result = {"host": host, "status": None, "lookup": entry["status"], "connect": None,
+                  "addresses": entry["records"], "cached": entry["cached"],
+                  "dns_ms": round(dns_seconds * 1000, 2), "connect_ms": None}
+        if self.probe and entry["status"] == "ok":
+            seconds, result["connect"] = await self.connect(entry["records"][0], port)
+            METRICS.observe("preflight.connect", seconds)
+            result["connect_ms"] = round(seconds * 1000, 2)
+        if result["lookup"] in DROPPED_LOOKUPS:
+            result["status"] = DROPPED_LOOKUPS[result["lookup"]]
+        elif result["connect"] in DROPPED_CONNECTS:
+            result["status"] = DROPPED_CONNECTS[result["connect"]]
+        elif result["lookup"] == "ok" and result["connect"] in (None, "ok"):
+            result["status"] = "ok"
+        else:
+            result["status"] = "unverified"
+        METRICS.count("preflight", outcome=result["status"])
+        self.results[host] = result
+        return result
+
+    # ✅ Check every website's host concurrently; returns the websites worth fetching
+    async def check(self, websites):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        targets = {site_host(website) for website in websites if website}
+
+        async def bounded(host, port):
+            async with semaphore:
+                return await self.check_host(host, port)
+
+        started = time.perf_counter()
+        with METRICS.timed("preflight"):
+            results = await asyncio.gather(*(bounded(host, port) for host, port in targets if host))
+        if self.cache:
+            self.cache.commit()
+        if self.log_path:
+            checked_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(dict(result, checked_at=checked_at)) + "\n" for result in results)
+
+        dropped = sum(1 for result in results if self.dropped(result["host"]))
+        if results:
+            print(f"🧭 DNS pre-flight: {len(results)} hosts in {time.perf_counter() - started:.1f}s, "
+                  f"{dropped} dropped ({sum(1 for r in results if r['cached'])} from cache)")
+        return [website for website in websites if website and not self.dropped(site_host(website)[0])]
+
+    # ✅ Why a website's host was dropped (None if it's fetched)
+    def dropped(self, host):
+        status = self.results.get(host, {}).get("status")
+        return status if status in ("unresolvable", "unreachable") else None
+
+    # ✅ Can a domain receive mail? MX records (a null MX "." can't), else an address (implicit MX, RFC 5321)
+    #    Lookups that time out or SERVFAIL count as yes: only a definite "no" rejects an email.
+    async def mail_domain_ok(self, domain):
+        if self.resolver is None:
+            raise RuntimeError("MX checks need dnspython: pip install dnspython")
+        entry = await self.lookup(domain.lower(), "mx")
+        if entry["status"] == "ok":
+            return any(exchange not in ("", ".") for _, exchange in entry["records"])
+        if entry["status"] == "no_answer":
+            entry = await self.lookup(domain.lower())
+        return entry["status"] not in ("nxdomain", "no_answer")
+
+    # ✅ aiohttp resolver answering from the pre-flight results (see CachedResolver)
+    def aiohttp_resolver(self):
+        return CachedResolver(self)
+
+
+# ✅ aiohttp resolver that reuses the pre-flight's addresses; other hosts (proxies, redirects) go to aiohttp's own
+class CachedResolver(AbstractResolver):
+    def __init__(self, preflight):
+        self.preflight = preflight
+        self.fallback = DefaultResolver()
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        result = self.preflight.results.get(host)
+        if not result or result["lookup"] != "ok" or not result["addresses"]:
+            return await self.fallback.resolve(host, port, family)
+        hosts = []
+        for address in result["addresses"]:
+            address_family = socket.AF_INET6 if ":" in address else socket.AF_INET
+            if family in (socket.AF_UNSPEC, address_family):
+                hosts.append({"hostname": host, "host": address, "port": port, "family": address_family,
+                              "proto": 0, "flags": socket.AI_NUMERICHOST})
+        return hosts or await self.fallback.resolve(host, port, family)
+
+    async def close(self):
+        await self.fallback.close()
+
+
+def add_arguments(parser):
+    parser.add_argument("--no-preflight", action="store_true",
+                        help="Don't resolve hosts before fetching (dead hosts then wait for the request timeout)")
+    parser.add_argument("--check-mx", action="store_true",
+                        help="Drop found emails whose domain can't receive mail (no MX, no address; needs dnspython)")
+    parser.add_argument("--nameserver", metavar="HOST[:PORT]",
+                        help="Resolve with this DNS server instead of the system's (needs dnspython)")
+    parser.add_argument("--dns-cache", default=DNS_CACHE_FILE, help="SQLite cache of DNS answers")
+
+
+# ✅ Fail at startup when an option needs dnspython and it's missing
+def check_arguments(parser, args):
+    if dns is None and (args.check_mx or args.nameserver):
+        parser.error("--check-mx and --nameserver need dnspython (pip install dnspython)")
+
+
+async def run_checks(preflight, hosts, mail_domains):
+    await preflight.check(hosts)
+    return {domain: await preflight.mail_domain_ok(domain) for domain in mail_domains}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve hosts (and mail domains) like the enricher's pre-flight.")
+    parser.add_argument("hosts", nargs="*", help="Hosts or websites")
+    parser.add_argument("--mx", nargs="*", default=[], metavar="DOMAIN", help="Mail domains to check")
+    parser.add_argument("--no-probe", action="store_true", help="Skip the TCP connect probe")
+    parser.add_argument("--nameserver", metavar="HOST[:PORT]")
+    parser.add_argument("--dns-cache", default=DNS_CACHE_FILE)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    if dns is None and (args.mx or args.nameserver):
+        parser.error("--mx and --nameserver need dnspython (pip install dnspython)")
+
+    cache = None if args.no_cache else DnsCache(args.dns_cache)
+    preflight = DnsPreflight(cache, args.nameserver, probe=False if args.no_probe else None)
+    mail = asyncio.run(run_checks(preflight, args.hosts, args.mx))
+    for result in preflight.results.values():
+        connect = f", connect {result['connect']} {result['connect_ms']} ms" if result["connect"] else ""
+        print(f"   {result['host']:<40} {result['status']:<12} {result['lookup']:<16} dns {result['dns_ms']} ms"
+              f"{' (cached)' if result['cached'] else ''}{connect}  {' '.join(result['addresses'][:3])}")
+    for domain, ok in mail.items():
+        print(f"   ✉️ {domain:<38} {'accepts mail' if ok else 'no MX / no address'}")
+    if cache:
+        print(cache.report())
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,641 @@
 import requests
 import re
+import html
 import json
 import os
+import time
+import asyncio
+import argparse
+import aiohttp
 from bs4 import BeautifulSoup
+from checkpoint import Checkpoint
+from dns_preflight import (DnsCache, DnsPreflight, add_arguments as add_dns_arguments,
+                           check_arguments as check_dns_arguments, site_host)
+from http_cache import ResponseCache, CACHE_DIR, CACHE_TTL
+from lead_store import EMAIL_TTL_DAYS, ENRICHED_FIELDS, LeadStore
+from metrics import METRICS, add_arguments as add_metrics_arguments, profiled, run_report
+from normalize import normalized_path, write_normalized
+from parquet_export import (add_arguments as add_parquet_arguments, check_arguments as check_parquet_arguments,
+                            export_store_run, write_leads as write_parquet_leads)
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from rate_limit import MAX_RETRIES, RateLimiter
+from url_utils import canonical_domain, canonical_website, normalize_url
+from urllib.parse import unquote, urljoin, urlsplit
 
 INPUT_FILE = "output/clutch_leads_stealth.json"
 OUTPUT_FILE = "output/enriched_with_email.json"
+PROGRESS_FILE = "output/enriched_with_email.progress.jsonl"
+CHECKPOINT_FILE = "output/enriched_with_email.checkpoint.json"
+METRICS_FILE = "output/enriched_with_email.metrics.json"  # Stage timers and counters of the last run
+DNS_LOG_FILE = "output/enriched_with_email.dns.jsonl"     # Per-domain DNS / connect times of the pre-flight
 
 EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
+# Streaming scan: the domain has to end in an alphabetic TLD, so versioned assets ("bootstrap@5.3.0") don't match
+EMAIL_BYTES_REGEX = re.compile(rb"[a-zA-Z0-9_.+-]+@(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}")
+# Inside a tag, within a URL attribute value that isn't a mailto: link ("https://cdn.example/npm/swiper@8.4.7/...")
+URL_ATTRIBUTE_BYTES_REGEX = re.compile(rb"""\s(?:href|src|srcset|action|data-src)\s*=\s*["']?(?!mailto:)[^"'\s>]*$""",
+                                       re.I)
+URL_LOOKBEHIND = 2048  # Bytes searched back for the enclosing tag
+MAILTO_BYTES_REGEX = re.compile(rb"mailto:([^\"'?>\s]+)", re.I)
+ENTITY_BYTES_REGEX = re.compile(rb"&(?:#\d+|#x[0-9a-f]+|commat);", re.I)
+IGNORED_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif")
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 }
 
-def extract_emails_from_website(url):
-    try:
-        if not url:
-            return None
-        response = requests.get(url, headers=HEADERS, timeout=10)
+REQUEST_TIMEOUT = 10  # Seconds per website
+MAX_BODY_BYTES = 2 * 1024 * 1024  # Stop downloading a page after this many bytes
+CHUNK_SIZE = 64 * 1024
+CHUNK_OVERLAP = 512  # Bytes carried over between chunks so split emails still match
+
+# ✅ Raw homepage archive (html_archive.py), set up by main(); None disables archiving
+ARCHIVE = None
+
+# ✅ DNS pre-flight (dns_preflight.py), set up by main(); None fetches every website without resolving it first
+PREFLIGHT = None
+CHECK_MX = False  # Also drop found emails whose domain can't receive mail
+
+# ✅ Async engine limits
+CONCURRENCY = 50       # Websites fetched at the same time
+PER_HOST_LIMIT = 2     # Open connections allowed to a single host
+DNS_CACHE_TTL = 300    # Seconds a resolved host is reused
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle pooled connection is kept open
+
+# ✅ Request rate: unlimited overall (CONCURRENCY caps it), a few per second to any one website.
+#    429 / 503 / Cloudflare challenges back the website off exponentially (rate_limit.py) and are retried.
+ENRICH_RATE = None
+ENRICH_HOST_RATE = 2.0
+LIMITER = RateLimiter(ENRICH_RATE, ENRICH_HOST_RATE, burst=PER_HOST_LIMIT)
+
+# ✅ Optional contact crawl (--crawl), limits are per domain
+CRAWL_PAGE_BUDGET = 6          # Pages fetched at most
+CRAWL_TIME_BUDGET = 20         # Seconds spent at most
+CRAWL_PARALLEL = PER_HOST_LIMIT  # Pages of one domain in flight at the same time
+CONTACT_PATHS = ("/contact", "/contact-us", "/about", "/about-us")
+CONTACT_HINTS = ("contact", "about", "team", "company", "impressum", "kontakt", "get-in-touch", "reach-us")
+HREF_BYTES_REGEX = re.compile(rb"""href\s*=\s*["']([^"'#]+)["']""", re.I)
+SKIPPED_LINK_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".pdf", ".zip", ".css", ".js", ".ico", ".xml")
+
+
+# ✅ Original DOM-based extractor, kept as the reference for benchmarks/bench_email_extract.py
+def find_email_in_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+    text = soup.get_text()
+    matches = re.findall(EMAIL_REGEX, text)
+    unique_emails = list(set(matches))
+
+    # Return only first email found for now
+    return unique_emails[0] if unique_emails else None
+
+
+# ✅ Streaming extractor: regex over raw response bytes, no DOM
+def clean_email(raw):
+    email = unquote(raw.decode("ascii", errors="ignore")).strip().rstrip(".-")
+    if not EMAIL_BYTES_REGEX.fullmatch(email.encode("ascii", errors="ignore")):
+        return None
+    # Retina assets like "logo@2x.png" look like addresses
+    if email.lower().endswith(IGNORED_EMAIL_SUFFIXES):
+        return None
+    return email
+
+
+# ✅ Is a plain-text match part of a URL (a path segment, or an href / src value) rather than an address?
+def inside_url(data, start):
+    if data[start - 1:start] == b"/":
+        return True
+    tag = data.rfind(b"<", max(0, start - URL_LOOKBEHIND), start)
+    if tag < 0 or data.rfind(b">", tag, start) >= 0:
+        return False
+    return URL_ATTRIBUTE_BYTES_REGEX.search(data, tag, start) is not None
+
+
+# ✅ First email in a buffer: mailto: links first, then plain text, then entity-decoded text (&#64; / &commat;)
+#    With final=False a match touching the end of the buffer is skipped: the next chunk may extend it.
+def scan_for_email(data, final=True):
+    for regex, group in ((MAILTO_BYTES_REGEX, 1), (EMAIL_BYTES_REGEX, 0)):
+        for match in regex.finditer(data):
+            if not final and match.end() == len(data):
+                continue
+            if group == 0 and inside_url(data, match.start()):
+                continue
+            email = clean_email(match.group(group))
+            if email:
+                return email
+
+    if ENTITY_BYTES_REGEX.search(data):
+        decoded = html.unescape(data.decode("latin-1")).encode("utf-8", errors="ignore")
+        if decoded != data:
+            return scan_for_email(decoded, final)
+    return None
+
+
+# ✅ Feed response chunks as they arrive; overlapping tails catch emails split across chunks
+class EmailStream:
+    def __init__(self):
+        self.tail = b""
+        self.email = None
+
+    def feed(self, chunk):
+        data = self.tail + chunk
+        self.email = scan_for_email(data, final=False)
+        self.tail = data[-CHUNK_OVERLAP:]
+        return self.email
+
+    def finish(self):
+        if self.email is None:
+            self.email = scan_for_email(self.tail, final=True)
+        return self.email
+
+
+# ✅ Scan a body that's already in memory (e.g. from the cache) chunk by chunk
+@profiled
+def find_email_in_bytes(body):
+    stream = EmailStream()
+    for start in range(0, len(body), CHUNK_SIZE):
+        if stream.feed(body[start:start + CHUNK_SIZE]):
+            break
+    return stream.finish()
+
+
+# ✅ Download a page and scan it while it streams in
+#    Stops at the first email or after max_bytes. Returns (email, body); body is None unless 200/304.
+@profiled
+def fetch_and_scan(url, cache=None, max_bytes=MAX_BODY_BYTES):
+    entry = cache.lookup(url) if cache else None
+    if entry and entry["fresh"]:
+        body = cache.hit(entry)
+        return find_email_in_bytes(body), body
+
+    headers = dict(HEADERS, **cache.conditional_headers(entry)) if entry else HEADERS
+    for attempt in range(MAX_RETRIES + 1):
+        LIMITER.acquire(url)
+        with METRICS.timed("fetch.headers"):  # DNS + connect + TLS + time to first byte
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+        METRICS.count("http_responses", status=response.status_code)
+        if not LIMITER.throttled(url, response.status_code, response.headers) or attempt == MAX_RETRIES:
+            break
+        response.close()
+
+    with response:
+        if entry and response.status_code == 304:
+            body = cache.revalidated(entry)
+            if ARCHIVE:
+                ARCHIVE.put(url, body, "homepage")
+            return find_email_in_bytes(body), body
+        if cache:
+            cache.miss()
         if response.status_code != 200:
-            return None
+            return None, None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        text = soup.get_text()
-        matches = re.findall(EMAIL_REGEX, text)
-        unique_emails = list(set(matches))
+        stream = EmailStream()
+        body = bytearray()
+        with METRICS.timed("fetch.body"):
+            for chunk in response.iter_content(CHUNK_SIZE):
+                chunk = chunk[:max_bytes - len(body)]
+                body += chunk
+                if stream.feed(chunk) or len(body) >= max_bytes:
+                    break
 
-        # Return only first email found for now
-        return unique_emails[0] if unique_emails else None
+    body = bytes(body)
+    METRICS.count("bytes", len(body), kind="homepage")
+    if cache:
+        cache.store(url, response.headers, body)
+    if ARCHIVE:
+        ARCHIVE.put(url, body, "homepage")
+    return stream.finish(), body
+
+
+def extract_emails_from_website(url, cache=None, max_bytes=MAX_BODY_BYTES):
+    try:
+        if not url:
+            return None
+        email, _ = fetch_and_scan(url, cache, max_bytes)
+        return email
 
     except Exception as e:
+        METRICS.count("errors", stage="enrich", type=type(e).__name__)
         print(f"❌ Error fetching {url}: {e}")
         return None
 
-def enrich_data_with_emails(data):
+
+# ✅ Key a company by its Clutch profile (falls back to the website)
+def company_key(company):
+    return company.get("profile_url") or company.get("website")
+
+
+# ✅ Fill in companies finished by a previous run, return the ones still to do
+def apply_checkpoint(data, checkpoint):
+    if checkpoint is None:
+        return data
+    todo = []
     for company in data:
-        website = company.get("website")
-        print(f"🔍 Looking for email in: {website}")
-        email = extract_emails_from_website(website)
+        key = company_key(company)
+        done = checkpoint.get(key) if key else None
+        if done is None:
+            todo.append(company)
+        else:
+            company["email"] = done["email"]
+    if len(todo) < len(data):
+        print(f"⏭️ Skipping {len(data) - len(todo)} companies enriched in a previous run.")
+    return todo
+
+
+# ✅ Group companies by canonical domain so each domain is fetched once per run
+#    Returns (website to fetch, companies sharing its domain) pairs; companies without a website share a None entry.
+def group_by_domain(companies):
+    groups = {}
+    for company in companies:
+        domain = canonical_domain(company.get("website"))
+        if domain not in groups:
+            groups[domain] = (canonical_website(company.get("website")), [])
+        groups[domain][1].append(company)
+
+    with_website = sum(len(members) for domain, (_, members) in groups.items() if domain)
+    domains = sum(1 for domain in groups if domain)
+    if with_website:
+        print(f"🔁 {with_website} websites -> {domains} unique domains ({with_website - domains} fetches saved)")
+    return list(groups.values())
+
+
+# ✅ Fan one domain's result out to every company that points at it
+def record_email(companies, email, checkpoint=None):
+    METRICS.count("sites", outcome="email" if email else "no_email")
+    for company in companies:
         company["email"] = email
+        if checkpoint is not None and company_key(company):
+            checkpoint.record(company_key(company), {"email": email})
+
+
+# ✅ Resolve every group's host up front: unresolvable / unreachable ones are settled as "no email" right away
+#    instead of each waiting for REQUEST_TIMEOUT. Returns the groups still to fetch.
+async def preflight_groups(groups, checkpoint=None):
+    if PREFLIGHT is None:
+        return groups
+    await PREFLIGHT.check([website for website, _ in groups if website])
+    todo = []
+    for website, companies in groups:
+        if dropped_status(website):
+            record_email(companies, None, checkpoint)
+        else:
+            todo.append((website, companies))
+    return todo
+
+
+# ✅ Why the pre-flight dropped a website ("unresolvable", "unreachable"), None if it was fetched
+def dropped_status(website):
+    return PREFLIGHT.dropped(site_host(website)[0]) if PREFLIGHT is not None and website else None
+
+
+# ✅ --check-mx: an email whose domain has no MX (or a null MX) and no address can't be written to
+async def verified_email(email):
+    if email and CHECK_MX and not await PREFLIGHT.mail_domain_ok(email.rsplit("@", 1)[1]):
+        METRICS.count("emails_rejected", reason="no_mx")
+        print(f"📭 Dropping {email}: its domain doesn't receive mail")
+        return None
+    return email
+
+
+def enrich_data_with_emails(data, checkpoint=None, cache=None, max_bytes=MAX_BODY_BYTES):
+    groups = asyncio.run(preflight_groups(group_by_domain(apply_checkpoint(data, checkpoint)), checkpoint))
+    for website, companies in groups:
+        print(f"🔍 Looking for email in: {website}")
+        email = extract_emails_from_website(website, cache, max_bytes)
+        if email and CHECK_MX:
+            email = asyncio.run(verified_email(email))
+        record_email(companies, email, checkpoint)
     return data
 
+
+# ✅ Same as fetch_and_scan, but over a shared aiohttp session
+async def fetch_and_scan_async(session, url, cache=None, max_bytes=MAX_BODY_BYTES):
+    entry = cache.lookup(url) if cache else None
+    if entry and entry["fresh"]:
+        body = cache.hit(entry)
+        return find_email_in_bytes(body), body
+
+    headers = cache.conditional_headers(entry) if entry else None
+    for attempt in range(MAX_RETRIES + 1):
+        await LIMITER.acquire_async(url)
+        with METRICS.timed("fetch.headers"):
+            response = await session.get(url, headers=headers)
+        METRICS.count("http_responses", status=response.status)
+        if not LIMITER.throttled(url, response.status, response.headers) or attempt == MAX_RETRIES:
+            break
+        response.release()
+
+    async with response:
+        if entry and response.status == 304:
+            body = cache.revalidated(entry)
+            if ARCHIVE:
+                await asyncio.to_thread(ARCHIVE.put, url, body, "homepage")
+            return find_email_in_bytes(body), body
+        if cache:
+            cache.miss()
+        if response.status != 200:
+            return None, None
+
+        stream = EmailStream()
+        body = bytearray()
+        with METRICS.timed("fetch.body"):
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                chunk = chunk[:max_bytes - len(body)]
+                body += chunk
+                if stream.feed(chunk) or len(body) >= max_bytes:
+                    break
+
+    body = bytes(body)
+    METRICS.count("bytes", len(body), kind="homepage")
+    if cache:
+        cache.store(url, response.headers, body)
+    if ARCHIVE:
+        await asyncio.to_thread(ARCHIVE.put, url, body, "homepage")
+    return stream.finish(), body
+
+
+# ✅ Same as extract_emails_from_website, but over a shared aiohttp session
+async def extract_emails_from_website_async(session, url, cache=None, max_bytes=MAX_BODY_BYTES):
+    try:
+        if not url:
+            return None
+        email, _ = await fetch_and_scan_async(session, url, cache, max_bytes)
+        return email
+
+    except Exception as e:
+        METRICS.count("errors", stage="enrich", type=type(e).__name__)
+        print(f"❌ Error fetching {url}: {e!r}")
+        return None
+
+
+# ✅ Same-host links worth visiting next: contact/about-like pages first, then the rest
+def discover_links(body, base_url):
+    domain = canonical_domain(base_url)
+    hinted, other = [], []
+    for match in HREF_BYTES_REGEX.finditer(body):
+        href = html.unescape(match.group(1).decode("utf-8", errors="ignore")).strip()
+        if not href or href.startswith(("mailto:", "tel:", "javascript:")):
+            continue
+        url = urljoin(base_url, href)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or canonical_domain(url) != domain:
+            continue
+        if parts.path.lower().endswith(SKIPPED_LINK_SUFFIXES):
+            continue
+        (hinted if any(hint in parts.path.lower() for hint in CONTACT_HINTS) else other).append(url)
+    return hinted, other
+
+
+# ✅ Crawl one domain for an email: the listed page, the root, /contact, /about, then discovered links
+#    Fetches up to `parallel` pages at once and stops at the first email, the page budget or the time budget.
+async def crawl_site_for_email(session, website, cache=None, max_bytes=MAX_BODY_BYTES,
+                               page_budget=CRAWL_PAGE_BUDGET, time_budget=CRAWL_TIME_BUDGET, parallel=CRAWL_PARALLEL):
+    if not website:
+        return None
+    parts = urlsplit(website)
+    root = f"{parts.scheme}://{parts.netloc}"
+    frontier = [website, root + "/"] + [root + path for path in CONTACT_PATHS]
+    seen = set()
+    fetched = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + time_budget
+
+    async def fetch(url):
+        try:
+            return url, await fetch_and_scan_async(session, url, cache, max_bytes)
+        except Exception as e:
+            METRICS.count("errors", stage="enrich", type=type(e).__name__)
+            print(f"❌ Error fetching {url}: {e!r}")
+            return url, (None, None)
+
+    pending = set()
+    try:
+        while True:
+            while frontier and fetched < page_budget and len(pending) < parallel:
+                url = frontier.pop(0)
+                key = normalize_url(url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                fetched += 1
+                pending.add(asyncio.ensure_future(fetch(url)))
+
+            remaining = deadline - loop.time()
+            if not pending or remaining <= 0:
+                return None
+
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, (email, body) = task.result()
+                if email:
+                    return email
+                if body:
+                    hinted, other = discover_links(body, url)
+                    frontier = hinted + frontier + other
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# ✅ aiohttp trace hooks: DNS resolution and connection setup (TCP + TLS) timed separately from the request
+def connection_timings():
+    trace = aiohttp.TraceConfig()
+
+    async def started(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    def finished(name):
+        async def hook(session, ctx, params):
+            METRICS.observe(name, time.perf_counter() - ctx.started)
+        return hook
+
+    async def dns_cache_hit(session, ctx, params):
+        METRICS.count("dns_cache_hits")
+
+    trace.on_dns_resolvehost_start.append(started)
+    trace.on_dns_resolvehost_end.append(finished("fetch.dns"))
+    trace.on_connection_create_start.append(started)
+    trace.on_connection_create_end.append(finished("fetch.connect"))
+    trace.on_dns_cache_hit.append(dns_cache_hit)
+    return trace
+
+
+# ✅ Enrich all companies concurrently with pooled keep-alive connections
+async def enrich_data_with_emails_async(data, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT,
+                                        checkpoint=None, cache=None, max_bytes=MAX_BODY_BYTES, crawl=False):
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=per_host,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        resolver=PREFLIGHT.aiohttp_resolver() if PREFLIGHT is not None else None,  # reuse the pre-flight's answers
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    # trust_env: honour HTTP(S)_PROXY like requests does
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout, trust_env=True,
+                                     trace_configs=[connection_timings()]) as session:
+        async def enrich(website, companies):
+            async with semaphore:
+                print(f"🔍 Looking for email in: {website}")
+                if crawl:
+                    email = await crawl_site_for_email(session, website, cache, max_bytes)
+                else:
+                    email = await extract_emails_from_website_async(session, website, cache, max_bytes)
+                record_email(companies, await verified_email(email), checkpoint)
+
+        groups = await preflight_groups(group_by_domain(apply_checkpoint(data, checkpoint)), checkpoint)
+        await asyncio.gather(*(enrich(website, companies) for website, companies in groups))
+    return data
+
+
+# ✅ Enrich from the lead store: one website per pending domain, a batch at a time
+#    Only new companies, companies that moved domain and results older than ttl_days are fetched.
+#    Results go straight back to the store, so an interrupted run simply picks up the domains still pending.
+#    Domains dropped by the DNS pre-flight are stored as "unresolvable" / "unreachable" (retried after ttl_days).
+def enrich_store(store, enrich_batch, run_id=None, ttl_days=EMAIL_TTL_DAYS):
+    done = 0
+    for batch in store.pending_domains(run_id, ttl_days=ttl_days):
+        sites = [{"website": website, "domain": domain} for domain, website in batch]
+        enrich_batch(sites)
+        store.update_domain_emails([(site["domain"], site.get("email"), dropped_status(site["website"]))
+                                    for site in sites])
+        done += len(sites)
+    return done
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enrich scraped Clutch leads with emails from company websites.")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--engine", choices=["async", "sync"], default="async",
+                        help="async: concurrent pooled fetches, sync: one website after another")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT)
+    parser.add_argument("--rate", type=float, default=ENRICH_RATE,
+                        help="Requests per second across all websites (default: no limit besides --concurrency)")
+    parser.add_argument("--host-rate", type=float, default=ENRICH_HOST_RATE, help="Requests per second to one website")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Skip companies already recorded in {PROGRESS_FILE} by an interrupted run")
+    parser.add_argument("--no-cache", action="store_true", help="Always download websites, bypassing the response cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL / 3600,
+                        help="Hours a cached page is reused without revalidation")
+    parser.add_argument("--max-kb", type=int, default=MAX_BODY_BYTES // 1024,
+                        help="Stop downloading a page after this many KB")
+    parser.add_argument("--crawl", action="store_true",
+                        help=f"Also try the root, /contact, /about and same-host links "
+                             f"(up to {CRAWL_PAGE_BUDGET} pages / {CRAWL_TIME_BUDGET}s per domain, async engine only)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help=f"Don't keep downloaded pages in {ARCHIVE_DIR}/ (rescanned by html_archive.py reparse)")
+    parser.add_argument("--store", help="Enrich the pending leads of a SQLite lead store (lead_store.py) "
+                                        "instead of --input; --output is exported from the store")
+    parser.add_argument("--run", help="Lead store run to enrich and export (default: the latest scrape)")
+    parser.add_argument("--email-ttl", type=float, default=EMAIL_TTL_DAYS,
+                        help="Days before a stored email result is looked up again (--store only)")
+    add_dns_arguments(parser)
+    add_parquet_arguments(parser)
+    add_metrics_arguments(parser, METRICS_FILE)
+    args = parser.parse_args()
+    if args.crawl and args.engine != "async":
+        parser.error("--crawl needs the async engine")
+    if args.check_mx and args.no_preflight:
+        parser.error("--check-mx needs the DNS pre-flight")
+    check_dns_arguments(parser, args)
+    check_parquet_arguments(parser, args)
+    return args
+
+
+def main_store(args):
+    store = LeadStore(args.store)
+    run_id = args.run or store.latest_run()
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, ttl=args.cache_ttl * 3600)
+    max_bytes = args.max_kb * 1024
+
+    def enrich_batch(sites):
+        if args.engine == "async":
+            asyncio.run(enrich_data_with_emails_async(sites, args.concurrency, args.per_host, None, cache, max_bytes,
+                                                      args.crawl))
+        else:
+            enrich_data_with_emails(sites, None, cache, max_bytes)
+
+    started = time.perf_counter()
+    try:
+        done = enrich_store(store, enrich_batch, run_id, args.email_ttl)
+    finally:
+        if cache:
+            print(cache.report())
+            cache.close()
+    elapsed = time.perf_counter() - started
+
+    try:
+        count = store.export_json(args.output, ENRICHED_FIELDS, run_id)
+        write_normalized(store.iter_leads(ENRICHED_FIELDS, run_id), normalized_path(args.output))
+        if args.parquet:
+            export_store_run(store, run_id, args.parquet)  # replaces the scrape's file of this run, now with emails
+    finally:
+        store.close()
+
+    rate = done / elapsed if elapsed else 0.0
+    print(f"⚡ {args.engine} engine: {done} domains in {elapsed:.1f}s ({rate:.2f} sites/sec)")
+    print(f"✅ Email enrichment complete: {count} leads of run {run_id}. Output: {args.output}")
+
+
 def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+    global ARCHIVE, LIMITER, PREFLIGHT, CHECK_MX
+    args = parse_args()
+    LIMITER = RateLimiter(args.rate, args.host_rate, burst=args.per_host)
+    if not args.no_archive:
+        ARCHIVE = HtmlArchive()
+    if not args.no_preflight:
+        PREFLIGHT = DnsPreflight(DnsCache(args.dns_cache), args.nameserver, log_path=DNS_LOG_FILE)
+        CHECK_MX = args.check_mx
+    with run_report(args, "enricher"):
+        try:
+            if args.store:
+                main_store(args)
+            else:
+                main_file(args)
+        finally:
+            if PREFLIGHT is not None:
+                print(PREFLIGHT.cache.report())
+                PREFLIGHT.cache.close()
+
+
+def main_file(args):
+    with open(args.input, "r", encoding="utf-8") as f:
         companies = json.load(f)
 
-    enriched_data = enrich_data_with_emails(companies)
+    # Manifest every 25 companies: the JSONL itself is flushed after each one
+    checkpoint = Checkpoint(PROGRESS_FILE, CHECKPOINT_FILE, resume=args.resume, manifest_every=25)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, ttl=args.cache_ttl * 3600)
+    started = time.perf_counter()
+    try:
+        if args.engine == "async":
+            enriched_data = asyncio.run(
+                enrich_data_with_emails_async(companies, args.concurrency, args.per_host, checkpoint, cache,
+                                              args.max_kb * 1024, args.crawl)
+            )
+        else:
+            enriched_data = enrich_data_with_emails(companies, checkpoint, cache, args.max_kb * 1024)
+    finally:
+        checkpoint.close()
+        if cache:
+            print(cache.report())
+            cache.close()
+    elapsed = time.perf_counter() - started
 
-    os.makedirs("output", exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with METRICS.timed("export.json"), open(args.output, "w", encoding="utf-8") as f:
         json.dump(enriched_data, f, indent=2, ensure_ascii=False)
+    write_normalized(enriched_data, normalized_path(args.output))
+    if args.parquet:
+        write_parquet_leads(enriched_data, checkpoint.run_id, args.parquet)
 
-    print(f"✅ Email enrichment complete. Output: {OUTPUT_FILE}")
+    rate = len(enriched_data) / elapsed if elapsed else 0.0
+    print(f"⚡ {args.engine} engine: {len(enriched_data)} sites in {elapsed:.1f}s ({rate:.2f} sites/sec)")
+    print(f"✅ Email enrichment complete. Output: {args.output}")
 
 if __name__ == "__main__":
     main()
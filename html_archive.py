@@ -0,0 +1,271 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from card_parsers import DEFAULT_ENGINE, PARSER_ENGINES, parse_listing
+from metrics import METRICS
+from url_utils import canonical_domain
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, gzip is always available
+    zstandard = None
+
+ARCHIVE_DIR = "archive"
+CODEC = "zst" if zstandard else "gz"
+ZSTD_LEVEL = 10  # Listing pages are very repetitive: a higher level pays off and decompression stays fast
+GZIP_LEVEL = 6
+REPARSED_FILE = "output/clutch_leads_reparsed.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    run_id TEXT,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS fetches_url ON fetches (url, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_kind ON fetches (kind, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_run ON fetches (run_id, page);
+"""
+
+
+def compress(data, codec=CODEC):
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(data, codec):
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("This archive entry is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+# ✅ Read one archived object straight from disk (used by reparse workers, which don't share the index)
+def read_object(path):
+    codec = path.rsplit(".", 1)[-1]
+    with open(path, "rb") as f:
+        return decompress(f.read(), codec)
+
+
+# ✅ Raw HTML archive: objects stored once per content hash, plus an index of every fetch by URL and time
+#    archive/objects/ab/abcdef….html.zst (or .gz)  +  archive/index.sqlite3
+class HtmlArchive:
+    def __init__(self, root=ARCHIVE_DIR, codec=CODEC):
+        self.root = root
+        self.codec = codec
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def object_path(self, digest, codec):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.{codec}")
+
+    # ✅ Archive one fetched page; identical content is written once however often it is fetched
+    def put(self, url, body, kind, run_id=None, page=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest, self.codec)
+        if not os.path.exists(path):
+            with METRICS.timed("archive.compress"):
+                stored = compress(body, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(stored)
+            os.replace(tmp_path, path)
+        stored_size = os.path.getsize(path)
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO fetches (url, kind, fetched_at, digest, codec, size, stored_size, run_id, page) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, kind, time.strftime("%Y-%m-%dT%H:%M:%S"), digest, self.codec, len(body), stored_size,
+                 run_id, page),
+            )
+        return digest
+
+    def get(self, digest, codec):
+        return read_object(self.object_path(digest, codec))
+
+    # ✅ Most recent fetch of a URL at or before `at` (ISO time), as (fetched_at, body)
+    def latest(self, url, at=None):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT fetched_at, digest, codec FROM fetches WHERE url = ? AND fetched_at <= ? "
+                "ORDER BY fetched_at DESC, id DESC LIMIT 1",
+                (url, at or "9999"),
+            ).fetchone()
+        return (row[0], self.get(row[1], row[2])) if row else None
+
+    def latest_run(self):
+        with self.lock:
+            return self.db.execute("SELECT MAX(run_id) FROM fetches WHERE kind = 'listing'").fetchone()[0]
+
+    # ✅ Object paths of a run's listing pages, last fetch of each page URL, in page order
+    def listing_objects(self, run_id):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT page, digest, codec FROM fetches WHERE id IN "
+                "(SELECT MAX(id) FROM fetches WHERE kind = 'listing' AND run_id = ? GROUP BY url) "
+                "ORDER BY page, url",
+                (run_id,),
+            ).fetchall()
+        return [(page, self.object_path(digest, codec)) for page, digest, codec in rows]
+
+    # ✅ Object paths of the archived pages of each canonical domain (last fetch of each URL), newest first
+    #    With --crawl a domain has several pages (root, /contact, /about…) and the email may be on any one of them
+    def homepage_objects(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT url, digest, codec FROM fetches WHERE id IN "
+                "(SELECT MAX(id) FROM fetches WHERE kind = 'homepage' GROUP BY url) ORDER BY id DESC"
+            ).fetchall()
+        objects = {}
+        for url, digest, codec in rows:
+            paths = objects.setdefault(canonical_domain(url), [])
+            path = self.object_path(digest, codec)
+            if path not in paths:
+                paths.append(path)
+        return objects
+
+    def report(self):
+        with self.lock:
+            lines = ["📦 HTML archive:"]
+            for kind, fetches, objects, size, stored in self.db.execute(
+                "SELECT kind, COUNT(*), COUNT(DISTINCT digest), SUM(size), "
+                "(SELECT SUM(s) FROM (SELECT MAX(stored_size) AS s FROM fetches f2 WHERE f2.kind = f.kind "
+                "GROUP BY digest)) FROM fetches f GROUP BY kind"
+            ):
+                ratio = size / stored if stored else 0.0
+                lines.append(f"   {kind:<9} {fetches} fetches, {objects} objects, "
+                             f"{size / 1e6:.1f} MB raw -> {stored / 1e6:.1f} MB on disk ({ratio:.1f}x)")
+        return "\n".join(lines)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+# Reparse workers: top-level so they can be sent to other processes
+def reparse_listing_object(path, engine=DEFAULT_ENGINE):
+    return parse_listing(read_object(path).decode("utf-8", errors="replace"), engine)
+
+
+# First email found on a domain's archived pages, newest page first
+def rescan_homepage_objects(paths):
+    from email_extractor import find_email_in_bytes
+    for path in paths:
+        email = find_email_in_bytes(read_object(path))
+        if email:
+            return email
+    return None
+
+
+# ✅ One lead per profile_url, like LeadStore.upsert_leads: the first slot on a page (sponsored cards repeat), the
+#    last page a company was seen on, in (page, position) order. Cards without a profile_url are dropped.
+def unique_leads(pages):
+    unique = {}
+    skipped = 0
+    for rank, (page, cards) in enumerate(pages):
+        seen = set()
+        for position, card in enumerate(cards):
+            url = card.get("profile_url")
+            if not url:
+                skipped += 1
+            elif url not in seen:
+                seen.add(url)
+                unique[url] = ((page, rank, position), card)
+    if skipped:
+        print(f"⚠️ {skipped} leads without profile_url were dropped")
+    return [card for _, card in sorted(unique.values(), key=lambda item: item[0])]
+
+
+# ✅ Rebuild the dataset of a run from archived listing pages (and optionally archived homepages), on all cores
+def reparse(archive, run_id, engine=DEFAULT_ENGINE, workers=None, with_emails=False):
+    objects = archive.listing_objects(run_id)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(objects) // (4 * (workers or os.cpu_count() or 1)))
+        paths = [path for _, path in objects]
+        parsed = pool.map(partial(reparse_listing_object, engine=engine), paths, chunksize=chunksize)
+        leads = unique_leads(zip((page for page, _ in objects), parsed))
+
+        if with_emails:
+            homepages = archive.homepage_objects()
+            domains = sorted({canonical_domain(lead.get("website")) for lead in leads} & homepages.keys())
+            emails = dict(zip(domains, pool.map(rescan_homepage_objects, [homepages[d] for d in domains],
+                                                 chunksize=max(1, len(domains) // 64))))
+            for lead in leads:
+                lead["email"] = emails.get(canonical_domain(lead.get("website")))
+    return len(objects), leads
+
+
+def save_leads(leads, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(leads, f, indent=2, ensure_ascii=False)
+    if leads:
+        with open(os.path.splitext(path)[0] + ".csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=leads[0].keys())
+            writer.writeheader()
+            writer.writerows(leads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archived raw HTML: rebuild the dataset without crawling again.")
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("reparse", help="Parse a run's archived listing pages again (all cores)")
+    run.add_argument("--run", help="Scrape run to rebuild (default: the latest archived run)")
+    run.add_argument("--engine", choices=sorted(PARSER_ENGINES), default=DEFAULT_ENGINE)
+    run.add_argument("--workers", type=int, help="Parser processes (default: one per core)")
+    run.add_argument("--with-emails", action="store_true",
+                     help="Also rescan archived company homepages and add an email column")
+    run.add_argument("--output", default=REPARSED_FILE, help="JSON output; a CSV is written next to it")
+
+    sub.add_parser("stats", help="Fetch counts and compression ratio per kind of page")
+    args = parser.parse_args()
+
+    archive = HtmlArchive(args.archive)
+    try:
+        if args.command == "stats":
+            print(archive.report())
+            return
+
+        run_id = args.run or archive.latest_run()
+        if not run_id:
+            print(f"❌ No archived listing pages in {args.archive}/")
+            return
+        started = time.perf_counter()
+        pages, leads = reparse(archive, run_id, args.engine, args.workers, args.with_emails)
+        elapsed = time.perf_counter() - started
+    finally:
+        archive.close()
+
+    save_leads(leads, args.output)
+    print(f"♻️ Reparsed run {run_id}: {pages} pages, {len(leads)} companies in {elapsed:.2f}s "
+          f"({args.workers or os.cpu_count()} processes, {args.engine}). Output: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
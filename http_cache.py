@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from email.utils import formatdate
+
+from url_utils import normalize_url
+
+CACHE_DIR = "cache/http"
+CACHE_TTL = 24 * 3600                # Seconds a stored page is served without asking the site
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # Compressed bodies kept on disk before LRU eviction kicks in
+
+
+# ✅ Persistent response cache: gzip bodies on disk, index in SQLite
+#    Fresh entries (younger than ttl) are served without any request. Stale entries are revalidated
+#    with If-None-Match / If-Modified-Since, so an unchanged site answers 304 and sends no body.
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite3"))
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                stored_at REAL,
+                last_access REAL,
+                size INTEGER
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, "bodies", hashlib.sha1(key.encode("utf-8")).hexdigest() + ".gz")
+
+    # ✅ Cached entry for a URL (None if unknown), with a "fresh" flag
+    def lookup(self, url):
+        key = normalize_url(url)
+        if key is None:
+            return None
+        row = self.db.execute(
+            "SELECT key, etag, last_modified, content_type, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or not os.path.exists(self._body_path(key)):
+            return None
+        entry = dict(zip(("key", "etag", "last_modified", "content_type", "stored_at"), row))
+        entry["fresh"] = time.time() - entry["stored_at"] < self.ttl
+        return entry
+
+    # ✅ Headers that turn the next request into a conditional one
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        elif not entry.get("etag"):
+            headers["If-Modified-Since"] = formatdate(entry["stored_at"], usegmt=True)
+        return headers
+
+    def read_body(self, entry):
+        with gzip.open(self._body_path(entry["key"]), "rb") as f:
+            body = f.read()
+        self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry["key"]))
+        return body
+
+    # ✅ Served straight from disk
+    def hit(self, entry):
+        self.stats["fresh_hits"] += 1
+        return self.read_body(entry)
+
+    # ✅ Site answered 304: keep the body, restart its TTL
+    def revalidated(self, entry):
+        self.stats["revalidated"] += 1
+        self.db.execute("UPDATE entries SET stored_at = ? WHERE key = ?", (time.time(), entry["key"]))
+        return self.read_body(entry)
+
+    def miss(self):
+        self.stats["misses"] += 1
+
+    # ✅ Store a 200 response body with its validators
+    def store(self, url, headers, body):
+        key = normalize_url(url)
+        if key is None:
+            return
+        path = self._body_path(key)
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(body)
+        size = os.path.getsize(path)
+
+        old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Type"), now, now, size),
+        )
+        self.total_bytes += size - (old[0] if old else 0)
+        self.stats["stored"] += 1
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        self.db.commit()
+
+    # ✅ Drop least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        target = self.max_bytes * 0.9  # Free a little extra so we don't evict on every store
+        rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= size
+            self.stats["evicted"] += 1
+
+    # ✅ One-line hit/miss summary
+    def report(self):
+        stats = self.stats
+        lookups = stats["fresh_hits"] + stats["revalidated"] + stats["misses"]
+        if not lookups:
+            return "🗄️ Cache: no lookups"
+        saved = stats["fresh_hits"] + stats["revalidated"]
+        return (
+            f"🗄️ Cache: {lookups} lookups | fresh hits {stats['fresh_hits'] / lookups:.0%}, "
+            f"revalidated (304) {stats['revalidated'] / lookups:.0%}, misses {stats['misses'] / lookups:.0%} | "
+            f"{saved / lookups:.0%} served without a body download | {self.total_bytes / 1024 / 1024:.1f} MB on disk"
+            + (f", {stats['evicted']} evicted" if stats["evicted"] else "")
+        )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+from pacing import is_challenge_page
+
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:  # curl_cffi is optional: it makes the TLS handshake look like Chrome's, requests is the fallback
+    curl_requests = None
+
+FAST_PATH_TIMEOUT = 20   # Seconds per listing page over plain HTTP
+POOL_SIZE = 8            # Keep-alive connections per fast-path client
+MAX_MISSES = 3           # Fast-path misses in a row before a worker stops trying it (every miss costs a request)
+CARD_MARKER = "provider-row"  # Present in the HTML of any listing page with company cards (see CARD_SELECTOR)
+
+# What Chrome sends for a top-level navigation; the user-agent and cookies come from the browser session
+NAVIGATION_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+# ✅ Cookies + user-agent of a browser session that got past Cloudflare
+def selenium_session(driver):
+    return {
+        "user_agent": driver.execute_script("return navigator.userAgent"),
+        "cookies": [
+            {"name": c["name"], "value": c["value"], "domain": c.get("domain", ""), "path": c.get("path", "/")}
+            for c in driver.get_cookies()
+        ],
+    }
+
+
+# ✅ Listing pages over pooled plain HTTP, reusing a cleared browser session
+#    fetch() returns (html, outcome); html is None whenever the browser should take over: a challenge, a throttle
+#    signal (the limiter backs the host off), another status, or a page without cards.
+class FastPath:
+    def __init__(self, limiter=None, pool_size=POOL_SIZE):
+        self.limiter = limiter
+        self.misses = 0
+        self.disabled = False
+        self.referer = None
+        self.lock = threading.Lock()
+        if curl_requests is not None:
+            self.session = curl_requests.Session(impersonate="chrome")
+        else:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self.session.headers.update(NAVIGATION_HEADERS)
+        self.has_session = False
+
+    def ready(self):
+        return self.has_session and not self.disabled
+
+    # ✅ Take over the browser's cookies and user-agent (again after every browser load: clearance cookies rotate)
+    def update(self, state):
+        with self.lock:
+            self.session.headers["User-Agent"] = state["user_agent"]
+            for cookie in state["cookies"]:
+                self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"],
+                                         path=cookie["path"])
+            self.has_session = True
+
+    def fetch(self, url):
+        if self.limiter:
+            self.limiter.acquire(url)
+        headers = {"Referer": self.referer} if self.referer else None
+        try:
+            response = self.session.get(url, headers=headers, timeout=FAST_PATH_TIMEOUT)
+        except Exception as e:
+            return self.miss(f"error:{type(e).__name__}")
+
+        if self.limiter and self.limiter.throttled(url, response.status_code, response.headers):
+            return self.miss("throttled")
+        html = response.text
+        if is_challenge_page(html):
+            return self.miss("challenge")
+        if response.status_code != 200:
+            return self.miss(f"status:{response.status_code}")
+        if CARD_MARKER not in html:
+            return self.miss("no_cards")
+
+        self.misses = 0
+        self.referer = url
+        return html, "ok"
+
+    def miss(self, outcome):
+        self.misses += 1
+        METRICS.count("fast_path_misses", reason=outcome)
+        if self.misses >= MAX_MISSES and not self.disabled:
+            self.disabled = True
+            print(f"⚠️ Fast path missed {self.misses} pages in a row ({outcome}), this worker stays on the browser.")
+        return None, outcome
+
+    def close(self):
+        self.session.close()
+
+
+# ✅ Share of listing pages that took the fast path, and the average time per page on each path
+def fast_path_report():
+    timers = METRICS.snapshot()["timers"]
+    http = timers.get("listing.http", {"count": 0, "avg_s": 0.0})
+    browser = timers.get("listing.browser", {"count": 0, "avg_s": 0.0})
+    pages = http["count"] + browser["count"]
+    if not pages:
+        return "⚡ Fast path: no listing pages fetched"
+    return (f"⚡ Fast path: {http['count']}/{pages} pages ({http['count'] / pages:.0%}) over plain HTTP, "
+            f"{http['avg_s'] * 1000:.0f} ms/page vs {browser['avg_s'] * 1000:.0f} ms/page in the browser")
+
+
+def page_traffic(page_number, html, seconds):
+    return {"bytes": len(html.encode("utf-8")), "requests": 1, "blocked": 0, "load_ms": round(seconds * 1000, 1),
+            "page": page_number, "policy": "http", "challenge": False, "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
@@ -0,0 +1,378 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import METRICS
+from normalize import US_COUNTRY, US_STATE_PATTERN
+from url_utils import canonical_domain, canonical_website
+
+LEAD_DB = "output/leads.sqlite3"
+BATCH_SIZE = 500
+EMAIL_TTL_DAYS = 30  # Email results older than this are fetched again
+
+SCRAPED_FIELDS = ["name", "profile_url", "website", "location", "hourly_rate", "employee_range",
+                  "min_project_size", "review_count", "rating", "description"]
+ENRICHED_FIELDS = SCRAPED_FIELDS + ["email"]
+
+# Raw scraped strings are kept as-is (exports reproduce the scraper's output exactly);
+# typed copies next to them are what the indexes are built on.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    profile_url TEXT PRIMARY KEY,
+    name TEXT,
+    website TEXT,
+    location TEXT,
+    hourly_rate TEXT,
+    employee_range TEXT,
+    min_project_size TEXT,
+    review_count TEXT,
+    rating TEXT,
+    description TEXT,
+    canonical_domain TEXT,
+    country TEXT,
+    rating_value REAL,
+    hourly_rate_min INTEGER,
+    hourly_rate_max INTEGER,
+    email TEXT,
+    email_status TEXT NOT NULL DEFAULT 'pending',
+    email_checked_at TEXT,
+    first_seen_at TEXT,
+    last_seen_at TEXT,
+    last_run TEXT,
+    list_page INTEGER,
+    list_position INTEGER,
+    fingerprint TEXT,
+    first_run TEXT,
+    directory TEXT
+);
+CREATE TABLE IF NOT EXISTS lead_directories (
+    run_id TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    profile_url TEXT NOT NULL,
+    PRIMARY KEY (run_id, directory, profile_url)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS lead_changes (
+    run_id TEXT NOT NULL,
+    profile_url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fields TEXT,
+    PRIMARY KEY (run_id, profile_url)
+);
+CREATE INDEX IF NOT EXISTS leads_domain ON leads (canonical_domain);
+CREATE INDEX IF NOT EXISTS leads_country ON leads (country);
+CREATE INDEX IF NOT EXISTS leads_rating ON leads (rating_value);
+CREATE INDEX IF NOT EXISTS leads_hourly_rate ON leads (hourly_rate_min, hourly_rate_max);
+CREATE INDEX IF NOT EXISTS leads_email_status ON leads (email_status);
+CREATE INDEX IF NOT EXISTS leads_run ON leads (last_run, list_page, list_position);
+"""
+
+# Columns added after the first release of the store: created on older databases when opened
+ADDED_COLUMNS = {"fingerprint": "TEXT", "first_run": "TEXT", "directory": "TEXT"}
+
+UPSERT = f"""
+INSERT INTO leads ({", ".join(SCRAPED_FIELDS)}, canonical_domain, country, rating_value, hourly_rate_min,
+                   hourly_rate_max, email_status, first_seen_at, last_seen_at, last_run, list_page, list_position,
+                   fingerprint, first_run, directory)
+VALUES ({", ".join("?" * (len(SCRAPED_FIELDS) + 14))})
+ON CONFLICT (profile_url) DO UPDATE SET
+    {", ".join(f"{field} = excluded.{field}" for field in SCRAPED_FIELDS if field != "profile_url")},
+    canonical_domain = excluded.canonical_domain,
+    country = excluded.country,
+    rating_value = excluded.rating_value,
+    hourly_rate_min = excluded.hourly_rate_min,
+    hourly_rate_max = excluded.hourly_rate_max,
+    last_seen_at = excluded.last_seen_at,
+    last_run = excluded.last_run,
+    list_page = excluded.list_page,
+    list_position = excluded.list_position,
+    fingerprint = excluded.fingerprint,
+    directory = excluded.directory,
+    -- a company that moved to another domain needs a new email; anything else keeps its result
+    email = CASE WHEN leads.canonical_domain IS excluded.canonical_domain THEN leads.email END,
+    email_checked_at = CASE WHEN leads.canonical_domain IS excluded.canonical_domain THEN leads.email_checked_at END,
+    email_status = CASE WHEN leads.canonical_domain IS excluded.canonical_domain
+                        THEN leads.email_status ELSE excluded.email_status END
+"""
+
+NUMBER_REGEX = re.compile(r"\d[\d,]*")
+
+
+# ✅ "London, England" -> "England", "Miami, FL" -> "United States" (same rule as normalize.parse_location)
+def parse_country(location):
+    match = re.search(r",\s*(.+)$", location or "")
+    if not match:
+        return None
+    region = match.group(1).strip()
+    return US_COUNTRY if re.fullmatch(US_STATE_PATTERN, region) else region
+
+
+# ✅ "$25 - $49 / hr" -> (25, 49), "< $25 / hr" -> (None, 25), "Undisclosed" -> (None, None)
+def parse_rate_range(rate):
+    numbers = [int(n.replace(",", "")) for n in NUMBER_REGEX.findall(rate or "")]
+    if not numbers:
+        return None, None
+    if "<" in rate:
+        return None, numbers[0]
+    return numbers[0], numbers[-1]
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ✅ Card as compared between runs: whitespace collapsed, website canonicalized (utm_* churn is not a change)
+def normalize_card(card):
+    normalized = {}
+    for field in SCRAPED_FIELDS:
+        value = card.get(field)
+        if isinstance(value, str):
+            value = " ".join(value.split())
+        normalized[field] = canonical_website(value) if field == "website" and value else value
+    return normalized
+
+
+def card_fingerprint(card):
+    payload = json.dumps(normalize_card(card), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# ✅ Persistent lead store keyed by profile_url; batched upserts in transactions, streaming reads
+class LeadStore:
+    def __init__(self, path=LEAD_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # Shared by the scraper's worker threads, serialised by self.lock
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(leads)")}
+        for column, kind in ADDED_COLUMNS.items():
+            if column not in existing:
+                self.db.execute(f"ALTER TABLE leads ADD COLUMN {column} {kind}")
+        self.lock = threading.Lock()
+
+    def lead_row(self, lead, now, run_id, page, position, directory=None):
+        low, high = parse_rate_range(lead.get("hourly_rate"))
+        domain = canonical_domain(lead.get("website"))
+        return [lead.get(field) for field in SCRAPED_FIELDS] + [
+            domain,
+            parse_country(lead.get("location")),
+            parse_float(lead.get("rating")),
+            low,
+            high,
+            "pending" if domain else "no_website",
+            now,
+            now,
+            run_id,
+            page,
+            position,
+            card_fingerprint(lead),
+            run_id,
+            directory,
+        ]
+
+    # ✅ Insert or update scraped leads (email results are kept unless the domain changed)
+    #    A company listed in several directories stays one row; lead_directories records where it was seen.
+    def upsert_leads(self, leads, run_id=None, page=None, batch_size=BATCH_SIZE, directory=None):
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        unique = {}
+        for position, lead in enumerate(leads):
+            url = lead.get("profile_url")
+            if url and url not in unique:  # sponsored cards repeat on a page: keep the first slot
+                unique[url] = (lead, self.lead_row(lead, now, run_id, page, position, directory))
+        skipped = sum(1 for lead in leads if not lead.get("profile_url"))
+        if skipped:
+            print(f"⚠️ {skipped} leads without profile_url were not stored")
+
+        items = list(unique.values())
+        with self.lock, METRICS.timed("store.upsert"):
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                with self.db:
+                    if run_id:
+                        self.record_changes([lead for lead, _ in batch], run_id)
+                    self.db.executemany(UPSERT, [row for _, row in batch])
+                    if run_id and directory:
+                        self.db.executemany("INSERT OR IGNORE INTO lead_directories VALUES (?, ?, ?)",
+                                            [(run_id, directory, lead["profile_url"]) for lead, _ in batch])
+        return len(items)
+
+    # ✅ Log added / changed leads of a run against what the store held before (caller holds the lock)
+    def record_changes(self, leads, run_id):
+        urls = [lead["profile_url"] for lead in leads]
+        previous = {
+            row[0]: row for row in self.db.execute(
+                f"SELECT profile_url, fingerprint, {', '.join(SCRAPED_FIELDS)} FROM leads "
+                f"WHERE profile_url IN ({', '.join('?' * len(urls))})", urls)
+        }
+        changes = []
+        for lead in leads:
+            row = previous.get(lead["profile_url"])
+            if row is None:
+                changes.append((run_id, lead["profile_url"], "added", None))
+            elif row[1] and row[1] != card_fingerprint(lead):
+                old, new = normalize_card(dict(zip(SCRAPED_FIELDS, row[2:]))), normalize_card(lead)
+                fields = [field for field in SCRAPED_FIELDS if old[field] != new[field]]
+                changes.append((run_id, lead["profile_url"], "changed", json.dumps(fields)))
+        # A resumed run upserts some pages twice: the first change recorded for a lead wins
+        self.db.executemany("INSERT OR IGNORE INTO lead_changes VALUES (?, ?, ?, ?)", changes)
+
+    def begin_run(self, run_id):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                            (run_id, time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    def previous_run(self, run_id):
+        with self.lock:
+            return self.db.execute("SELECT MAX(run_id) FROM runs WHERE run_id < ?", (run_id,)).fetchone()[0]
+
+    # ✅ Close a run: leads the previous run saw on the pages scraped now, but this run did not, are removed
+    #    With several directories per run, call it once per directory.
+    def finish_run(self, run_id, pages, directory=None):
+        previous = self.previous_run(run_id)
+        pages = set(pages)
+        with self.lock, self.db:
+            if previous:
+                query = "SELECT profile_url, list_page FROM leads WHERE last_run = ?"
+                params = [previous]
+                if directory:
+                    query += " AND directory = ?"
+                    params.append(directory)
+                rows = self.db.execute(query, params)
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO lead_changes VALUES (?, ?, 'removed', NULL)",
+                    [(run_id, url) for url, page in rows.fetchall() if page in pages],
+                )
+            self.db.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?",
+                            (time.strftime("%Y-%m-%dT%H:%M:%S"), run_id))
+
+    def directory_members(self, run_id, directory):
+        with self.lock:
+            rows = self.db.execute("SELECT profile_url FROM lead_directories WHERE run_id = ? AND directory = ?",
+                                   (run_id, directory))
+            return {row[0] for row in rows}
+
+    # ✅ Companies per directory in a run, and how many are unique once cross-listings are merged
+    def directory_summary(self, run_id):
+        with self.lock:
+            per_directory = dict(self.db.execute(
+                "SELECT directory, COUNT(*) FROM lead_directories WHERE run_id = ? GROUP BY directory", (run_id,)))
+            unique = self.db.execute(
+                "SELECT COUNT(DISTINCT profile_url) FROM lead_directories WHERE run_id = ?", (run_id,)).fetchone()[0]
+        return per_directory, unique
+
+    # ✅ Added / changed / removed leads of a run
+    def diff_report(self, run_id):
+        report = {"run": run_id, "previous_run": self.previous_run(run_id), "added": [], "changed": [], "removed": []}
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT c.profile_url, c.kind, c.fields, l.name FROM lead_changes c "
+                "LEFT JOIN leads l ON l.profile_url = c.profile_url WHERE c.run_id = ? ORDER BY c.kind, l.name",
+                (run_id,),
+            ).fetchall()
+        for url, kind, fields, name in rows:
+            entry = {"profile_url": url, "name": name}
+            if fields:
+                entry["fields"] = json.loads(fields)
+            report[kind].append(entry)
+        report["summary"] = {kind: len(report[kind]) for kind in ("added", "changed", "removed")}
+        return report
+
+    def latest_run(self):
+        with self.lock:
+            return self.db.execute("SELECT MAX(last_run) FROM leads").fetchone()[0]
+
+    # ✅ Domains that need an email lookup (new, moved, or older than ttl_days), in batches of (domain, website)
+    #    Keyset-paginated, so results can be written back between batches
+    def pending_domains(self, run_id=None, batch_size=BATCH_SIZE, ttl_days=EMAIL_TTL_DAYS):
+        expired = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - ttl_days * 86400))
+        query = ("SELECT canonical_domain, MIN(website) FROM leads "
+                 "WHERE (email_status = 'pending' OR (email_status != 'no_website' AND email_checked_at < ?)) "
+                 "AND canonical_domain > ?")
+        if run_id:
+            query += " AND last_run = ?"
+        query += " GROUP BY canonical_domain ORDER BY canonical_domain LIMIT ?"
+        last = ""
+        while True:
+            with self.lock:
+                params = [expired, last, run_id, batch_size] if run_id else [expired, last, batch_size]
+                batch = self.db.execute(query, params).fetchall()
+            if not batch:
+                return
+            yield batch
+            last = batch[-1][0]
+
+    # ✅ Write one email result per domain to every lead on that domain
+    #    results: (domain, email, status) with status None for "found" / "not_found" by the email
+    def update_domain_emails(self, results, batch_size=BATCH_SIZE):
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        rows = [(email, status or ("found" if email else "not_found"), now, domain)
+                for domain, email, status in results]
+        with self.lock:
+            for start in range(0, len(rows), batch_size):
+                with self.db:
+                    self.db.executemany(
+                        "UPDATE leads SET email = ?, email_status = ?, email_checked_at = ? WHERE canonical_domain = ?",
+                        rows[start:start + batch_size],
+                    )
+
+    # ✅ Stream leads as dicts (one batch in memory at a time), in listing order
+    def iter_leads(self, fields=ENRICHED_FIELDS, run_id=None, batch_size=BATCH_SIZE):
+        query = f"SELECT {', '.join(fields)} FROM leads"
+        params = []
+        if run_id:
+            query += " WHERE last_run = ?"
+            params.append(run_id)
+        query += " ORDER BY last_run, list_page, list_position"
+        cursor = self.db.cursor()
+        cursor.execute(query, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(fields, row))
+
+    # ✅ Streaming JSON export, formatted like json.dump(leads, f, indent=2, ensure_ascii=False)
+    #    One entry per profile_url: cards scraped more than once are exported once (unlike the old in-memory dump)
+    def export_json(self, path, fields=ENRICHED_FIELDS, run_id=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        count = 0
+        with METRICS.timed("export.json"), open(path, "w", encoding="utf-8") as f:
+            for lead in self.iter_leads(fields, run_id):
+                item = json.dumps(lead, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(("[\n  " if count == 0 else ",\n  ") + item)
+                count += 1
+            f.write("\n]" if count else "[]")
+        return count
+
+    # ✅ Streaming CSV export with the scraper's column order
+    def export_csv(self, path, fields=SCRAPED_FIELDS, run_id=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        count = 0
+        with METRICS.timed("export.csv"), open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for lead in self.iter_leads(fields, run_id):
+                writer.writerow(lead)
+                count += 1
+        return count
+
+    def close(self):
+        with self.lock:
+            self.db.close()
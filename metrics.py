@@ -0,0 +1,301 @@
+import collections
+import cProfile
+import functools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROMETHEUS_PREFIX = "clutch"
+SAMPLE_INTERVAL = 0.005  # Seconds between two stack samples (--profile sample)
+PROFILE_TOP = 40         # Functions listed in the profile summary
+
+
+# ✅ Run-wide timers and counters, shared by every thread of a run
+#    Timers: total / count / max seconds per named stage. Counters: a number per name and optional labels,
+#    e.g. count("errors", type="TimeoutError") or count("bytes", 5120, kind="homepage").
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = collections.Counter()
+
+    def observe(self, name, seconds):
+        with self.lock:
+            total, count, longest = self.timers.get(name, (0.0, 0, 0.0))
+            self.timers[name] = (total + seconds, count + 1, max(longest, seconds))
+
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def count(self, name, value=1, **labels):
+        key = name + ("{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}" if labels else "")
+        with self.lock:
+            self.counters[key] += value
+
+    # ✅ Hand the numbers collected so far to another process (parser processes -> main process)
+    def drain(self):
+        with self.lock:
+            snapshot = (self.timers, dict(self.counters))
+            self.timers, self.counters = {}, collections.Counter()
+        return snapshot
+
+    def merge(self, snapshot):
+        timers, counters = snapshot
+        with self.lock:
+            for name, (total, count, longest) in timers.items():
+                old_total, old_count, old_longest = self.timers.get(name, (0.0, 0, 0.0))
+                self.timers[name] = (old_total + total, old_count + count, max(old_longest, longest))
+            self.counters.update(counters)
+
+    def snapshot(self):
+        with self.lock:
+            timers = {
+                name: {"total_s": round(total, 6), "count": count, "avg_s": round(total / count, 6),
+                       "max_s": round(longest, 6)}
+                for name, (total, count, longest) in sorted(self.timers.items())
+            }
+            return {"timers": timers, "counters": dict(sorted(self.counters.items()))}
+
+    # ✅ Prometheus text exposition format (for node_exporter's textfile collector)
+    def prometheus(self, prefix=PROMETHEUS_PREFIX, run_labels=None):
+        base = ",".join(f'{k}="{v}"' for k, v in sorted((run_labels or {}).items()))
+        lines = []
+        with self.lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+        if timers:
+            for suffix, kind, index in (("sum", "counter", 0), ("count", "counter", 1), ("max", "gauge", 2)):
+                metric = f"{prefix}_stage_seconds_{suffix}"
+                lines.append(f"# TYPE {metric} {kind}")
+                for name, values in timers:
+                    labels = ",".join(filter(None, [base, f'stage="{name}"']))
+                    lines.append(f"{metric}{{{labels}}} {values[index]:.6g}")
+        typed = set()
+        for key, value in counters:
+            name, _, labels = key.partition("{")
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            labels = ",".join(filter(None, [base, labels.rstrip("}")]))
+            lines.append(f"{metric}{{{labels}}} {value}" if labels else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, top=12):
+        with self.lock:
+            timers = sorted(self.timers.items(), key=lambda item: -item[1][0])[:top]
+            counters = sorted(self.counters.items())
+        lines = ["📈 Stage timers (total / calls / avg / max):"]
+        for name, (total, count, longest) in timers:
+            lines.append(f"   {name:<22} {total:8.2f}s  {count:6d}x  {total / count * 1000:8.1f}ms  "
+                         f"{longest * 1000:8.1f}ms")
+        if counters:
+            lines.append("   " + ", ".join(f"{key}={format_counter(value)}" for key, value in counters))
+        return "\n".join(lines)
+
+
+# Byte counters run into the millions: whole numbers in full with thousands separators, never "1.23457e+06"
+def format_counter(value):
+    return f"{int(value):,}" if float(value).is_integer() else f"{value:,}"
+
+
+METRICS = Metrics()
+
+
+# ✅ Sampling profiler: every SAMPLE_INTERVAL, which function each thread is in (self) and on its stack (total)
+#    Cheap enough for a full run, sees every thread and asyncio task, needs no code changes.
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.self_samples = collections.Counter()
+        self.total_samples = collections.Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                self.samples += 1
+                self.self_samples[frame_label(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    label = frame_label(frame)
+                    if label not in seen:
+                        seen.add(label)
+                        self.total_samples[label] += 1
+                    frame = frame.f_back
+
+    def stop(self, path):
+        self.stop_event.set()
+        self.thread.join()
+        samples = max(self.samples, 1)
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f}ms (all threads)",
+                 f"{'self %':>7} {'total %':>8}  function"]
+        for label, count in self.total_samples.most_common(PROFILE_TOP):
+            lines.append(f"{self.self_samples[label] / samples:7.1%} {count / samples:8.1%}  {label}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+# ✅ cProfile around the functions decorated with @profiled, one profile per thread, merged at the end
+class FunctionProfiler:
+    def __init__(self):
+        self.local = threading.local()
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        if getattr(self.local, "active", False):  # already inside a profiled call on this thread
+            return func(*args, **kwargs)
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:  # Python 3.12+: only one thread can profile at a time, this call runs unprofiled
+            return func(*args, **kwargs)
+        self.local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.local.active = False
+
+    # ✅ Stats of this thread's profile so far, to send to the main process (parser processes)
+    def drain(self):
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            return None
+        profile.create_stats()
+        self.local.profile = None
+        with self.lock:
+            self.profiles.remove(profile)
+        return profile.stats
+
+    def merge(self, stats):
+        with self.lock:
+            self.profiles.append(ProfileStats(stats))
+
+    def stop(self, path):
+        with self.lock:
+            profiles = [profile for profile in self.profiles
+                        if isinstance(profile, ProfileStats) or profile.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(path)
+        with open(f"{path}.txt", "w", encoding="utf-8") as f:
+            pstats.Stats(path, stream=f).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        return path
+
+
+# Stats drained from another process, in the shape pstats.Stats() reads a profile
+class ProfileStats:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+PROFILER = None  # FunctionProfiler while --profile cprofile is on (inherited by forked parser processes)
+
+
+# ✅ Initializer for worker processes: forget what a forked child inherited, or it would be merged back twice
+def fresh_process():
+    global PROFILER
+    METRICS.drain()
+    if PROFILER is not None:
+        PROFILER = FunctionProfiler()
+
+
+def drain_profile():
+    return PROFILER.drain() if PROFILER else None
+
+
+def merge_profile(stats):
+    if PROFILER and stats:
+        PROFILER.merge(stats)
+
+
+# ✅ Hot functions: cProfiled when --profile cprofile is on, a plain call otherwise
+def profiled(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if PROFILER is None:
+            return func(*args, **kwargs)
+        return PROFILER.call(func, *args, **kwargs)
+    return wrapper
+
+
+def add_arguments(parser, metrics_file):
+    parser.add_argument("--metrics", default=metrics_file, help="JSON run report: stage timers and counters")
+    parser.add_argument("--prometheus", help="Also write the metrics in Prometheus text format to this file")
+    parser.add_argument("--profile", choices=["cprofile", "sample"],
+                        help="cprofile: cProfile the hot functions (.prof + .prof.txt next to --metrics); "
+                             "sample: sample every thread's stack (.samples.txt)")
+
+
+# ✅ Instrument a whole run: profiler on, then the JSON (and Prometheus) report written on the way out
+#    Yields a dict the caller can add sections to (e.g. the pipeline utilisation).
+@contextmanager
+def run_report(args, name):
+    global PROFILER
+    base = re.sub(r"(\.metrics)?\.json$", "", args.metrics)
+    sampler = None
+    if args.profile == "sample":
+        sampler = StackSampler()
+        sampler.start()
+    elif args.profile == "cprofile":
+        PROFILER = FunctionProfiler()
+
+    extra = {}
+    started, started_at = time.perf_counter(), time.strftime("%Y-%m-%dT%H:%M:%S")
+    try:
+        yield extra
+    finally:
+        profile_path = None
+        if sampler:
+            profile_path = sampler.stop(f"{base}.samples.txt")
+        elif PROFILER:
+            profile_path = PROFILER.stop(f"{base}.prof")
+            PROFILER = None
+
+        report = {"name": name, "started_at": started_at, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "wall_s": round(time.perf_counter() - started, 3), **METRICS.snapshot(), **extra}
+        if profile_path:
+            report["profile"] = profile_path
+        os.makedirs(os.path.dirname(args.metrics) or ".", exist_ok=True)
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        if args.prometheus:
+            os.makedirs(os.path.dirname(args.prometheus) or ".", exist_ok=True)
+            with open(args.prometheus, "w", encoding="utf-8") as f:
+                f.write(METRICS.prometheus(run_labels={"job": name}))
+        print(METRICS.report())
+        print(f"🧾 Run report: {args.metrics}" + (f", profile: {profile_path}" if profile_path else ""))
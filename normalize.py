@@ -0,0 +1,179 @@
+# Typed columns for the raw strings Clutch shows on a card, with vectorized pandas string operations.
+#
+#   python normalize.py output/enriched_with_email.json          # -> output/enriched_with_email.normalized.csv
+#   python normalize.py output/clutch_leads_stealth.csv --output leads.csv
+#
+#   hourly_rate       "$25 - $49 / hr"  -> hourly_rate_min 25, hourly_rate_max 49, hourly_rate_avg 37.0
+#                     "< $25 / hr"      -> hourly_rate_min <NA>, hourly_rate_max 25, hourly_rate_avg 25.0
+#   min_project_size  "$5,000+"         -> min_project_usd 5000
+#   employee_range    "1,000 - 9,999"   -> employees_min 1000, employees_max 9999 ("10,000+": no max)
+#   rating            "4.8"             -> rating_value 4.8
+#   review_count      "79"              -> reviews 79
+#   location          "London, England" -> city "London", region "England", country "England"
+#                     "Miami, FL"       -> city "Miami", region "FL", country "United States"
+#
+# "Undisclosed", empty and missing values become <NA>. The scraper, the scheduler and the enricher write a
+# .normalized.csv next to their exports; the raw columns are kept as scraped.
+import argparse
+import itertools
+import json
+import os
+
+import pandas as pd
+
+from metrics import METRICS
+
+# "$25 - $49", "< $25", "$5,000+", "1,000 - 9,999"
+RANGE_PATTERN = r"^\s*(?P<below><)?\s*\$?(?P<low>\d[\d,]*)\s*(?P<plus>\+)?(?:\s*-\s*\$?(?P<high>\d[\d,]*))?"
+# "City, Region": everything after the first comma is the region; a US state code counts as the United States
+# (lead_store.parse_country fills the store's indexed country column with the same rule)
+LOCATION_PATTERN = r"^\s*(?P<city>[^,]*[^,\s])\s*(?:,\s*(?P<region>.*\S))?\s*$"
+US_STATE_PATTERN = r"^[A-Z]{2}$"  # Clutch shows US companies as "City, ST"
+US_COUNTRY = "United States"
+NORMALIZE_BATCH = 50_000  # Leads normalized and appended to the CSV at a time
+
+
+def to_number(values, dtype="Int64"):
+    return pd.to_numeric(values.str.replace(",", "", regex=False)).astype(dtype)
+
+
+# ✅ (low, high) of a range; "< $25" has no low, "$5,000+" has no high, a single "$300" is both
+def parse_range(values):
+    parts = values.str.extract(RANGE_PATTERN)
+    low, high = to_number(parts["low"]), to_number(parts["high"])
+    high = high.fillna(low.mask(parts["plus"].notna()))
+    return low.mask(parts["below"].notna()), high
+
+
+def parse_hourly_rate(values):
+    low, high = parse_range(values)
+    average = (low.fillna(high) + high.fillna(low)) / 2
+    return pd.DataFrame({"hourly_rate_min": low, "hourly_rate_max": high,
+                         "hourly_rate_avg": average.astype("Float64")})
+
+
+def parse_project_size(values):
+    low, _ = parse_range(values)
+    return pd.DataFrame({"min_project_usd": low})
+
+
+def parse_employees(values):
+    low, high = parse_range(values)
+    return pd.DataFrame({"employees_min": low, "employees_max": high})
+
+
+def parse_rating(values):
+    return pd.DataFrame({"rating_value": pd.to_numeric(values.str.strip(), errors="coerce").astype("Float64")})
+
+
+def parse_reviews(values):
+    return pd.DataFrame({"reviews": to_number(values.str.extract(r"(\d[\d,]*)")[0])})
+
+
+def parse_location(values):
+    parts = values.str.extract(LOCATION_PATTERN)
+    region = parts["region"]
+    country = region.mask(region.str.fullmatch(US_STATE_PATTERN).fillna(False).astype(bool), US_COUNTRY)
+    return pd.DataFrame({"city": parts["city"], "region": region, "country": country})
+
+
+# Raw column -> parser returning its typed columns
+NORMALIZERS = {
+    "hourly_rate": parse_hourly_rate,
+    "min_project_size": parse_project_size,
+    "employee_range": parse_employees,
+    "rating": parse_rating,
+    "review_count": parse_reviews,
+    "location": parse_location,
+}
+# Raw column -> the typed column that tells whether it parsed (coverage report)
+PARSED_COLUMN = {"hourly_rate": "hourly_rate_avg", "min_project_size": "min_project_usd",
+                 "employee_range": "employees_min", "rating": "rating_value", "review_count": "reviews",
+                 "location": "city"}
+
+
+# ✅ Clutch columns repeat a handful of values ("$50 - $99 / hr", "$10,000+"): parse each distinct value once,
+#    then spread the results over the rows with one take per column (missing values stay <NA>)
+def parse_distinct(values, parse):
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype="string"))
+    return pd.DataFrame({name: column.array.take(codes, allow_fill=True) for name, column in parsed.items()},
+                        index=values.index)
+
+
+# ✅ Leads with the typed columns added next to the raw ones
+#    distinct=False runs the string operations over every row instead (see benchmarks/bench_normalize.py).
+def normalize_leads(leads, distinct=True):
+    typed = []
+    for column, parse in NORMALIZERS.items():
+        if column not in leads:
+            continue
+        if distinct:
+            typed.append(parse_distinct(leads[column], parse))
+        else:
+            typed.append(parse(leads[column].astype("string")).set_axis(leads.index))
+    # Typed columns already in the input (an earlier .normalized.csv) are computed again
+    stale = [name for frame in typed for name in frame.columns if name in leads]
+    return pd.concat([leads.drop(columns=stale)] + typed, axis=1)
+
+
+def normalized_path(path):
+    return os.path.splitext(path)[0] + ".normalized.csv"
+
+
+# ✅ Normalized CSV of a list (or stream) of lead dicts, batch_size leads at a time; returns the number of rows
+#    A stream (LeadStore.iter_leads) is never held in memory whole. Its rows share one set of fields; a list's
+#    columns are the union of its dicts' keys, as with a single DataFrame.
+def write_normalized(leads, path, batch_size=NORMALIZE_BATCH):
+    fields = list(dict.fromkeys(key for lead in leads for key in lead)) if isinstance(leads, list) else None
+    leads = iter(leads)
+    count = 0
+    with METRICS.timed("export.normalized"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        while True:
+            batch = list(itertools.islice(leads, batch_size))
+            if not batch and count:
+                break
+            frame = normalize_leads(pd.DataFrame.from_records(batch, columns=fields))
+            frame.to_csv(path, mode="a" if count else "w", header=not count, index=False)
+            count += len(batch)
+            if not batch:
+                break
+    return count
+
+
+# ✅ Share of non-empty raw values that parsed, per raw column
+def coverage(frame):
+    shares = {}
+    for column, typed in PARSED_COLUMN.items():
+        if column not in frame:
+            continue
+        raw = frame[column].astype("string").str.strip()
+        present = raw.notna() & (raw != "") & (raw != "Undisclosed")
+        shares[column] = (frame[typed].notna() & present).sum() / max(int(present.sum()), 1)
+    return shares
+
+
+def read_leads(path):
+    if path.endswith(".csv"):
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    with open(path, "r", encoding="utf-8") as f:
+        return pd.DataFrame.from_records(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add typed rate / size / rating / location columns to scraped leads.")
+    parser.add_argument("input", help="Leads as exported by the scraper or the enricher (.json or .csv)")
+    parser.add_argument("--output", help="Normalized CSV (default: <input>.normalized.csv)")
+    args = parser.parse_args()
+
+    frame = normalize_leads(read_leads(args.input))
+    output = args.output or normalized_path(args.input)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    frame.to_csv(output, index=False)
+    shares = ", ".join(f"{column} {share:.0%}" for column, share in coverage(frame).items())
+    print(f"🧮 {len(frame)} leads normalized ({shares} parsed) -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+# ✅ Readiness signals
+POLL_INTERVAL = 0.25     # Seconds between two readiness checks
+CARDS_STABLE_FOR = 0.75  # Card count must stay unchanged this long
+NETWORK_IDLE_FOR = 0.5   # No new network requests for this long
+READY_TIMEOUT = 25       # Give up waiting for cards after this many seconds
+IDLE_TIMEOUT = 4         # Give up waiting for network idle after this many seconds
+
+# ✅ Politeness delay between pages: jittered, scaled by observed load time and block signals
+POLITE_DELAY = (1.0, 2.0)  # Seconds, before scaling
+REFERENCE_LOAD_TIME = 3.0  # Load time that counts as "normal" (factor 1.0)
+MIN_FACTOR = 0.5
+MAX_FACTOR = 8.0
+
+CHALLENGE_MARKERS = (
+    "just a moment...",
+    "checking if the site connection is secure",
+    "cf-chl-",
+    "challenge-platform",
+    "challenges.cloudflare.com/turnstile",
+)
+
+
+# ✅ Seconds spent in each kind of wait, summed over all workers
+class WaitLog:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def add(self, name, seconds):
+        with self.lock:
+            total, count = self.totals.get(name, (0.0, 0))
+            self.totals[name] = (total + seconds, count + 1)
+        METRICS.observe(f"wait.{name}", seconds)
+
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    # ✅ Per-wait totals as a share of worker time (wall time x number of workers)
+    def report(self, wall_seconds, workers=1):
+        budget = max(wall_seconds * workers, 1e-9)
+        lines = [f"⏱️ Wait breakdown ({wall_seconds:.1f}s wall, {workers} worker(s)):"]
+        for name, (total, count) in sorted(self.totals.items(), key=lambda item: -item[1][0]):
+            lines.append(f"   {name:<16} {total:7.1f}s  {total / budget:6.1%}  ({count}x, avg {total / count:.2f}s)")
+        return "\n".join(lines)
+
+
+WAIT_LOG = WaitLog()
+
+
+# ✅ Wait until the card count is non-zero and stops changing (returns the final count, 0 on timeout)
+def wait_for_cards(driver, selector, timeout=READY_TIMEOUT, stable_for=CARDS_STABLE_FOR):
+    with WAIT_LOG.timed("cards_ready"):
+        deadline = time.monotonic() + timeout
+        last_count, changed_at = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            count = driver.execute_script("return document.querySelectorAll(arguments[0]).length", selector)
+            now = time.monotonic()
+            if count != last_count:
+                last_count, changed_at = count, now
+            elif count > 0 and now - changed_at >= stable_for:
+                return count
+            time.sleep(POLL_INTERVAL)
+        return max(last_count, 0)
+
+
+# ✅ Wait until the document is complete and no new resources were requested for `idle_for` seconds
+def wait_for_network_idle(driver, idle_for=NETWORK_IDLE_FOR, timeout=IDLE_TIMEOUT):
+    with WAIT_LOG.timed("network_idle"):
+        deadline = time.monotonic() + timeout
+        last_count, changed_at = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            state, count = driver.execute_script(
+                "return [document.readyState, performance.getEntriesByType('resource').length]"
+            )
+            now = time.monotonic()
+            if count != last_count:
+                last_count, changed_at = count, now
+            elif state == "complete" and now - changed_at >= idle_for:
+                return True
+            time.sleep(POLL_INTERVAL)
+        return False
+
+
+# ✅ Cloudflare / Turnstile interstitial instead of real content?
+def is_challenge_page(html):
+    if not html:
+        return False
+    head = html[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+# ✅ Politeness delay that adapts: slower responses and block signals stretch it, clean pages shrink it back
+class AdaptivePoliteness:
+    def __init__(self, delay=POLITE_DELAY, reference=REFERENCE_LOAD_TIME):
+        self.delay = delay
+        self.reference = reference
+        self.avg_load = reference
+        self.penalty = 1.0
+        self.lock = threading.Lock()
+
+    def observe(self, load_seconds):
+        with self.lock:
+            self.avg_load = 0.8 * self.avg_load + 0.2 * load_seconds
+            self.penalty = max(1.0, self.penalty * 0.8)
+
+    def blocked(self):
+        with self.lock:
+            self.penalty = min(MAX_FACTOR, self.penalty * 2)
+        print(f"🚧 Block signal, politeness delay x{self.factor():.1f}")
+
+    def factor(self):
+        return min(MAX_FACTOR, max(MIN_FACTOR, self.avg_load / self.reference) * self.penalty)
+
+    def next_delay(self):
+        return random.uniform(*self.delay) * self.factor()
+
+    def sleep(self):
+        seconds = self.next_delay()
+        with WAIT_LOG.timed("politeness"):
+            time.sleep(seconds)
+        return seconds
+
+    # ✅ Same, for asyncio workers (only the calling task waits)
+    async def sleep_async(self):
+        seconds = self.next_delay()
+        with WAIT_LOG.timed("politeness"):
+            await asyncio.sleep(seconds)
+        return seconds
@@ -0,0 +1,98 @@
+import threading
+
+from card_parsers import parse_last_page
+
+MAX_PAGES = 500       # Never plan more pages than this, whatever the pagination says
+FALLBACK_PAGES = 10   # Plan used when the first page shows no pagination and no result count
+STOP_AFTER = 2        # Stop after this many consecutive empty or already-seen pages
+
+
+# ✅ Thread-safe page plan shared by the fetch workers
+#    pages=N fixes the plan. pages=None reads it from page 0: workers get page 0 first and wait until
+#    discover() has seen it. The plan stops early once STOP_AFTER pages in a row were empty or only held
+#    companies seen earlier in the run (out-of-range pages often repeat the last one).
+class PagePlan:
+    WAIT = -1  # take(block=False): nothing to hand out until page 0 has been discovered
+
+    def __init__(self, pages=None, done=(), max_pages=MAX_PAGES, stop_after=STOP_AFTER):
+        self.max_pages = max_pages
+        self.stop_after = stop_after
+        self.discovered = pages is not None
+        self.limit = min(pages, max_pages) if pages is not None else 1
+        # Page 0 is fetched again when the plan has to be read from it
+        self.done = set(done) - ({0} if pages is None else set())
+        self.next_page = 0
+        self.bad = set()
+        self.stopped_at = None
+        self.seen = set()
+        self.condition = threading.Condition()
+
+    # ✅ Next page number to fetch, or None when the plan is exhausted or stopped
+    def take(self, block=True):
+        with self.condition:
+            while not self.discovered and self.next_page >= self.limit:
+                if not block:
+                    return self.WAIT
+                self.condition.wait()
+            while self.next_page < self.limit and self.next_page in self.done:
+                self.next_page += 1
+            if self.stopped_at is not None or self.next_page >= self.limit:
+                return None
+            self.next_page += 1
+            return self.next_page - 1
+
+    # ✅ Size the plan from page 0 (html None: the page didn't load, fall back to FALLBACK_PAGES)
+    def discover(self, html, cards_per_page=None):
+        with self.condition:
+            if self.discovered:
+                return
+            last_page = parse_last_page(html, cards_per_page)
+            if last_page is None:
+                self.limit = min(FALLBACK_PAGES, self.max_pages)
+                print(f"⚠️ No pagination found on page 1, planning {self.limit} pages.")
+            else:
+                self.limit = min(last_page + 1, self.max_pages)
+                print(f"🧭 Directory has {last_page + 1} pages, planning {self.limit}.")
+            self.discovered = True
+            self.condition.notify_all()
+
+    # ✅ A worker quit (crashed) holding a page: the page stays undone for --resume, and if it was page 0 the plan
+    #    is sized without it, so the workers waiting in take() don't wait forever
+    def abandon(self, page_number):
+        if page_number == 0:
+            self.discover(None)
+
+    # ✅ A later stage failed: hand out no more pages (workers waiting for page 0 get None too)
+    def stop(self):
+        with self.condition:
+            self.discovered = True
+            if self.stopped_at is None:
+                self.stopped_at = self.next_page
+            self.condition.notify_all()
+
+    # ✅ Companies of pages finished in a previous run (and not fetched again) count as seen
+    def mark_seen(self, page_number, cards):
+        with self.condition:
+            if page_number in self.done:
+                self.seen.update(card.get("profile_url") for card in cards)
+
+    # ✅ Book a parsed page; returns False when its cards were all seen before (the page should not be kept)
+    def finish(self, page_number, cards):
+        with self.condition:
+            urls = {card.get("profile_url") for card in cards}
+            fresh = bool(urls - self.seen)
+            self.seen.update(urls)
+            if fresh:
+                return True
+
+            self.bad.add(page_number)
+            streak = range(page_number - self.stop_after + 1, page_number + 1)
+            if self.stopped_at is None and all(page in self.bad for page in streak):
+                self.stopped_at = page_number
+                print(f"🛑 Pages {streak.start + 1}-{page_number + 1} were empty or repeated: stopping "
+                      f"(pages past them are skipped; --resume retries the empty ones).")
+            return False
+
+    def planned(self):
+        with self.condition:
+            return self.limit
@@ -0,0 +1,150 @@
+# Columnar lead export: Parquet files with a fixed Arrow schema, one per run, partitioned by run date.
+#
+#   output/parquet/leads/run_date=2026-10-18/run-20261018T093000.parquet
+#
+# Raw card strings, the typed columns of normalize.py, the email and the time the lead was scraped, written in
+# row groups of ROW_GROUP_SIZE leads while the store is streamed. Reading back only the columns (and run dates)
+# a query needs skips everything else on disk:
+#
+#   from parquet_export import read_leads
+#   df = read_leads(columns=["country", "hourly_rate_avg", "email"], run_date="2026-10-18")
+#
+# Every run adds a file (an enricher run over a JSON file too), so a company scraped or enriched more than once has a
+# row per run. read_leads() keeps the row of the latest run per profile_url; latest=False returns every run's rows.
+import itertools
+import os
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from metrics import METRICS
+from normalize import normalize_leads
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for --parquet
+    pa = None
+
+PARQUET_DIR = "output/parquet/leads"
+ROW_GROUP_SIZE = 10_000   # Leads per row group (and per batch held in memory while writing)
+COMPRESSION = "zstd"
+
+# Store columns read for the export, on top of the scraped fields and the email
+STORE_FIELDS = ["name", "profile_url", "website", "location", "hourly_rate", "employee_range", "min_project_size",
+                "review_count", "rating", "description", "email", "last_seen_at"]
+
+
+# ✅ One schema for every run, so files of different runs read as one table
+def lead_schema():
+    text = pa.string()
+    return pa.schema([
+        ("name", text), ("profile_url", text), ("website", text), ("location", text), ("hourly_rate", text),
+        ("employee_range", text), ("min_project_size", text), ("review_count", text), ("rating", text),
+        ("description", text),
+        ("hourly_rate_min", pa.int32()), ("hourly_rate_max", pa.int32()), ("hourly_rate_avg", pa.float64()),
+        ("min_project_usd", pa.int64()), ("employees_min", pa.int32()), ("employees_max", pa.int32()),
+        ("rating_value", pa.float32()), ("reviews", pa.int32()),
+        ("city", text), ("region", text), ("country", text),
+        ("email", text),
+        ("scraped_at", pa.timestamp("ms")),  # Parquet has no seconds unit
+        ("run_id", text),
+    ])
+
+
+def partitioning():
+    return ds.partitioning(pa.schema([("run_date", pa.date32())]), flavor="hive")
+
+
+def run_date(run_id):
+    return datetime.strptime(run_id, "%Y%m%dT%H%M%S").date().isoformat()
+
+
+def run_path(root, run_id):
+    return os.path.join(root, f"run_date={run_date(run_id)}", f"run-{run_id}.parquet")
+
+
+# ✅ Typed Arrow table of a batch of lead dicts
+def lead_table(leads, run_id, schema):
+    frame = normalize_leads(pd.DataFrame.from_records(leads))
+    # Store rows carry the time the lead was last seen; leads from a file are stamped with the export time
+    scraped_at = frame["last_seen_at"] if "last_seen_at" in frame else time.strftime("%Y-%m-%dT%H:%M:%S")
+    frame["scraped_at"] = pd.to_datetime(scraped_at, format="%Y-%m-%dT%H:%M:%S")
+    frame["run_id"] = run_id
+    frame = frame.reindex(columns=schema.names)
+    for field in schema:  # columns a source doesn't have (e.g. no emails yet) stay null, with the schema's type
+        if pa.types.is_string(field.type):
+            frame[field.name] = frame[field.name].astype("string")
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+# ✅ Write a run's leads (dicts, any iterable) row group by row group; returns the number of leads
+#    The file gets its final name only once complete (dataset reads skip the hidden .tmp), so a rerun replaces it.
+def write_leads(leads, run_id, root=PARQUET_DIR, row_group_size=ROW_GROUP_SIZE):
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    schema = lead_schema()
+    path = run_path(root, run_id)
+    partial = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with METRICS.timed("export.parquet"):
+        with pq.ParquetWriter(partial, schema, compression=COMPRESSION) as writer:
+            leads = iter(leads)
+            while True:
+                batch = list(itertools.islice(leads, row_group_size))
+                if not batch:
+                    break
+                writer.write_table(lead_table(batch, run_id, schema), row_group_size=row_group_size)
+                count += len(batch)
+        os.replace(partial, path)
+    print(f"🧱 {count} leads -> {path}")
+    return count
+
+
+# ✅ Export a store run (lead_store.py): streamed, one row group in memory at a time
+def export_store_run(store, run_id, root=PARQUET_DIR, row_group_size=ROW_GROUP_SIZE):
+    return write_leads(store.iter_leads(STORE_FIELDS, run_id, batch_size=row_group_size), run_id, root,
+                       row_group_size)
+
+
+def add_arguments(parser):
+    parser.add_argument("--parquet", nargs="?", const=PARQUET_DIR, metavar="DIR",
+                        help=f"Also write the run as Parquet: typed schema, row groups, partitioned by run date "
+                             f"(default dataset: {PARQUET_DIR}, needs pyarrow)")
+
+
+# ✅ Fail at startup, not after the run, when --parquet is asked for without pyarrow
+def check_arguments(parser, args):
+    if args.parquet and pa is None:
+        parser.error("--parquet needs pyarrow (pip install pyarrow)")
+
+
+# ✅ Latest run's row per profile_url (rows without one are all kept), in dataset order
+def latest_leads(frame):
+    by_run = frame.sort_values("run_id", kind="stable")
+    keep = ~by_run["profile_url"].duplicated(keep="last") | by_run["profile_url"].isna()
+    return by_run[keep].sort_index().reset_index(drop=True)
+
+
+# ✅ Leads of every run (or of one run date) as a DataFrame, reading only the columns asked for
+#    One row per profile_url, from the latest run (latest=False: one row per run that wrote the lead).
+#    Numbers come back as nullable pandas dtypes (Int32, Float64, ...), missing values as <NA>.
+def read_leads(root=PARQUET_DIR, columns=None, run_date=None, latest=True):
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning())
+    condition = None
+    if run_date is not None:
+        condition = ds.field("run_date") == pa.scalar(date.fromisoformat(str(run_date)))
+    needed = columns
+    if latest and columns is not None:
+        needed = list(dict.fromkeys([*columns, "profile_url", "run_id"]))
+    table = dataset.to_table(columns=needed, filter=condition)
+    nullable = {pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype(), pa.float32(): pd.Float32Dtype(),
+                pa.float64(): pd.Float64Dtype()}
+    frame = table.to_pandas(types_mapper=nullable.get)
+    if not latest:
+        return frame
+    frame = latest_leads(frame)
+    return frame[list(columns)] if columns is not None else frame
@@ -0,0 +1,156 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from card_parsers import DEFAULT_ENGINE, parse_listing
+from metrics import METRICS, drain_profile, fresh_process, merge_profile
+
+QUEUE_SIZE = 8  # Raw pages (or parsed results) allowed to wait between two stages; producers block beyond that
+RESULT_POLL = 0.05  # Seconds between checks for finished parses while no new page arrives
+
+
+# ✅ Busy / blocked time of one pipeline stage, summed over its workers
+class StageStats:
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0      # doing the stage's own work
+        self.blocked = 0.0   # waiting for room in the next stage's queue (backpressure)
+        self.error = None    # exception that ended the stage early; the caller raises it after joining the threads
+        self.lock = threading.Lock()
+
+    def add(self, busy=0.0, blocked=0.0, items=0):
+        with self.lock:
+            self.busy += busy
+            self.blocked += blocked
+            self.items += items
+
+    @contextmanager
+    def working(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(busy=time.perf_counter() - started)
+
+    # ✅ The stage failed: keep the error for the caller and stop the producers upstream (stop(), e.g. PagePlan.stop)
+    def fail(self, error, stop=None):
+        self.error = error
+        METRICS.count("errors", stage=self.name, type=type(error).__name__)
+        print(f"❌ {self.name.capitalize()} stage failed: {error!r}. "
+              f"Pages not yet written are skipped (--resume fetches them again).")
+        if stop is not None:
+            stop()
+
+    # ✅ put() that books the time spent waiting for room as backpressure
+    def put(self, target_queue, item):
+        started = time.perf_counter()
+        target_queue.put(item)
+        self.add(blocked=time.perf_counter() - started)
+
+
+# ✅ Per-stage utilisation: busy time as a share of (wall time x workers); the busiest stage is the bottleneck
+class PipelineStats:
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    def stage(self, name, workers=1):
+        self.stages[name] = StageStats(name, workers)
+        return self.stages[name]
+
+    def snapshot(self):
+        wall = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            name: {"workers": stage.workers, "items": stage.items,
+                   "busy": round(stage.busy / (wall * stage.workers), 4),
+                   "blocked": round(stage.blocked / (wall * stage.workers), 4)}
+            for name, stage in self.stages.items()
+        }
+
+    # ✅ Raise the first stage error once every thread has been joined
+    def raise_error(self):
+        for stage in self.stages.values():
+            if stage.error is not None:
+                raise stage.error
+
+    def report(self):
+        wall = max(time.perf_counter() - self.started, 1e-9)
+        lines = [f"🏭 Pipeline ({wall:.1f}s wall):"]
+        utilisation = {}
+        for name, stage in self.stages.items():
+            budget = wall * stage.workers
+            utilisation[name] = stage.busy / budget
+            lines.append(f"   {name:<6} {stage.workers:>2} worker(s)  {stage.items:5d} items  "
+                         f"busy {utilisation[name]:6.1%}  blocked {stage.blocked / budget:6.1%}")
+        if utilisation:
+            lines.append(f"   bottleneck: {max(utilisation, key=utilisation.get)}")
+        return "\n".join(lines)
+
+
+# Runs in the parser processes: returns the cards, the CPU time they took, and the process's parse.* timers and
+# cProfile stats (with --profile cprofile) for the main process's run report
+def parse_page(html, engine=DEFAULT_ENGINE):
+    started = time.process_time()
+    cards = parse_listing(html, engine)
+    return cards, time.process_time() - started, METRICS.drain(), drain_profile()
+
+
+# ✅ Parse stage: raw pages in, parsed pages out, in arrival order
+#    Items are (key, html, extra); html None passes straight through with no cards. A None item ends the stage
+#    and is forwarded. At most 2 pages per process are in flight, so a slow writer holds the fetchers back.
+#    If the stage itself fails (e.g. BrokenProcessPool), the error goes to stage.error, stop() tells the fetchers to
+#    take no more pages, the None is still forwarded so the writer stops, and pages still arriving are drained unparsed.
+def run_parse_stage(html_queue, result_queue, stage, engine=DEFAULT_ENGINE, processes=1, stop=None):
+    pending = collections.deque()
+    ended = False
+
+    def forward():
+        key, html, extra, future = pending.popleft()
+        cards = []
+        if future is not None:
+            try:
+                cards, seconds, timings, profile = future.result()
+                stage.add(busy=seconds, items=1)
+                METRICS.merge(timings)
+                merge_profile(profile)
+            except Exception as e:
+                METRICS.count("errors", stage="parse", type=type(e).__name__)
+                print(f"❌ Parsing {key} failed: {e!r}")
+        stage.put(result_queue, (key, html, cards, extra))
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=fresh_process) as pool:
+            while True:
+                # Keep forwarding finished pages while waiting: a fetcher may be waiting on one of them
+                try:
+                    item = html_queue.get(timeout=RESULT_POLL if pending else None)
+                except queue.Empty:
+                    while pending and (pending[0][3] is None or pending[0][3].done()):
+                        forward()
+                    continue
+                if item is None:
+                    ended = True
+                    break
+                key, html, extra = item
+                pending.append((key, html, extra, pool.submit(parse_page, html, engine) if html else None))
+                while pending and (len(pending) >= 2 * processes or pending[0][3] is None or pending[0][3].done()):
+                    forward()
+            while pending:
+                forward()
+    except Exception as e:
+        stage.fail(e, stop)
+    finally:
+        result_queue.put(None)
+    if not ended:
+        drain(html_queue)
+
+
+# ✅ Discard items up to the closing None, so the stage feeding a failed one never blocks on a full queue
+def drain(source_queue):
+    while source_queue.get() is not None:
+        pass
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import time
+
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+
+from card_parsers import CARD_SELECTOR, DEFAULT_ENGINE, parse_listing
+from checkpoint import append_jsonl
+from metrics import METRICS
+from pagination import PagePlan
+from pacing import WAIT_LOG, AdaptivePoliteness, is_challenge_page
+from profile_pool import ProfilePool
+from rate_limit import MAX_RETRIES, RETRY_STATUSES, interval_limiter
+from resource_policy import RESOURCE_METRICS_FILE, ResourcePolicy, apply_to_playwright
+
+CONTEXTS = 4              # Isolated browser contexts (cookies, cache, user-agent) inside one Chromium process
+MAX_CONTEXTS = 8          # Politeness cap, whatever --workers says
+HEADLESS = False          # Turnstile is far more likely headless, and a visible window lets you solve it
+NAV_TIMEOUT = 60000       # ms
+CARD_TIMEOUT = 40000      # ms
+NETWORK_IDLE_TIMEOUT = 5000  # ms, lazy-loaded content after the cards show up
+CAPTCHA_TIMEOUT = 180     # Seconds a context waits for its Turnstile to be solved before giving up on the page
+CAPTCHA_SELECTOR = "iframe[src*='turnstile'], iframe[src*='challenges.cloudflare.com']"
+STORAGE_STATE_FILE = "storage_state.json"  # Cookies + local storage of a pooled profile, saved when its context closes
+
+
+# ✅ Turnstile check that pauses only this context: the others keep scraping while it waits
+#    Replaces the blocking input() of the old sync script; returns False if it never cleared.
+async def wait_for_captcha(page, label):
+    if not await page.query_selector(CAPTCHA_SELECTOR):
+        return True
+    print(f"🚧 [{label}] CAPTCHA detected, pausing this context only. Solve it in the browser window...")
+    with WAIT_LOG.timed("captcha"):
+        deadline = time.monotonic() + CAPTCHA_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(2)
+            if not await page.query_selector(CAPTCHA_SELECTOR) and await page.query_selector(CARD_SELECTOR):
+                print(f"✅ [{label}] CAPTCHA cleared.")
+                return True
+    print(f"❌ [{label}] CAPTCHA not solved within {CAPTCHA_TIMEOUT}s.")
+    return False
+
+
+# ✅ Bytes / requests / blocked requests seen by one page, reset per listing page
+class TrafficMeter:
+    def __init__(self, page):
+        self.reset()
+        page.on("requestfinished", self.on_finished)
+        page.on("requestfailed", self.on_failed)
+
+    def reset(self):
+        self.traffic = {"bytes": 0, "requests": 0, "blocked": 0}
+
+    async def on_finished(self, request):
+        self.traffic["requests"] += 1
+        try:
+            sizes = await request.sizes()
+            self.traffic["bytes"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass
+
+    def on_failed(self, request):
+        self.traffic["requests"] += 1
+        self.traffic["blocked"] += 1
+
+
+# ✅ Load one listing page in a context: (html, retry)
+#    html is None if the cards never showed up; retry is True when the site throttled us (429 / 503, or a
+#    challenge nobody solved) and the limiter has booked a backoff for the host.
+async def load_listing_page(page, url, label, politeness, limiter):
+    started = time.perf_counter()
+    try:
+        with WAIT_LOG.timed("page.goto"):
+            response = await page.goto(url, timeout=NAV_TIMEOUT)
+        if not await wait_for_captcha(page, label):
+            politeness.blocked()
+            return None, limiter.throttled(url, challenge=True)
+        if response is not None and response.status in RETRY_STATUSES:
+            politeness.blocked()
+            print(f"🚧 [{label}] HTTP {response.status} on {url}")
+            return None, limiter.throttled(url, response.status, response.headers)
+        with WAIT_LOG.timed("cards_ready"):
+            await page.wait_for_selector(CARD_SELECTOR, timeout=CARD_TIMEOUT)
+    except PlaywrightTimeout:
+        print(f"❌ [{label}] Timeout on {url}")
+        if is_challenge_page(await page.content()):
+            politeness.blocked()
+            return None, limiter.throttled(url, challenge=True)
+        return None, False
+
+    limiter.succeeded(url)
+    politeness.observe(time.perf_counter() - started)
+    METRICS.observe("scrape.load_page", time.perf_counter() - started)
+    try:
+        with WAIT_LOG.timed("network_idle"):
+            await page.wait_for_load_state("networkidle", timeout=NETWORK_IDLE_TIMEOUT)
+    except PlaywrightTimeout:
+        pass
+    return await page.content(), False
+
+
+# ✅ A context on a pooled profile: its user-agent, and the cookies / clearance saved by its previous run
+class PooledContext:
+    def __init__(self, browser, pool, worker_id, options):
+        self.browser = browser
+        self.pool = pool
+        self.worker_id = worker_id
+        self.options = options
+
+    async def open(self):
+        self.profile = self.pool.lease(self.options["user_agents"], self.worker_id)
+        self.state_file = os.path.join(self.profile["path"], STORAGE_STATE_FILE)
+        self.started = time.perf_counter()
+        self.first_cards = False
+        self.context = await self.browser.new_context(
+            user_agent=self.profile["user_agent"], viewport={"width": 1366, "height": 900},
+            storage_state=self.state_file if os.path.exists(self.state_file) else None,
+        )
+        if self.options["policy"].enabled:
+            await apply_to_playwright(self.context, self.options["policy"])
+        self.page = await self.context.new_page()
+        self.meter = TrafficMeter(self.page)
+
+    # ✅ Book a page on the profile; returns True when a blocked profile was just swapped for a fresh one
+    async def page_done(self, html, blocked):
+        if html is not None and not self.first_cards:
+            self.first_cards = True
+            self.pool.started(self.profile, time.perf_counter() - self.started)
+        if self.pool.page_done(self.profile, blocked):
+            return False
+        print(f"🚫 [context {self.worker_id}] Profile {self.profile['id']} keeps getting blocked, "
+              f"reopening on a fresh profile.")
+        await self.close()
+        await self.open()
+        return True
+
+    # ✅ The page or its context died (crash, target closed): reopen on the same profile
+    async def recover(self):
+        if not self.page.is_closed():
+            return
+        print(f"🩹 [context {self.worker_id}] Page closed, reopening the context.")
+        try:
+            await self.context.close()
+        except PlaywrightError:
+            pass
+        self.pool.release(self.profile)
+        await self.open()
+
+    async def close(self):
+        try:
+            if self.profile["state"] == "healthy":
+                os.makedirs(self.profile["path"], exist_ok=True)
+                await self.context.storage_state(path=self.state_file)
+            await self.context.close()
+        except PlaywrightError as e:  # the context is already gone: nothing left to save
+            print(f"⚠️ [context {self.worker_id}] Context closed uncleanly: {str(e).splitlines()[0]}")
+        finally:
+            self.pool.release(self.profile)
+
+
+async def context_worker(browser, worker_id, plan, checkpoint, limiter, politeness, options):
+    label = f"context {worker_id}"
+    pooled = PooledContext(browser, options["pool"], worker_id, options)
+    await pooled.open()
+    taken = None  # page held but not booked yet: handed back to the plan if the worker dies with it
+    try:
+        while True:
+            page_number = plan.take(block=False)
+            if page_number == PagePlan.WAIT:  # another context is still reading the page count off page 1
+                await asyncio.sleep(0.2)
+                continue
+            if page_number is None:
+                return
+            taken = page_number
+
+            url = f"{options['base_url']}?page={page_number}"
+            print(f"⏳ [{label}] Scraping page {page_number + 1}...")
+            for attempt in range(MAX_RETRIES + 1):
+                await limiter.acquire_async(url)
+                pooled.meter.reset()
+                started = time.perf_counter()
+                try:
+                    html, retry = await load_listing_page(pooled.page, url, label, politeness, limiter)
+                except PlaywrightError as e:  # net::ERR_*, target closed, navigation aborted: this page failed
+                    METRICS.count("errors", stage="fetch", type=type(e).__name__)
+                    print(f"❌ [{label}] Page {page_number + 1} failed: {str(e).splitlines()[0]}")
+                    html, retry = None, False
+                    await pooled.recover()
+                load_ms = (time.perf_counter() - started) * 1000
+                if not retry or attempt == MAX_RETRIES:
+                    break
+                print(f"🔁 [{label}] Page {page_number + 1}: retry {attempt + 1}/{MAX_RETRIES} after backoff")
+            traffic = pooled.meter.traffic
+            if html and options["archive"] is not None:
+                await asyncio.to_thread(options["archive"].put, url, html, "listing", checkpoint.run_id, page_number)
+
+            # Parse off the event loop so the other contexts keep navigating
+            cards = await asyncio.to_thread(parse_listing, html, options["engine"]) if html else []
+            if page_number == 0:
+                plan.discover(html, len(cards) or None)
+            fresh = plan.finish(page_number, cards)
+            taken = None
+            if cards and not fresh:
+                print(f"♻️ [{label}] Page {page_number + 1}: all {len(cards)} companies seen before, skipped.")
+            elif cards:
+                print(f"🔍 [{label}] Page {page_number + 1} loaded ({len(cards)} cards).")
+                checkpoint.record(page_number, cards)
+                if options["store"] is not None:
+                    await asyncio.to_thread(options["store"].upsert_leads, cards, checkpoint.run_id, page_number,
+                                            directory=options["base_url"])
+            METRICS.count("pages", outcome="loaded" if html else "failed")
+            METRICS.count("cards", len(cards))
+            METRICS.count("bytes", traffic["bytes"], kind="listing")
+            append_jsonl(RESOURCE_METRICS_FILE, dict(
+                traffic, load_ms=round(load_ms, 1), page=page_number, policy=options["policy"].label,
+                backend="playwright", cards=len(cards), challenge=html is None,
+                at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            ))
+            # Booked last: a blocked profile's context is reopened here, after the page's results are safe
+            await pooled.page_done(html, blocked=html is None and retry)
+            await politeness.sleep_async()
+    finally:
+        if taken is not None:
+            plan.abandon(taken)
+        await pooled.close()
+
+
+# ✅ Scrape listing pages with many contexts in one browser, results merged in page order
+#    pages: number of listing pages, or None to read it from page 1 (pagination.py)
+async def scrape_pages_async(pages, checkpoint, base_url, user_agents, contexts=CONTEXTS,
+                             min_interval=1.5, policy=None, engine=DEFAULT_ENGINE, politeness=None, store=None,
+                             archive=None, pool=None):
+    plan = PagePlan(pages, done=checkpoint.records)
+    for page_number in sorted(checkpoint.records):
+        plan.mark_seen(page_number, checkpoint.get(page_number))
+    if checkpoint.records:
+        print(f"⏭️ Skipping {len(checkpoint.records)} page(s) finished in a previous run.")
+
+    todo = pages - len(plan.done) if pages is not None else contexts
+    if todo > 0:
+        options = {"base_url": base_url, "user_agents": user_agents, "policy": policy or ResourcePolicy(),
+                   "engine": engine, "store": store, "archive": archive, "pool": pool or ProfilePool()}
+        limiter = interval_limiter(min_interval)
+        politeness = politeness or AdaptivePoliteness()
+
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=HEADLESS)
+            try:
+                # A context that dies doesn't cancel the others: pages already saved are kept either way
+                results = await asyncio.gather(*(
+                    context_worker(browser, worker_id, plan, checkpoint, limiter, politeness, options)
+                    for worker_id in range(max(1, min(contexts, MAX_CONTEXTS, todo)))
+                ), return_exceptions=True)
+            finally:
+                await browser.close()
+            for worker_id, result in enumerate(results):
+                if isinstance(result, Exception):
+                    METRICS.count("errors", stage="context", type=type(result).__name__)
+                    print(f"❌ [context {worker_id}] stopped: {result!r}")
+
+    all_results = []
+    for page_number in sorted(checkpoint.records):
+        all_results.extend(checkpoint.get(page_number) or [])
+    return all_results
@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from checkpoint import write_json_atomic
+from metrics import METRICS
+
+PROFILE_DIR = "profiles"       # Persistent browser profiles (cookies, Cloudflare clearance, cache) + pool.json
+PROFILE_MAX_AGE_DAYS = 7       # Profiles older than this are recycled before a run
+MAX_BLOCKS = 2                 # Blocked pages in a row (challenge left after the retries) before a profile is recycled
+
+
+def now_iso():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def age_days(record):
+    created = time.mktime(time.strptime(record["created_at"], "%Y-%m-%dT%H:%M:%S"))
+    return (time.time() - created) / 86400
+
+
+# ✅ Pool of persistent browser profiles shared by all workers and kept across runs (profiles/pool.json)
+#    Each worker leases a profile for the run: the least recently used healthy one, else a new one. A profile keeps
+#    its user-agent for life (clearance cookies are tied to it). Profiles that keep getting blocked, or are older
+#    than max_age_days, are deleted and replaced by fresh ones.
+class ProfilePool:
+    def __init__(self, root=PROFILE_DIR, max_age_days=PROFILE_MAX_AGE_DAYS, max_blocks=MAX_BLOCKS, persistent=True):
+        self.persistent = persistent
+        self.root = root if persistent else tempfile.mkdtemp(prefix="clutch_profiles_")
+        self.max_age_days = max_age_days
+        self.max_blocks = max_blocks
+        self.manifest = os.path.join(self.root, "pool.json")
+        self.leased = set()
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self.profiles, self.next_id = {}, 0
+        if os.path.exists(self.manifest):
+            with open(self.manifest, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.profiles, self.next_id = manifest["profiles"], manifest["next_id"]
+        self.retire_expired()
+
+    def save(self):
+        write_json_atomic(self.manifest, {"updated_at": now_iso(), "next_id": self.next_id, "profiles": self.profiles})
+
+    def retire_expired(self):
+        with self.lock:
+            for record in list(self.profiles.values()):
+                if record["id"] not in self.leased and age_days(record) > self.max_age_days:
+                    self.remove(record, f"older than {self.max_age_days} days")
+            self.save()
+
+    # Caller holds the lock
+    def remove(self, record, reason):
+        shutil.rmtree(record["path"], ignore_errors=True)
+        del self.profiles[record["id"]]
+        METRICS.count("profiles_recycled", reason=reason.split()[0])
+        print(f"♻️ Profile {record['id']} recycled ({reason}, {record['pages']} pages, {record['runs']} runs)")
+
+    # ✅ A profile for one worker; record["warm"] tells whether it starts with a previous session's state
+    def lease(self, user_agents, worker_id=0):
+        with self.lock:
+            free = [r for r in self.profiles.values() if r["state"] == "healthy" and r["id"] not in self.leased]
+            if free:
+                record = min(free, key=lambda r: r["last_used_at"] or "")
+            else:
+                number, self.next_id = self.next_id, self.next_id + 1
+                record = {
+                    "id": f"p{number}", "path": os.path.join(self.root, f"p{number}"),
+                    "user_agent": user_agents[(worker_id + number) % len(user_agents)],
+                    "created_at": now_iso(), "last_used_at": None, "runs": 0, "pages": 0, "blocks": 0,
+                    "blocks_in_a_row": 0, "state": "healthy", "startup_s": {},
+                }
+                self.profiles[record["id"]] = record
+            record["warm"] = record["runs"] > 0 and os.path.isdir(record["path"])
+            self.leased.add(record["id"])
+            self.save()
+            return record
+
+    # ✅ Startup-to-first-card time, split into cold (new profile) and warm (reused profile) starts
+    def started(self, record, seconds):
+        kind = "warm" if record["warm"] else "cold"
+        METRICS.observe(f"startup.{kind}", seconds)
+        with self.lock:
+            record["startup_s"][kind] = round(seconds, 2)
+            self.save()
+        print(f"🌡️ Profile {record['id']}: {kind} start, first cards after {seconds:.1f}s")
+
+    # ✅ Book a page; returns False once the profile is blocked too often and should be swapped for a fresh one
+    def page_done(self, record, blocked=False):
+        with self.lock:
+            record["pages"] += 1
+            if not blocked:
+                record["blocks_in_a_row"] = 0
+            else:
+                record["blocks"] += 1
+                record["blocks_in_a_row"] += 1
+                if record["blocks_in_a_row"] >= self.max_blocks:
+                    record["state"] = "blocked"
+            return record["state"] == "healthy"
+
+    def release(self, record):
+        with self.lock:
+            self.leased.discard(record["id"])
+            record["runs"] += 1
+            record["last_used_at"] = now_iso()
+            record.pop("warm", None)
+            if record["state"] == "blocked":
+                self.remove(record, f"blocked {record['blocks_in_a_row']} times in a row")
+            self.save()
+
+    def report(self):
+        with self.lock:
+            lines = [f"🧑‍🤝‍🧑 Profile pool ({self.root}):"]
+            for record in sorted(self.profiles.values(), key=lambda r: r["id"]):
+                startups = ", ".join(f"{kind} {seconds}s" for kind, seconds in sorted(record["startup_s"].items()))
+                lines.append(f"   {record['id']:<4} {record['state']:<8} {age_days(record):4.1f} days, "
+                             f"{record['runs']} runs, {record['pages']} pages, {record['blocks']} blocks"
+                             + (f", startup {startups}" if startups else ""))
+        return "\n".join(lines)
+
+    def close(self):
+        if not self.persistent:
+            shutil.rmtree(self.root, ignore_errors=True)
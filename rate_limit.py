@@ -0,0 +1,143 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from pacing import WAIT_LOG
+
+GLOBAL_RATE = 2.0     # Requests per second across all hosts
+HOST_RATE = 0.67      # Requests per second to any single host (one every ~1.5 s)
+BURST = 1             # Requests a bucket lets through back to back after being idle
+
+# ✅ Backoff on throttle signals: 429 / 503, a Cloudflare challenge, or a Retry-After header
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 3       # Retries of one request after a throttle signal
+BACKOFF_BASE = 2.0    # Seconds before the first retry; doubles with every consecutive signal from the host
+BACKOFF_MAX = 120.0   # Longest backoff (a larger Retry-After is still honoured)
+
+
+# ✅ Retry-After header as seconds: either a number of seconds or an HTTP date (None if absent or unreadable)
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ✅ Does a response ask us to slow down?
+def is_throttled(status=None, headers=None, challenge=False):
+    if challenge or status in RETRY_STATUSES:
+        return True
+    return bool(headers) and (headers.get("cf-mitigated") or "").lower() == "challenge"
+
+
+# ✅ Token bucket: `rate` tokens per second, at most `capacity` saved up (rate None: unlimited)
+class TokenBucket:
+    def __init__(self, rate, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Takes a token now if there is one, else books the next one; returns how long the caller must wait
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            if not self.rate:
+                return max(0.0, self.updated - now)
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    # No token is handed out for `seconds` (requests already booked wait that much longer)
+    def pause(self, seconds):
+        with self.lock:
+            now = time.monotonic()
+            if not self.rate:
+                self.updated = max(self.updated, now + seconds)
+                return
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+            self.updated = now
+
+
+# ✅ Global bucket + one bucket per host; acquire() blocks until both allow the request
+#    Throttle signals pause the host's bucket with exponential, jittered backoff, so every worker on that host
+#    slows down, not only the one that was throttled.
+class RateLimiter:
+    def __init__(self, global_rate=GLOBAL_RATE, host_rate=HOST_RATE, burst=BURST):
+        self.global_bucket = TokenBucket(global_rate, burst)
+        self.host_rate = host_rate
+        self.burst = burst
+        self.hosts = {}
+        self.failures = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = TokenBucket(self.host_rate, self.burst)
+            return self.hosts[host]
+
+    def delay(self, url):
+        host = urlsplit(url).hostname or url
+        return max(self.global_bucket.reserve(), self.bucket(host).reserve())
+
+    def acquire(self, url):
+        delay = self.delay(url)
+        if delay > 0:
+            with WAIT_LOG.timed("rate_limit"):
+                time.sleep(delay)
+        return delay
+
+    # ✅ Same, for asyncio tasks (only the calling task waits)
+    async def acquire_async(self, url):
+        delay = self.delay(url)
+        if delay > 0:
+            with WAIT_LOG.timed("rate_limit"):
+                await asyncio.sleep(delay)
+        return delay
+
+    # ✅ Pause the host: BACKOFF_BASE x 2^(n-1) for the n-th signal in a row, jittered, or Retry-After if longer
+    def backoff(self, url, retry_after=None):
+        host = urlsplit(url).hostname or url
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            failures = self.failures[host]
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+        seconds = ceiling / 2 + random.uniform(0, ceiling / 2)
+        if retry_after is not None:
+            seconds = max(seconds, retry_after)
+        self.bucket(host).pause(seconds)
+        print(f"🚧 {host} is throttling us (signal {failures} in a row), backing off {seconds:.1f}s")
+        return seconds
+
+    # ✅ Feed a response back: backs off and returns True when the request should be retried
+    def throttled(self, url, status=None, headers=None, challenge=False):
+        if is_throttled(status, headers, challenge):
+            # Header lookups in lower case: requests and aiohttp match any case, Playwright lower-cases them
+            self.backoff(url, parse_retry_after(headers.get("retry-after")) if headers else None)
+            return True
+        self.succeeded(url)
+        return False
+
+    def succeeded(self, url):
+        host = urlsplit(url).hostname or url
+        with self.lock:
+            self.failures.pop(host, None)
+
+
+# ✅ Limiter for a single site: at most one request every `min_interval` seconds across all workers (0: no limit)
+def interval_limiter(min_interval):
+    rate = 1 / min_interval if min_interval > 0 else None
+    return RateLimiter(rate, rate)
@@ -0,0 +1,147 @@
+import json
+from urllib.parse import urlsplit
+
+from checkpoint import read_jsonl
+
+# ✅ Default policy for listing scrapes: we only parse the HTML, so skip what the browser doesn't need
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "doubleclick.net",
+    "facebook.net", "facebook.com", "connect.facebook.net", "hotjar.com", "hs-scripts.com", "hs-analytics.net",
+    "hubspot.com", "licdn.com", "linkedin.com", "bat.bing.com", "clarity.ms", "segment.io", "segment.com",
+    "intercom.io", "optimizely.com", "quantserve.com", "scorecardresearch.com", "sentry.io", "newrelic.com",
+    "nr-data.net", "cookielaw.org", "onetrust.com", "tiktok.com", "twitter.com", "ads-twitter.com",
+)
+# Third-party script hosts (CDNs, chat/consent/analytics widgets). Playwright blocks every third-party script by
+# resource type; CDP URL patterns can't tell scripts apart, so Selenium blocks these hosts by name instead.
+THIRD_PARTY_SCRIPT_HOSTS = (
+    "cdn.jsdelivr.net", "unpkg.com", "code.jquery.com", "ajax.googleapis.com", "cdn.amplitude.com", "cdn.mxpnl.com",
+    "cdn.heapanalytics.com", "js.driftt.com", "static.zdassets.com", "js.hsforms.net", "js.usemessages.com",
+    "script.crazyegg.com", "edge.fullstory.com", "cdn.mouseflow.com", "consent.cookiebot.com",
+    "browser.sentry-cdn.com", "cdn.polyfill.io",
+)
+# Never blocked: first party and the Cloudflare challenge (blocking Turnstile means more challenges, not fewer)
+ALLOWED_HOSTS = ("clutch.co", "challenges.cloudflare.com", "cloudflare.com", "cdnjs.cloudflare.com")
+
+# Network.setBlockedURLs only matches URL patterns, so resource types map to file extensions there
+EXTENSIONS_BY_TYPE = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "ogg", "mp3", "wav", "m4a", "mov"),
+}
+
+RESOURCE_METRICS_FILE = "output/resource_metrics.jsonl"
+
+
+def host_matches(host, patterns):
+    host = (host or "").lower()
+    return any(host == pattern or host.endswith("." + pattern) for pattern in patterns)
+
+
+# CDP patterns matching a host and its subdomains
+def host_url_patterns(hosts):
+    return [f"*://*.{host}/*" for host in hosts] + [f"*://{host}/*" for host in hosts]
+
+
+# ✅ Allow/deny lists per resource type and host
+class ResourcePolicy:
+    def __init__(self, enabled=True, blocked_types=BLOCKED_RESOURCE_TYPES, blocked_hosts=BLOCKED_HOSTS,
+                 allowed_hosts=ALLOWED_HOSTS, block_third_party_scripts=True):
+        self.enabled = enabled
+        self.blocked_types = set(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.allowed_hosts = tuple(allowed_hosts)
+        self.block_third_party_scripts = block_third_party_scripts
+
+    @property
+    def label(self):
+        return "on" if self.enabled else "off"
+
+    # ✅ Playwright path: the browser tells us the resource type of each request
+    def allows(self, url, resource_type):
+        if not self.enabled:
+            return True
+        host = urlsplit(url).hostname
+        if host_matches(host, self.allowed_hosts):
+            return resource_type not in self.blocked_types
+        if host_matches(host, self.blocked_hosts):
+            return False
+        if resource_type in self.blocked_types:
+            return False
+        if self.block_third_party_scripts and resource_type == "script":
+            return False
+        return True
+
+    # ✅ Selenium path: CDP URL patterns (hosts + file extensions of blocked types)
+    #    Third-party scripts are only blocked from THIRD_PARTY_SCRIPT_HOSTS; one from any other host still loads.
+    def blocked_url_patterns(self):
+        if not self.enabled:
+            return []
+        patterns = host_url_patterns(self.blocked_hosts)
+        if self.block_third_party_scripts:
+            patterns += host_url_patterns(THIRD_PARTY_SCRIPT_HOSTS)
+        for resource_type in sorted(self.blocked_types):
+            for extension in EXTENSIONS_BY_TYPE.get(resource_type, ()):
+                patterns += [f"*.{extension}", f"*.{extension}?*"]
+        return patterns
+
+
+# ✅ Turn on CDP request blocking for a Selenium/undetected-chromedriver session
+def apply_to_selenium(driver, policy):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": policy.blocked_url_patterns()})
+
+
+# ✅ Route every request of a Playwright page/context through the policy
+#    The handler works with both APIs: async Playwright awaits the coroutine that continue_()/abort() returns.
+def apply_to_playwright(page_or_context, policy):
+    if not policy.enabled:
+        return None
+
+    def handler(route):
+        request = route.request
+        if policy.allows(request.url, request.resource_type):
+            return route.continue_()
+        return route.abort()
+
+    return page_or_context.route("**/*", handler)
+
+
+# ✅ Bytes, requests and load time of the last page, from Chrome's performance log
+#    Needs the "goog:loggingPrefs" {"performance": "ALL"} capability; get_log() drains the log.
+def measure_selenium_page(driver):
+    transferred, requests, blocked = 0, 0, 0
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        if method == "Network.requestWillBeSent":
+            requests += 1
+        elif method == "Network.loadingFinished":
+            transferred += message["params"].get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and message["params"].get("blockedReason"):
+            blocked += 1
+
+    load_ms = driver.execute_script("""
+        const nav = performance.getEntriesByType('navigation')[0];
+        return nav ? (nav.loadEventEnd || nav.duration) - nav.startTime : null;
+    """)
+    return {"bytes": transferred, "requests": requests, "blocked": blocked, "load_ms": load_ms}
+
+
+# ✅ Average bytes / load time per page with the policy on vs off, over every run recorded in the metrics file
+def summarize_resource_metrics(path=RESOURCE_METRICS_FILE):
+    groups = {}
+    for record in read_jsonl(path):
+        groups.setdefault(record["policy"], []).append(record)
+
+    if not groups:
+        return "📉 Resource policy: no pages recorded yet"
+    lines = ["📉 Resource policy (all recorded runs):"]
+    for label, records in sorted(groups.items()):
+        loads = [r["load_ms"] for r in records if r.get("load_ms") is not None]
+        avg_bytes = sum(r["bytes"] for r in records) / len(records)
+        avg_load = sum(loads) / len(loads) if loads else 0
+        challenges = sum(1 for r in records if r.get("challenge"))
+        lines.append(f"   policy {label:<3}: {len(records)} pages, {avg_bytes / 1024:8.0f} KB/page, "
+                     f"{avg_load:7.0f} ms load, {challenges} challenge pages")
+    return "\n".join(lines)
@@ -0,0 +1,409 @@
+# Multi-directory crawl: one persistent frontier of (directory, page) tasks over many Clutch directories.
+#
+#   python scheduler.py --directories directories.txt --workers 4
+#   python scheduler.py --directory https://clutch.co/developers/python-django --directory https://clutch.co/web-developers
+#   python scheduler.py --directories directories.txt --resume        # continue an interrupted crawl
+#
+# Tasks are handed out breadth-first (page 1 of every directory, then page 2, ...), so every directory's page
+# count is known early and the directories are interleaved. Page loads go through a global and a per-host
+# token bucket (rate_limit.py). Companies listed in several directories are merged by profile_url in the
+# lead store, so `email_extractor.py --store` enriches each of them once.
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from card_parsers import parse_last_page
+from checkpoint import append_jsonl
+from clutch_scraper_stealth import (BASE_URL, FAST_PATH, MAX_WORKERS, PARSE_PROCESSES, PARSER_ENGINE, POLITENESS,
+                                    WorkerBrowser, fetch_page_tiered, measure_page_traffic)
+from html_archive import HtmlArchive
+from http_fastpath import FastPath, fast_path_report
+from lead_store import LEAD_DB, SCRAPED_FIELDS, LeadStore
+from metrics import METRICS, add_arguments as add_metrics_arguments, run_report
+from normalize import normalized_path, write_normalized
+from parquet_export import (add_arguments as add_parquet_arguments, check_arguments as check_parquet_arguments,
+                            export_store_run)
+from pacing import WAIT_LOG
+from pagination import FALLBACK_PAGES, MAX_PAGES, STOP_AFTER
+from pipeline import QUEUE_SIZE as PIPELINE_QUEUE_SIZE, PipelineStats, drain, run_parse_stage
+from profile_pool import PROFILE_DIR, ProfilePool
+from rate_limit import GLOBAL_RATE, HOST_RATE, RateLimiter
+from resource_policy import RESOURCE_METRICS_FILE, ResourcePolicy, summarize_resource_metrics
+
+FRONTIER_DB = "output/frontier.sqlite3"
+DIRECTORIES_FILE = "directories.txt"
+OUTPUT_FILE = "output/clutch_leads_multi.json"  # A CSV is written next to it
+METRICS_FILE = "output/clutch_leads_multi.metrics.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS directories (
+    url TEXT PRIMARY KEY,
+    last_page INTEGER,
+    stopped_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    directory TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cards INTEGER,
+    updated_at TEXT,
+    PRIMARY KEY (directory, page)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, page);
+"""
+
+BAD_STATUSES = ("empty", "repeated")
+
+
+# ✅ Persistent frontier of (directory, page) tasks
+#    pending -> leased -> done | empty | repeated | skipped. Leases and empty pages left by an interrupted crawl
+#    go back to pending on --resume. Page 0 of a directory plans its other pages (pagination.py rules).
+class Frontier:
+    WAIT = -1  # take(block=False): nothing pending until a directory's page 0 has been planned
+
+    def __init__(self, path=FRONTIER_DB, resume=False, max_pages=MAX_PAGES, stop_after=STOP_AFTER):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.max_pages = max_pages
+        self.stop_after = stop_after
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.condition = threading.Condition()
+        self.seen = {}
+        self.stopped = False
+
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO meta VALUES ('run_id', ?)", (time.strftime("%Y%m%dT%H%M%S"),))
+            retried = self.db.execute(
+                "UPDATE tasks SET status = 'pending' WHERE status IN ('leased', 'empty')").rowcount
+        self.run_id = self.db.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()[0]
+        if retried:
+            print(f"♻️ Resuming: {retried} interrupted or empty page(s) back in the frontier")
+
+    def add_directories(self, urls):
+        with self.condition, self.db:
+            for url in urls:
+                self.db.execute("INSERT OR IGNORE INTO directories (url) VALUES (?)", (url,))
+                self.db.execute("INSERT OR IGNORE INTO tasks (directory, page) VALUES (?, 0)", (url,))
+            self.condition.notify_all()
+
+    def directories(self):
+        with self.condition:
+            return [row[0] for row in self.db.execute("SELECT url FROM directories ORDER BY url")]
+
+    # ✅ Companies already saved for a directory (on --resume) count as seen
+    def mark_seen(self, directory, profile_urls):
+        with self.condition:
+            self.seen.setdefault(directory, set()).update(profile_urls)
+
+    # ✅ Next (directory, page), lowest page first across directories; None once the frontier is exhausted
+    def take(self, block=True):
+        with self.condition:
+            while True:
+                if self.stopped:
+                    return None
+                row = self.db.execute(
+                    "SELECT directory, page FROM tasks WHERE status = 'pending' ORDER BY page, attempts, directory "
+                    "LIMIT 1").fetchone()
+                if row:
+                    with self.db:
+                        self.db.execute("UPDATE tasks SET status = 'leased' WHERE directory = ? AND page = ?", row)
+                    return row
+                planning = self.db.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND page = 0").fetchone()[0]
+                if not planning:
+                    return None
+                if not block:
+                    return self.WAIT
+                self.condition.wait()
+
+    # ✅ Book a parsed page; returns False when it has nothing new for its directory (the page should not be kept)
+    def finish(self, directory, page_number, cards, last_page=None):
+        with self.condition, self.db:
+            urls = {card.get("profile_url") for card in cards}
+            seen = self.seen.setdefault(directory, set())
+            fresh = bool(urls - seen)
+            seen.update(urls)
+            status = "done" if fresh else "repeated" if cards else "empty"
+            self.db.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, cards = ?, updated_at = ? "
+                "WHERE directory = ? AND page = ?",
+                (status, len(cards), time.strftime("%Y-%m-%dT%H:%M:%S"), directory, page_number),
+            )
+            if page_number == 0:
+                self.plan(directory, last_page)
+            if not fresh:
+                self.stop_if_exhausted(directory, page_number)
+            self.condition.notify_all()
+            return fresh
+
+    # ✅ A worker quit (crashed) holding a task: booked as empty so --resume retries it, and a directory's page 0
+    #    still plans the directory (fallback size), so the workers waiting in take() don't wait forever
+    def abandon(self, directory, page_number):
+        with self.condition, self.db:
+            self.db.execute("UPDATE tasks SET status = 'empty', attempts = attempts + 1, updated_at = ? "
+                            "WHERE directory = ? AND page = ?",
+                            (time.strftime("%Y-%m-%dT%H:%M:%S"), directory, page_number))
+            if page_number == 0:
+                self.plan(directory, None)
+            self.condition.notify_all()
+
+    # ✅ A later stage failed: hand out no more tasks, put the leased ones (and `task`, the one being written when
+    #    the writer failed) back to pending, since their pages are dropped unwritten, and wake the waiting workers
+    def stop(self, task=None):
+        with self.condition, self.db:
+            self.stopped = True
+            self.db.execute("UPDATE tasks SET status = 'pending' WHERE status = 'leased'")
+            if task is not None:
+                self.db.execute("UPDATE tasks SET status = 'pending' WHERE directory = ? AND page = ?", task)
+            self.condition.notify_all()
+
+    def plan(self, directory, last_page):
+        pages = min(FALLBACK_PAGES if last_page is None else last_page + 1, self.max_pages)
+        if last_page is None:
+            print(f"⚠️ No pagination found on {directory}, planning {pages} pages.")
+        else:
+            print(f"🧭 {directory}: {last_page + 1} pages, planning {pages}.")
+        self.db.execute("UPDATE directories SET last_page = ? WHERE url = ?", (pages - 1, directory))
+        self.db.executemany("INSERT OR IGNORE INTO tasks (directory, page) VALUES (?, ?)",
+                            [(directory, page) for page in range(1, pages)])
+
+    # Same early stop as the single-directory plan: STOP_AFTER empty or repeated pages in a row
+    def stop_if_exhausted(self, directory, page_number):
+        first = page_number - self.stop_after + 1
+        bad = self.db.execute(
+            f"SELECT COUNT(*) FROM tasks WHERE directory = ? AND page BETWEEN ? AND ? "
+            f"AND status IN ({', '.join('?' * len(BAD_STATUSES))})",
+            (directory, first, page_number, *BAD_STATUSES),
+        ).fetchone()[0]
+        stopped = self.db.execute("SELECT stopped_at FROM directories WHERE url = ?", (directory,)).fetchone()[0]
+        if first >= 0 and bad == self.stop_after and stopped is None:
+            skipped = self.db.execute(
+                "UPDATE tasks SET status = 'skipped' WHERE directory = ? AND status = 'pending' AND page > ?",
+                (directory, page_number)).rowcount
+            self.db.execute("UPDATE directories SET stopped_at = ? WHERE url = ?", (page_number, directory))
+            print(f"🛑 {directory}: pages {first + 1}-{page_number + 1} were empty or repeated, "
+                  f"{skipped} later page(s) skipped.")
+
+    def pages_done(self, directory):
+        with self.condition:
+            rows = self.db.execute("SELECT page FROM tasks WHERE directory = ? AND status = 'done'", (directory,))
+            return [row[0] for row in rows]
+
+    def report(self):
+        with self.condition:
+            lines = ["🗺️ Frontier:"]
+            for url, last_page, stopped_at in self.db.execute(
+                    "SELECT url, last_page, stopped_at FROM directories ORDER BY url").fetchall():
+                counts = dict(self.db.execute(
+                    "SELECT status, COUNT(*) FROM tasks WHERE directory = ? GROUP BY status", (url,)))
+                states = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+                stop = f", stopped after page {stopped_at + 1}" if stopped_at is not None else ""
+                planned = last_page + 1 if last_page is not None else "?"
+                lines.append(f"   {url}: {planned} pages planned ({states}{stop})")
+        return "\n".join(lines)
+
+    def close(self):
+        with self.condition:
+            self.db.close()
+
+
+# ✅ Fetch stage: one browser session (pooled profile) takes (directory, page) tasks until the frontier is exhausted
+def frontier_worker(worker_id, frontier, limiter, html_queue, policy, stage, pool, fast_path=FAST_PATH):
+    browser = WorkerBrowser(pool, worker_id, policy)
+    fast = FastPath(limiter) if fast_path else None
+    taken = None  # task held but not delivered yet: handed back to the frontier if the worker dies with it
+    try:
+        while True:
+            taken = task = frontier.take()
+            if task is None:
+                return
+            directory, page_number = task
+
+            print(f"⏳ [worker {worker_id}] {directory} page {page_number + 1}...")
+            with stage.working():
+                try:
+                    html, traffic = fetch_page_tiered(browser.driver, page_number, limiter, policy, fast, directory)
+                except Exception as e:
+                    METRICS.count("errors", stage="fetch", type=type(e).__name__)
+                    print(f"❌ [worker {worker_id}] {directory} page {page_number + 1} failed: {e}")
+                    html, traffic = None, measure_page_traffic(browser.driver, page_number, policy, False)
+            stage.add(items=1)
+            stage.put(html_queue, (task, html, traffic))
+            taken = None
+            with stage.working():  # restart a blocked profile only once the page is delivered
+                if browser.page_done(html, traffic) and fast is not None:
+                    fast.close()
+                    fast = FastPath(limiter)
+            POLITENESS.sleep()
+    finally:
+        if taken is not None:
+            frontier.abandon(*taken)
+        if fast is not None:
+            fast.close()
+        browser.stop()
+
+
+# ✅ Write stage: frontier bookkeeping, archive, traffic log and lead store
+#    A failure (store, archive, disk) goes to stage.error: the frontier stops and the queue is drained, like
+#    clutch_scraper_stealth.write_worker
+def frontier_writer(result_queue, frontier, run_id, stage, store, archive=None):
+    task = None
+    try:
+        while True:
+            item = result_queue.get()
+            if item is None:
+                return
+            task, html, cards, traffic = item
+            directory, page_number = task
+            with stage.working():
+                last_page = parse_last_page(html, len(cards) or None) if page_number == 0 else None
+                fresh = frontier.finish(directory, page_number, cards, last_page)
+                if html and archive is not None:
+                    archive.put(f"{directory}?page={page_number}", html, "listing", run_id, page_number)
+                if traffic is not None:
+                    traffic.update(cards=len(cards), directory=directory)
+                    append_jsonl(RESOURCE_METRICS_FILE, traffic)
+                    METRICS.count("bytes", traffic["bytes"], kind="listing")
+                METRICS.count("cards", len(cards))
+                if cards and fresh:
+                    store.upsert_leads(cards, run_id, page_number, directory=directory)
+            stage.add(items=1)
+    except Exception as e:
+        stage.fail(e, lambda: frontier.stop(task))
+        drain(result_queue)
+
+
+# ✅ Crawl every directory in the frontier with a pool of browsers, rate-limited, as a fetch/parse/write pipeline
+def crawl_frontier(frontier, store, workers=1, limiter=None, policy=None, archive=None,
+                   parse_processes=PARSE_PROCESSES, stats=None, fast_path=FAST_PATH, pool=None):
+    limiter = limiter or RateLimiter()
+    policy = policy or ResourcePolicy()
+    stats = stats or PipelineStats()
+    pool = pool or ProfilePool()
+    workers = max(1, min(workers, MAX_WORKERS))
+    html_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    result_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    fetch_stage = stats.stage("fetch", workers)
+    parse_stage = stats.stage("parse", parse_processes)
+    write_stage = stats.stage("write")
+    fetchers = [
+        threading.Thread(target=frontier_worker,
+                         args=(worker_id, frontier, limiter, html_queue, policy, fetch_stage, pool, fast_path),
+                         daemon=True)
+        for worker_id in range(workers)
+    ]
+    parser = threading.Thread(target=run_parse_stage,
+                              args=(html_queue, result_queue, parse_stage, PARSER_ENGINE, parse_processes,
+                                    frontier.stop),
+                              daemon=True)
+    writer = threading.Thread(target=frontier_writer,
+                              args=(result_queue, frontier, frontier.run_id, write_stage, store, archive), daemon=True)
+    for thread in fetchers + [parser, writer]:
+        thread.start()
+    for thread in fetchers:
+        thread.join()
+    html_queue.put(None)
+    parser.join()
+    writer.join()
+    stats.raise_error()
+
+
+def read_directories(path):
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl many Clutch directories from one persistent frontier.")
+    parser.add_argument("--directories", default=DIRECTORIES_FILE if os.path.exists(DIRECTORIES_FILE) else None,
+                        help=f"File with one directory URL per line (default: {DIRECTORIES_FILE} if present)")
+    parser.add_argument("--directory", action="append", default=[], help="Directory URL (repeatable)")
+    parser.add_argument("--workers", type=int, default=2, help=f"Browser sessions (capped at MAX_WORKERS={MAX_WORKERS})")
+    parser.add_argument("--rate", type=float, default=GLOBAL_RATE, help="Page loads per second, all hosts together")
+    parser.add_argument("--host-rate", type=float, default=HOST_RATE, help="Page loads per second to one host")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES, help="Most pages planned per directory")
+    parser.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES)
+    parser.add_argument("--resource-policy", choices=["on", "off"], default="on")
+    parser.add_argument("--no-fast-path", action="store_true", help="Load every listing page in the browser")
+    parser.add_argument("--resume", action="store_true", help=f"Continue the crawl recorded in {FRONTIER_DB}")
+    parser.add_argument("--profiles", default=PROFILE_DIR, help="Persistent browser profiles reused across runs")
+    parser.add_argument("--fresh-profiles", action="store_true", help="Throwaway profiles deleted after the run")
+    parser.add_argument("--store", default=LEAD_DB)
+    parser.add_argument("--no-archive", action="store_true")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    add_parquet_arguments(parser)
+    add_metrics_arguments(parser, METRICS_FILE)
+    args = parser.parse_args()
+    check_parquet_arguments(parser, args)
+    return args
+
+
+def main():
+    args = parse_args()
+    with run_report(args, "scheduler") as report:
+        run(args, report)
+
+
+def run(args, report):
+    directories = read_directories(args.directories) + args.directory
+    frontier = Frontier(FRONTIER_DB, resume=args.resume, max_pages=args.max_pages)
+    if directories or not args.resume:
+        frontier.add_directories(directories or [BASE_URL])
+
+    store = LeadStore(args.store)
+    store.begin_run(frontier.run_id)
+    for directory in frontier.directories():
+        frontier.mark_seen(directory, store.directory_members(frontier.run_id, directory))
+    archive = None if args.no_archive else HtmlArchive()
+    limiter = RateLimiter(args.rate, args.host_rate)
+    stats = PipelineStats()
+    pool = ProfilePool(args.profiles, persistent=not args.fresh_profiles)
+    print(f"🚀 Crawling {len(frontier.directories())} directories with {args.workers} worker(s), run {frontier.run_id}")
+
+    started = time.perf_counter()
+    try:
+        crawl_frontier(frontier, store, args.workers, limiter, ResourcePolicy(enabled=args.resource_policy == "on"),
+                       archive, max(1, args.parse_processes), stats, not args.no_fast_path, pool)
+    finally:
+        if archive:
+            archive.close()
+        print(frontier.report())
+        print(pool.report())
+        pool.close()
+        print(WAIT_LOG.report(time.perf_counter() - started, args.workers))
+        print(stats.report())
+        print(fast_path_report())
+        report["pipeline"] = stats.snapshot()
+        print(summarize_resource_metrics())
+
+    try:
+        for directory in frontier.directories():
+            store.finish_run(frontier.run_id, frontier.pages_done(directory), directory)
+        per_directory, unique = store.directory_summary(frontier.run_id)
+        listed = sum(per_directory.values())
+        print(f"🔗 {listed} listings across {len(per_directory)} directories -> {unique} unique companies "
+              f"({listed - unique} cross-listed duplicates merged by profile_url)")
+        count = store.export_json(args.output, SCRAPED_FIELDS, frontier.run_id)
+        store.export_csv(os.path.splitext(args.output)[0] + ".csv", SCRAPED_FIELDS, frontier.run_id)
+        write_normalized(store.iter_leads(SCRAPED_FIELDS, frontier.run_id), normalized_path(args.output))
+        if args.parquet:
+            export_store_run(store, frontier.run_id, args.parquet)
+    finally:
+        store.close()
+        frontier.close()
+    print(f"✅ {count} companies saved to {args.output}. "
+          f"Enrich them once each with: python email_extractor.py --store {args.store} --run {frontier.run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip("dns")
+
+import dns_preflight
+import email_extractor
+from benchmarks.stub_dns import STUB_NEGATIVE_TTL, start_stub_resolver
+from dns_preflight import MIN_TTL, DnsCache, DnsPreflight
+
+ADDRESSES = {"acme.test": "127.0.0.1", "closed.test": "127.0.0.1"}
+MX = {"acme.test": "mx.acme.test", "mailonly.test": "mx.mailonly.test", "nullmx.test": "."}
+
+
+@pytest.fixture(scope="module")
+def nameserver():
+    server, nameserver = start_stub_resolver(ADDRESSES, MX, servfail=["broken.test"], silent=["slow.test"])
+    yield nameserver
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DnsCache(str(tmp_path / "dns.sqlite3"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    yield server.getsockname()[1]
+    server.close()
+
+
+def closed_port():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def check(preflight, websites):
+    return asyncio.run(preflight.check(websites))
+
+
+def test_resolves_and_caches(nameserver, cache, listener):
+    preflight = DnsPreflight(cache, nameserver, probe=True)
+    assert check(preflight, [f"http://acme.test:{listener}"]) == [f"http://acme.test:{listener}"]
+    result = preflight.results["acme.test"]
+    assert (result["status"], result["lookup"], result["connect"]) == ("ok", "ok", "ok")
+    assert result["addresses"] == ["127.0.0.1"] and not result["cached"]
+    assert result["dns_ms"] > 0 and result["connect_ms"] is not None
+
+    again = DnsPreflight(cache, nameserver, probe=False)
+    check(again, ["https://acme.test"])
+    assert again.results["acme.test"]["cached"]
+
+
+def test_nxdomain_dropped_with_negative_ttl(nameserver, cache):
+    preflight = DnsPreflight(cache, nameserver, probe=False)
+    assert check(preflight, ["https://gone.test"]) == []
+    assert preflight.dropped("gone.test") == "unresolvable"
+    expires_at = cache.db.execute("SELECT expires_at FROM answers WHERE name = 'gone.test'").fetchone()[0]
+    assert cache.get("gone.test", "addr")["status"] == "nxdomain"
+    assert expires_at == pytest.approx(dns_preflight.time.time() + max(MIN_TTL, STUB_NEGATIVE_TTL), abs=5)
+
+
+def test_noerror_without_address_dropped(nameserver, cache):
+    preflight = DnsPreflight(cache, nameserver, probe=False)
+    assert check(preflight, ["https://mailonly.test"]) == []
+    assert preflight.results["mailonly.test"]["lookup"] == "no_answer"
+    assert preflight.dropped("mailonly.test") == "unresolvable"
+
+
+@pytest.mark.parametrize("host, lookup", [("broken.test", "servfail"), ("slow.test", "timeout")])
+def test_transient_failures_kept_and_not_cached(nameserver, cache, host, lookup):
+    preflight = DnsPreflight(cache, nameserver, timeout=0.5, probe=False)
+    assert check(preflight, [f"https://{host}"]) == [f"https://{host}"]
+    assert preflight.results[host]["lookup"] == lookup
+    assert preflight.results[host]["status"] == "unverified"
+    assert preflight.dropped(host) is None
+    assert cache.get(host, "addr") is None
+
+
+def test_connect_refused_dropped(nameserver):
+    preflight = DnsPreflight(None, nameserver, probe=True)
+    assert check(preflight, [f"http://closed.test:{closed_port()}"]) == []
+    assert preflight.dropped("closed.test") == "unreachable"
+
+
+def test_connect_timeout_kept(nameserver, monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    monkeypatch.setattr(dns_preflight.asyncio, "open_connection", hang)
+    preflight = DnsPreflight(None, nameserver, connect_timeout=0.2, probe=True)
+    assert check(preflight, ["https://acme.test"]) == ["https://acme.test"]
+    assert preflight.results["acme.test"]["connect"] == "timeout"
+    assert preflight.dropped("acme.test") is None
+
+
+@pytest.mark.parametrize("domain, ok", [("acme.test", True), ("nullmx.test", False), ("gone.test", False),
+                                        ("broken.test", True)])
+def test_mail_domains(nameserver, domain, ok):
+    preflight = DnsPreflight(None, nameserver, timeout=0.5)
+    assert asyncio.run(preflight.mail_domain_ok(domain)) is ok
+
+
+# ✅ Only definite answers reach the lead store as dropped; transient failures are fetched and stored as usual
+def test_store_status_only_for_definite_failures(nameserver, monkeypatch):
+    preflight = DnsPreflight(None, nameserver, timeout=0.5, probe=False)
+    check(preflight, ["https://gone.test", "https://broken.test", "https://slow.test", "https://acme.test"])
+    monkeypatch.setattr(email_extractor, "PREFLIGHT", preflight)
+    assert email_extractor.dropped_status("https://gone.test") == "unresolvable"
+    for website in ("https://broken.test", "https://slow.test", "https://acme.test"):
+        assert email_extractor.dropped_status(website) is None
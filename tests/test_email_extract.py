@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks.fixtures import load_leads, render_homepage
+from email_extractor import CHUNK_SIZE, find_email_in_bytes, find_email_in_html, scan_for_email
+from url_utils import canonical_domain
+
+ASSET_HEAD = """<html><head>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css">
+<script src="https://unpkg.com/swiper@8.4.7/swiper-bundle.min.js"></script>
+<img src="https://cdn.example.com/lib@1.2.3.min.js">
+</head><body>{body}</body></html>"""
+
+
+def homepages():
+    for lead in load_leads():
+        domain = canonical_domain(lead.get("website"))
+        if domain:
+            yield lead["name"], f"hello@{domain}"
+
+
+# ✅ Streaming scan agrees with the DOM reference on homepages rendered from the dev_history sample
+@pytest.mark.parametrize("contact", ["text", "entity"])
+def test_parity_with_soup_extractor(contact):
+    for name, email in homepages():
+        page = render_homepage(name, email, sections=3, contact=contact)
+        assert find_email_in_bytes(page.encode("utf-8")) == find_email_in_html(page) == email
+
+
+def test_mailto_and_no_email_pages():
+    for name, email in homepages():
+        assert find_email_in_bytes(render_homepage(name, email, sections=3, contact="mailto").encode()) == email
+        page = render_homepage(name, None, sections=3)
+        assert find_email_in_bytes(page.encode("utf-8")) is None
+        assert find_email_in_html(page) is None
+
+
+def test_versioned_assets_are_not_emails():
+    page = ASSET_HEAD.format(body="<p>Write to hello@acme.io</p>")
+    assert find_email_in_bytes(page.encode("utf-8")) == find_email_in_html(page) == "hello@acme.io"
+    assert scan_for_email(ASSET_HEAD.format(body="").encode("utf-8")) is None
+
+
+@pytest.mark.parametrize("text, email", [
+    ("info@acme.co.uk", "info@acme.co.uk"),
+    ("version pkg@2.0.1 released", None),
+    ('<a href="mailto:sales@acme.io?subject=Hi">Mail</a>', "sales@acme.io"),
+    ('<a href="https://acme.io/team/jane@acme.io">Jane</a>', None),
+    ('<img src="/static/logo@2x.png">', None),
+])
+def test_scan_rules(text, email):
+    assert scan_for_email(text.encode("utf-8")) == email
+
+
+def test_email_split_across_chunks():
+    page = b"<p>" + b"x" * (CHUNK_SIZE - 6) + b" hello@acme.io</p>"
+    assert find_email_in_bytes(page) == "hello@acme.io"
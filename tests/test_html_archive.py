@@ -0,0 +1,46 @@
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import load_leads, render_homepage, render_listing_page
+from card_parsers import parse_listing
+from html_archive import HtmlArchive, reparse
+from lead_store import LeadStore
+
+
+# ✅ Reparse keeps one lead per profile_url, the same leads in the same order as the store's export of the run
+def test_reparse_dedups_like_the_store(tmp_path):
+    leads = load_leads()
+    pages = [leads[:40], leads[30:] + leads[:3]]  # pages 0 and 1 overlap; the sample also repeats cards itself
+    archive = HtmlArchive(str(tmp_path / "archive"))
+    store = LeadStore(str(tmp_path / "leads.sqlite3"))
+    try:
+        for page, cards in enumerate(pages):
+            html = render_listing_page(cards, page + 1, len(pages) - 1)
+            archive.put(f"https://clutch.co/developers/python-django?page={page}", html, "listing", "run-1", page)
+            store.upsert_leads(parse_listing(html), "run-1", page)
+        _, reparsed = reparse(archive, "run-1", workers=1)
+        exported = list(store.iter_leads(run_id="run-1"))
+    finally:
+        archive.close()
+        store.close()
+
+    urls = [lead["profile_url"] for lead in reparsed]
+    assert len(urls) == len(set(urls)) == len({lead["profile_url"] for lead in leads})
+    assert urls == [lead["profile_url"] for lead in exported]
+
+
+# ✅ With --crawl a domain has several archived pages: the email comes from whichever one has it
+def test_reparse_with_emails_scans_every_page_of_a_domain(tmp_path):
+    leads = load_leads()[:5]
+    archive = HtmlArchive(str(tmp_path / "archive"))
+    try:
+        archive.put("https://clutch.co/developers/python-django?page=0", render_listing_page(leads), "listing",
+                    "run-1", 0)
+        root = "https://" + urlsplit(leads[0]["website"]).netloc
+        archive.put(root + "/", render_homepage("Acme", "hello@acme-dev.com", sections=2), "homepage")
+        for path in ("/contact/", "/about/"):  # fetched later, no email on them
+            archive.put(root + path, render_homepage("Acme", sections=2), "homepage")
+        _, reparsed = reparse(archive, "run-1", workers=1, with_emails=True)
+    finally:
+        archive.close()
+    by_url = {lead["profile_url"]: lead for lead in reparsed}
+    assert by_url[leads[0]["profile_url"]]["email"] == "hello@acme-dev.com"
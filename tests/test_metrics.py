@@ -0,0 +1,17 @@
+from metrics import Metrics, format_counter
+
+
+# ✅ Large counters (bytes) are printed in full, not in scientific notation
+def test_report_prints_counters_in_full():
+    metrics = Metrics()
+    metrics.count("bytes", 1234567, stage="fetch")
+    metrics.count("bytes", 2.0 ** 40, stage="archive")
+    metrics.count("errors", stage="parse")
+    report = metrics.report()
+    assert 'bytes{stage="fetch"}=1,234,567' in report
+    assert 'bytes{stage="archive"}=1,099,511,627,776' in report
+    assert 'errors{stage="parse"}=1' in report and "e+" not in report
+
+
+def test_fractional_counters_keep_their_fraction():
+    assert format_counter(1234.5) == "1,234.5" and format_counter(0) == "0"
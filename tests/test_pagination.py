@@ -0,0 +1,26 @@
+import threading
+
+from pagination import FALLBACK_PAGES, PagePlan
+
+
+# ✅ A worker that dies holding page 0 must not leave the others waiting for the page count
+def test_abandoned_first_page_unblocks_waiting_workers():
+    plan = PagePlan()
+    assert plan.take() == 0
+    taken = []
+    waiter = threading.Thread(target=lambda: taken.append(plan.take()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+
+    plan.abandon(0)
+    waiter.join(2)
+    assert taken == [1] and plan.planned() == FALLBACK_PAGES
+
+
+def test_abandoned_page_stays_undone():
+    plan = PagePlan(3)
+    assert [plan.take(), plan.take()] == [0, 1]
+    plan.abandon(1)
+    assert plan.take() == 2 and plan.take() is None
+    assert 1 not in plan.done
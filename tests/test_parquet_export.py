@@ -0,0 +1,23 @@
+import pytest
+
+from benchmarks.fixtures import load_leads
+
+pytest.importorskip("pyarrow")
+from parquet_export import read_leads, write_leads  # noqa: E402
+
+
+# ✅ Enriching the same JSON file twice writes two run files; reads keep the latest run's row per profile_url
+def test_read_leads_keeps_latest_run_per_lead(tmp_path):
+    leads = load_leads()[:10]
+    root = str(tmp_path / "parquet")
+    write_leads([dict(lead, email=None) for lead in leads], "20261017T090000", root)
+    write_leads([dict(lead, email="hello@acme-dev.com") for lead in leads], "20261018T090000", root)
+
+    latest = read_leads(root, columns=["profile_url", "email"])
+    assert list(latest.columns) == ["profile_url", "email"]
+    assert len(latest) == len({lead["profile_url"] for lead in leads})
+    assert set(latest["email"]) == {"hello@acme-dev.com"}
+
+    history = read_leads(root, columns=["email"], latest=False)
+    assert len(history) == 2 * len(leads)
+    assert len(read_leads(root, run_date="2026-10-17")) == len(latest)
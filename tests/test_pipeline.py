@@ -0,0 +1,128 @@
+import queue
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pipeline
+from benchmarks.fixtures import load_leads, render_listing_page
+from checkpoint import Checkpoint
+from pipeline import QUEUE_SIZE, PipelineStats, run_parse_stage
+
+
+class BrokenPool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("a parser process died")
+
+
+# ✅ A broken process pool ends the stage with its error instead of hanging the fetchers and the writer
+def test_broken_pool_stops_writer_and_drains_fetchers(monkeypatch):
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", BrokenPool)
+    html_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    result_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    stage = PipelineStats().stage("parse")
+    written = []
+
+    def fetch():
+        for page in range(3 * QUEUE_SIZE):
+            html_queue.put((page, "<html></html>", None))
+        html_queue.put(None)
+
+    def write():
+        while (item := result_queue.get()) is not None:
+            written.append(item)
+
+    threads = [threading.Thread(target=target, daemon=True)
+               for target in (fetch, lambda: run_parse_stage(html_queue, result_queue, stage), write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert isinstance(stage.error, BrokenProcessPool) and written == []
+
+
+def test_pages_without_html_pass_through():
+    html_queue, result_queue = queue.Queue(), queue.Queue()
+    stage = PipelineStats().stage("parse")
+    for page in range(3):
+        html_queue.put((page, None, {"page": page}))
+    html_queue.put(None)
+    run_parse_stage(html_queue, result_queue, stage)
+    assert [result_queue.get() for _ in range(4)] == [(0, None, [], {"page": 0}), (1, None, [], {"page": 1}),
+                                                       (2, None, [], {"page": 2}), None]
+    assert stage.error is None
+
+
+class FakeBrowser:
+    driver = None
+
+    def __init__(self, pool, worker_id, policy):
+        pass
+
+    def page_done(self, html, traffic):
+        return False
+
+    def stop(self):
+        pass
+
+
+# Runs scrape_pages with fake browsers serving rendered listing pages; returns (thread, outcome)
+def start_scrape(monkeypatch, tmp_path, pages, store=None):
+    scraper = pytest.importorskip("clutch_scraper_stealth")
+    leads = load_leads()
+    monkeypatch.setattr(scraper, "WorkerBrowser", FakeBrowser)
+
+    def fetch(driver, page_number, *args, **kwargs):  # 20 companies no other page has
+        cards = [dict(lead, profile_url=f"https://clutch.co/profile/p{page_number}-{i}") for i, lead in
+                 enumerate(leads[:20])]
+        return render_listing_page(cards, page_number + 1, 39), None
+
+    monkeypatch.setattr(scraper, "fetch_page_tiered", fetch)
+    monkeypatch.setattr(scraper.POLITENESS, "sleep", lambda: None)
+    checkpoint = Checkpoint(str(tmp_path / "pages.jsonl"), str(tmp_path / "checkpoint.json"))
+    outcome = {}
+
+    def scrape():
+        try:
+            outcome["results"] = scraper.scrape_pages(pages, checkpoint, workers=2, min_interval=0, store=store,
+                                                      parse_processes=1, fast_path=False, pool=object())
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=scrape, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+# ✅ A parse stage failing before page 0 is written stops the plan: the scrape returns and re-raises the error
+def test_scrape_pages_raises_when_the_parse_pool_breaks(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", BrokenPool)
+    thread, outcome = start_scrape(monkeypatch, tmp_path, None)
+    thread.join(10)
+    assert not thread.is_alive()
+    assert isinstance(outcome.get("error"), BrokenProcessPool)
+
+
+class FailingStore:
+    def upsert_leads(self, *args, **kwargs):
+        raise OSError("disk full")
+
+
+# ✅ A failing writer stops the plan and drains the queues: the scrape returns and re-raises, nothing is checkpointed
+@pytest.mark.parametrize("pages", [None, 40])
+def test_scrape_pages_raises_when_the_writer_fails(monkeypatch, tmp_path, pages):
+    thread, outcome = start_scrape(monkeypatch, tmp_path, pages, FailingStore())
+    thread.join(10)
+    assert not thread.is_alive()
+    assert isinstance(outcome.get("error"), OSError)
+    assert not (tmp_path / "pages.jsonl").read_text()
@@ -0,0 +1,23 @@
+from fnmatch import fnmatch
+
+from resource_policy import ALLOWED_HOSTS, THIRD_PARTY_SCRIPT_HOSTS, ResourcePolicy
+
+
+def blocked_by_cdp(policy, url):
+    return any(fnmatch(url, pattern) for pattern in policy.blocked_url_patterns())
+
+
+# ✅ Third-party script hosts are blocked on the Selenium (CDP) path too, never Clutch or the challenge
+def test_cdp_patterns_block_third_party_script_hosts():
+    policy = ResourcePolicy()
+    for host in THIRD_PARTY_SCRIPT_HOSTS:
+        url = f"https://{host}/lib/widget.js"
+        assert blocked_by_cdp(policy, url) and not policy.allows(url, "script")
+    for host in ALLOWED_HOSTS:
+        assert not blocked_by_cdp(policy, f"https://{host}/cdn-cgi/challenge-platform/main.js")
+
+
+def test_cdp_patterns_follow_the_script_switch():
+    url = "https://cdn.jsdelivr.net/npm/swiper@8.4.7/swiper-bundle.min.js"
+    assert not blocked_by_cdp(ResourcePolicy(block_third_party_scripts=False), url)
+    assert ResourcePolicy(enabled=False).blocked_url_patterns() == []
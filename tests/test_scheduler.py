@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pipeline
+from benchmarks.fixtures import load_leads, render_listing_page
+from test_pipeline import BrokenPool, FailingStore, FakeBrowser
+
+scheduler = pytest.importorskip("scheduler")
+
+DIRECTORIES = ["https://clutch.co/developers/python-django", "https://clutch.co/web-developers"]
+
+
+# Runs crawl_frontier over two directories with fake browsers; returns (thread, outcome, frontier)
+def start_crawl(monkeypatch, tmp_path, store):
+    leads = load_leads()
+
+    def fetch(driver, page_number, limiter, policy, fast=None, base_url=None):
+        cards = [dict(lead, profile_url=f"{base_url}/p{page_number}-{i}") for i, lead in enumerate(leads[:20])]
+        return render_listing_page(cards, page_number + 1, 39), None
+
+    monkeypatch.setattr(scheduler, "WorkerBrowser", FakeBrowser)
+    monkeypatch.setattr(scheduler, "fetch_page_tiered", fetch)
+    monkeypatch.setattr(scheduler.POLITENESS, "sleep", lambda: None)
+    frontier = scheduler.Frontier(str(tmp_path / "frontier.sqlite3"))
+    frontier.add_directories(DIRECTORIES)
+    outcome = {}
+
+    def crawl():
+        try:
+            scheduler.crawl_frontier(frontier, store, workers=2, parse_processes=1, fast_path=False, pool=object())
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=crawl, daemon=True)
+    thread.start()
+    return thread, outcome, frontier
+
+
+def statuses(frontier):
+    return dict(frontier.db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+
+# ✅ Workers waiting for a page 0 are released by stop(); leased tasks go back to pending
+def test_stop_releases_waiting_workers(tmp_path):
+    frontier = scheduler.Frontier(str(tmp_path / "frontier.sqlite3"))
+    frontier.add_directories(DIRECTORIES[:1])
+    assert frontier.take() == (DIRECTORIES[0], 0)
+    taken = []
+    waiter = threading.Thread(target=lambda: taken.append(frontier.take()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+
+    frontier.stop()
+    waiter.join(2)
+    assert taken == [None] and statuses(frontier) == {"pending": 1}
+    frontier.close()
+
+
+def test_crawl_raises_when_the_parse_pool_breaks(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", BrokenPool)
+    thread, outcome, frontier = start_crawl(monkeypatch, tmp_path, store=None)
+    thread.join(10)
+    assert not thread.is_alive()
+    assert isinstance(outcome.get("error"), BrokenProcessPool)
+    assert set(statuses(frontier)) == {"pending"}
+    frontier.close()
+
+
+# ✅ A failing store stops the crawl; the page it rejected stays undone for --resume
+def test_crawl_raises_when_the_writer_fails(monkeypatch, tmp_path):
+    thread, outcome, frontier = start_crawl(monkeypatch, tmp_path, FailingStore())
+    thread.join(10)
+    assert not thread.is_alive()
+    assert isinstance(outcome.get("error"), OSError)
+    assert "done" not in statuses(frontier) and "leased" not in statuses(frontier)
+    frontier.close()
@@ -0,0 +1,29 @@
+import pytest
+
+from url_utils import canonical_domain, canonical_website, normalize_url
+
+
+# ✅ A bad port on a Clutch card is dropped instead of raising ValueError (and crashing group_by_domain)
+@pytest.mark.parametrize("url", ["http://example.com:abc/contact", "https://example.com:99999/contact"])
+def test_malformed_port_is_dropped(url):
+    scheme = url.split(":", 1)[0]
+    assert canonical_website(url) == f"{scheme}://example.com/contact"
+    assert canonical_domain(url) == "example.com"
+    assert normalize_url(url) == f"{scheme}://example.com/contact"
+
+
+def test_malformed_port_without_scheme():
+    assert canonical_domain("example.com:-1") == "example.com"
+
+
+def test_ports_are_kept_unless_default():
+    assert canonical_website("https://Example.com:8443/a/?utm_source=clutch.co") == "https://example.com:8443/a"
+    assert canonical_website("https://example.com:443/") == "https://example.com"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_group_by_domain_survives_a_bad_port():
+    from email_extractor import group_by_domain
+    groups = group_by_domain([{"website": "https://acme.io:abc/"}, {"website": "https://www.acme.io/?utm_source=x"}])
+    assert groups == [("https://acme.io", [{"website": "https://acme.io:abc/"},
+                                           {"website": "https://www.acme.io/?utm_source=x"}])]
@@ -0,0 +1,65 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# ✅ Port of a split URL; None when there is none, or when it is malformed or out of range ("host:abc", ":99999")
+#    A bad port on one Clutch card must not crash the grouping of a whole run
+def url_port(parts):
+    try:
+        return parts.port
+    except ValueError:
+        return None
+
+
+# ✅ Normalize a URL so equivalent spellings share one cache key
+#    (lowercase scheme/host, no default port, no fragment, sorted query, "/" for an empty path)
+def normalize_url(url):
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    port = url_port(parts)
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+# ✅ Query params that only track the visit (Clutch adds utm_* to every website link)
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga", "_gl", "ref", "referrer", "source"}
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_")
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+# ✅ Website URL without tracking params, lowercase scheme/host, no trailing slash (a malformed port is dropped)
+#    "https://WWW.Digiscorp.com/python/?utm_source=clutch.co" -> "https://www.digiscorp.com/python"
+def canonical_website(url):
+    if not url:
+        return None
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    port = url_port(parts)
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)])
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), query, ""))
+
+
+# ✅ Domain a website belongs to: lowercase host without "www." and port
+def canonical_domain(url):
+    website = canonical_website(url)
+    if not website:
+        return None
+    host = urlsplit(website).hostname or ""
+    return host[4:] if host.startswith("www.") else host